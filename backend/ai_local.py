@@ -9,6 +9,11 @@ import json
 from collections import Counter
 import re
 
+from scraper import page_keyword_text
+from lazy_imports import lazy_import
+
+tfidf_index = lazy_import("tfidf_index")
+
 
 class LocalAnalyzer:
     """Rule-based marketing intelligence analyzer"""
@@ -36,21 +41,17 @@ class LocalAnalyzer:
         """Analyze competitive landscape using rule-based logic"""
 
         your_score = your_site_data.get('seo_score', 0)
-        your_keywords = set(your_site_data.get('keywords', []))
         your_pages = your_site_data.get('pages_analyzed', 0)
 
         # Analyze competitors
         competitor_scores = []
-        all_competitor_keywords = set()
         threat_levels = {}
 
         for comp in competitor_data:
             comp_score = comp.get('avg_seo_score', comp.get('seo_score', 0))
             comp_domain = comp.get('domain', 'Unknown')
-            comp_keywords = set(comp.get('keywords', []))
 
             competitor_scores.append(comp_score)
-            all_competitor_keywords.update(comp_keywords)
 
             # Calculate threat level
             if comp_score > your_score + 15:
@@ -70,7 +71,7 @@ class LocalAnalyzer:
             position = "medium"
 
         # Find keyword gaps
-        keyword_gaps = list(all_competitor_keywords - your_keywords)[:15]
+        keyword_gaps = self._find_keyword_gaps(your_site_data, competitor_data)
 
         # Generate differentiators based on your site's strengths
         differentiators = self._generate_differentiators(your_site_data, competitor_data)
@@ -98,6 +99,22 @@ class LocalAnalyzer:
             "quick_wins": quick_wins
         }
 
+    def _site_documents(self, owner, site_data: Dict) -> List:
+        """Crawled pages as documents, or the site's keyword list as one document"""
+        pages = [p['analysis'] for p in site_data.get('pages', []) if 'analysis' in p]
+        if pages:
+            return [(owner, tfidf_index.terms(page_keyword_text(page))) for page in pages]
+        keywords = site_data.get('keywords', [])
+        return [(owner, Counter(keywords))] if keywords else []
+
+    def _find_keyword_gaps(self, your_data: Dict, competitors: List[Dict]) -> List[str]:
+        """Competitor terms you lack or underuse, ranked by BM25 weight"""
+        docs = self._site_documents(tfidf_index.SELF, your_data)
+        for i, comp in enumerate(competitors):
+            docs.extend(self._site_documents(i, comp))
+        index = tfidf_index.CorpusIndex(docs)
+        return [gap['keyword'] for gap in index.keyword_gaps(tfidf_index.SELF, top_n=15)]
+
     def _generate_differentiators(self, your_data: Dict, competitors: List[Dict]) -> List[str]:
         """Generate key differentiators"""
         differentiators = []
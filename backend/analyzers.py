@@ -1,7 +1,7 @@
 import requests
 import os
 from urllib.parse import urlparse
-from competitor_analyzer import find_competitors, analyze_competitor_pages
+from competitor_analyzer import discover_competitors
 
 SCRAPER_URL = os.getenv("SCRAPER_SERVICE_URL", "http://34.63.165.165:8080")
 
@@ -68,12 +68,8 @@ def analyze_domain(domain: str) -> dict:
             
             # NEW: Competitor Analysis
             try:
-                competitors = find_competitors(domain, page_info, max_results=4)
-                
-                # Analyze each competitor in detail
-                for comp in competitors:
-                    detailed_comp = analyze_competitor_pages(comp)
-                    results["competitors"].append(detailed_comp)
+                # Searched concurrently, then each competitor analyzed in parallel
+                results["competitors"] = discover_competitors(domain, page_info, max_results=4)
                     
             except Exception as comp_err:
                 print(f"Competitor analysis error: {comp_err}")
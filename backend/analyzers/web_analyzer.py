@@ -5,6 +5,7 @@ from urllib.parse import urlparse
 import json
 import sys
 import os
+from collections import Counter
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,15 +13,15 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import from parent directory (backend/)
 try:
     from page_selector import get_pages_to_analyze
-    from competitor_analyzer import find_competitors, analyze_competitor_pages
+    from competitor_analyzer import discover_competitors
 except ImportError:
     # Fallback if modules not found
     def get_pages_to_analyze(domain, max_pages=20):
         return [domain]
-    def find_competitors(domain, page_info, max_results=5):
+    def discover_competitors(domain, page_info, max_results=5):
         return []
-    def analyze_competitor_pages(comp):
-        return comp
+
+from keyword_engine import tokenize
 
 def analyze_domain(domain: str) -> dict:
     """Analyze domain with multi-page crawling"""
@@ -69,10 +70,8 @@ def analyze_domain(domain: str) -> dict:
                 
                 h2s = [h2.get_text().strip() for h2 in soup.find_all('h2')[:5]]
                 
-                # Extract keywords (simple version)
-                body_text = soup.get_text().lower()
-                words = re.findall(r'\w{4,}', body_text)
-                all_keywords.extend(words)
+                # Extract keywords (shared tokenizer)
+                all_keywords.extend(tokenize(soup.get_text(), min_length=4))
                 
                 # Track SEO issues
                 if not title_text:
@@ -98,7 +97,6 @@ def analyze_domain(domain: str) -> dict:
                 continue
         
         # Aggregate results
-        from collections import Counter
         keyword_freq = Counter(all_keywords).most_common(30)
         results['top_keywords'] = [{'word': word, 'count': count} for word, count in keyword_freq]
         
@@ -129,16 +127,11 @@ def analyze_domain(domain: str) -> dict:
                 'keywords': [kw['word'] for kw in results.get('top_keywords', [])[:20]]
             }
             
-            from competitor_analyzer import find_competitors, analyze_competitor_pages
-            competitors = find_competitors(
+            results['competitors'] = discover_competitors(
                 domain.replace('https://', '').replace('http://', '').split('/')[0],
                 page_info,
                 max_results=5
             )
-            
-            for comp in competitors:
-                detailed_comp = analyze_competitor_pages(comp)
-                results['competitors'].append(detailed_comp)
                 
         except Exception as comp_err:
             print(f"Competitor analysis error: {comp_err}")
@@ -1,6 +1,6 @@
 import requests
 import os
-from competitor_analyzer import find_competitors, analyze_competitor_pages
+from competitor_analyzer import discover_competitors
 
 SCRAPER_URL = os.getenv("SCRAPER_SERVICE_URL", "http://34.63.165.165:8080")
 
@@ -53,13 +53,8 @@ def analyze_domain(domain: str) -> dict:
                 seo_score, marketing_score, tracker_info, platform_info
             )
             
-            # NEW: Find competitors
-            competitors = find_competitors(domain, page_info, max_results=4)
-            
-            # Analyze each competitor
-            for comp in competitors:
-                detailed_comp = analyze_competitor_pages(comp)
-                results["competitors"].append(detailed_comp)
+            # NEW: Find competitors, analyzed in parallel under one deadline
+            results["competitors"] = discover_competitors(domain, page_info, max_results=4)
                 
     except Exception as e:
         print(f"Analysis error: {e}")
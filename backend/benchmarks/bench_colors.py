@@ -0,0 +1,90 @@
+"""
+Dominant colours: previous per-pixel Counter vs the NumPy colour engine
+Run with: python benchmarks/bench_colors.py
+
+Synthetic "photos" (smooth gradients plus sensor-style noise) and flat
+"logos" at BENCH_IMAGE_SIZE. Reports ms per image and peak traced
+allocation for each path, plus how many of the old top-5 colours were
+distinct by more than the engine's merge threshold (i.e. useful).
+
+Tunables: BENCH_IMAGES, BENCH_IMAGE_SIZE
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from color_engine import MERGE_DELTA_E, extract_palette, srgb_to_lab
+from text_cache import text_cache
+
+
+def make_photo(rng, size):
+    y, x = np.mgrid[0:size, 0:size] / size
+    base = np.stack([200 * x + 30, 120 * y + 60, 160 * (1 - x) + 40], axis=2)
+    return Image.fromarray(np.clip(base + rng.normal(0, 8, base.shape), 0, 255).astype(np.uint8))
+
+
+def make_logo(rng, size):
+    array = np.full((size, size, 3), 255, dtype=np.uint8)
+    array[size // 4: size * 3 // 4, size // 4: size * 3 // 4] = rng.integers(0, 255, 3)
+    return Image.fromarray(array)
+
+
+def old_colors(image):
+    img = image.copy()
+    img.thumbnail((150, 150))
+    pixels = list(img.convert("RGB").getdata())
+    return [{"rgb": list(color), "percentage": round(n / len(pixels) * 100, 1)} for color, n in Counter(pixels).most_common(5)]
+
+
+def distinct(palette):
+    lab = srgb_to_lab(np.array([p["rgb"] for p in palette], dtype=np.float64))
+    kept = []
+    for color in lab:
+        if all(np.linalg.norm(color - other) >= MERGE_DELTA_E for other in kept):
+            kept.append(color)
+    return len(kept)
+
+
+def measure(fn, images):
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = [fn(image) for image in images]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, {"ms_per_image": round(elapsed / len(images) * 1000, 2), "peak_kb": round(peak / 1024, 1)}
+
+
+def main():
+    count = int(os.getenv("BENCH_IMAGES", "50"))
+    size = int(os.getenv("BENCH_IMAGE_SIZE", "800"))
+    rng = np.random.default_rng(3)
+    report = {"images": count, "size": size}
+
+    for kind, make in (("photo", make_photo), ("logo", make_logo)):
+        images = [make(rng, size) for _ in range(count)]
+        for image in images:
+            image.load()
+        old, old_stats = measure(old_colors, images)
+        text_cache.clear()
+        new, new_stats = measure(extract_palette, images)
+        _, cached_stats = measure(extract_palette, images)
+        report[kind] = {
+            "counter": dict(old_stats, distinct_colors=round(np.mean([distinct(p) for p in old]), 2)),
+            "engine": dict(new_stats, distinct_colors=round(np.mean([distinct(p) for p in new]), 2)),
+            "engine_cached": cached_stats,
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Offline crawler and analyzer throughput against a local fixture site
+Run with: python benchmarks/bench_crawl.py
+
+Serves a synthetic site (benchmarks/fixture_server.py) on 127.0.0.1 and
+runs each target in a fresh subprocess so memory numbers don't bleed into
+each other:
+
+- crawl_site        scraper.crawl_site (the production crawler)
+- crawl_site_async  async_crawler.crawl_site_async (falls back to crawl_site
+                    without Crawl4AI; "method" in the result says which ran)
+- deep_crawler      deep_crawler.DeepCrawler
+- sitemap           page_selector.get_sitemap_urls over the sitemap index
+- analyzers         per-page cost of parsing and of every page analyzer on
+                    already-downloaded HTML
+
+Each crawl reports pages/sec, CPU ms per page, peak RSS growth, retained
+allocations per page and, from a second tracemalloc pass, peak traced
+memory, plus the fixture server's view (requests, statuses, repeat
+fetches of one path). Politeness and 429 back-off sleeps are recorded as
+policy_sleep_s but not waited, so the numbers measure the crawler rather
+than its delays; set BENCH_REAL_SLEEPS=1 to wait them out.
+
+The report is printed as JSON; with BENCH_OUTPUT=path it is also appended
+to that file as one JSON line (timestamp, git commit, config, results) so
+runs can be compared over time.
+
+Tunables: BENCH_TARGETS, BENCH_SITE_PAGES, BENCH_MAX_PAGES, BENCH_PAGE_KB, BENCH_FANOUT, BENCH_LATENCY_MS,
+BENCH_RATE_LIMIT_EVERY, BENCH_REDIRECT_EVERY, BENCH_DUPLICATE_EVERY, BENCH_ANALYZE_PAGES, BENCH_TRACEMALLOC,
+BENCH_REAL_SLEEPS, BENCH_OUTPUT
+"""
+import asyncio
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import FixtureSite
+
+TARGETS = ("crawl_site", "crawl_site_async", "deep_crawler", "sitemap", "analyzers")
+
+
+class PolicySleeps:
+    """Stands in for the time module inside the crawlers: sleeps are added up instead of waited"""
+
+    def __init__(self):
+        self.slept = 0.0
+
+    def sleep(self, seconds):
+        self.slept += seconds
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1024
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_crawl(target, url, max_pages):
+    import scraper
+    import deep_crawler
+    from async_crawler import crawl_site_async
+    from page_selector import get_sitemap_urls
+
+    sleeps = PolicySleeps()
+    if not os.getenv("BENCH_REAL_SLEEPS"):
+        scraper.time = sleeps
+
+    if target == "crawl_site":
+        def run():
+            result = scraper.crawl_site(url, max_pages=max_pages)
+            return result["total_pages"], {"failed_pages": result.get("failed_pages", 0)}
+    elif target == "crawl_site_async":
+        def run():
+            result = asyncio.run(crawl_site_async(url, max_pages))
+            return result["total_pages"], {"method": result.get("method", "sync_fallback")}
+    elif target == "deep_crawler":
+        def run():
+            result = deep_crawler.DeepCrawler(max_pages=max_pages).crawl_site(url)
+            return result["total_pages"], {"broken_links": len(result["seo_issues"]["broken_links"])}
+    else:
+        def run():
+            return len(get_sitemap_urls(url)), {}
+
+    tracing = len(sys.argv) > 5 and sys.argv[5] == "trace"
+    if tracing:
+        import tracemalloc
+        tracemalloc.start()
+
+    gc.collect()
+    rss_before = rss_kb()
+    blocks_before = sys.getallocatedblocks()
+    collections_before = sum(s["collections"] for s in gc.get_stats())
+    cpu_before = cpu_seconds()
+    start = time.perf_counter()
+    pages, extra = run()
+    elapsed = time.perf_counter() - start
+    cpu = cpu_seconds() - cpu_before
+    collections = sum(s["collections"] for s in gc.get_stats()) - collections_before
+
+    if tracing:
+        print(json.dumps({"traced_peak_mb": round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)}))
+        return
+
+    gc.collect()
+    per_page = max(pages, 1)
+    print(json.dumps(dict({
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 1) if elapsed else None,
+        "cpu_ms_per_page": round(cpu / per_page * 1000, 2),
+        "peak_rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1),
+        "retained_blocks_per_page": round((sys.getallocatedblocks() - blocks_before) / per_page, 1),
+        "gc_collections": collections,
+        "policy_sleep_s": round(sleeps.slept, 2)
+    }, **extra)))
+
+
+def run_analyzers(url, count):
+    import requests
+    from bs4 import BeautifulSoup
+    from deep_crawler import DeepCrawler
+    from scraper import analyze_page_technical_seo, detect_tracking_pixels, extract_internal_links, page_body_text
+
+    site = FixtureSite()
+    bodies = []
+    for n in range(count):
+        bodies.append((f"{url}{site.page_path(n)}", requests.get(f"{url}{site.page_path(n)}", timeout=10).content))
+
+    analyzers = {
+        "parse": lambda page_url, soup, body: BeautifulSoup(body, "html.parser"),
+        "technical_seo": lambda page_url, soup, body: analyze_page_technical_seo(soup, page_url),
+        "tracking_pixels": lambda page_url, soup, body: detect_tracking_pixels(soup, str(body)),
+        "internal_links": lambda page_url, soup, body: extract_internal_links(soup, page_url),
+        "body_text": lambda page_url, soup, body: page_body_text(soup),
+        "deep_crawler_page": lambda page_url, soup, body: DeepCrawler()._analyze_page(page_url, soup)
+    }
+    report = {"pages": len(bodies), "kb_per_page": round(sum(len(b) for _, b in bodies) / len(bodies) / 1024, 1)}
+    for name, analyzer in analyzers.items():
+        total = 0.0
+        for page_url, body in bodies:
+            # Fresh soup each time: page_body_text removes script/style tags
+            soup = BeautifulSoup(body, "html.parser")
+            start = time.perf_counter()
+            analyzer(page_url, soup, body)
+            total += time.perf_counter() - start
+        report[f"{name}_ms_per_page"] = round(total / len(bodies) * 1000, 2)
+    print(json.dumps(report))
+
+
+def child(target, url, max_pages, analyze_pages, mode=""):
+    command = [sys.executable, __file__, "--run", target, url, str(max_pages if target != "analyzers" else analyze_pages)]
+    if mode:
+        command.append(mode)
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    if len(sys.argv) >= 5 and sys.argv[1] == "--run":
+        target, url, limit = sys.argv[2], sys.argv[3], int(sys.argv[4])
+        return run_analyzers(url, limit) if target == "analyzers" else run_crawl(target, url, limit)
+
+    config = {
+        "site_pages": int(os.getenv("BENCH_SITE_PAGES", "200")),
+        "max_pages": int(os.getenv("BENCH_MAX_PAGES", "100")),
+        "page_kb": int(os.getenv("BENCH_PAGE_KB", "20")),
+        "fanout": int(os.getenv("BENCH_FANOUT", "10")),
+        "latency_ms": float(os.getenv("BENCH_LATENCY_MS", "10")),
+        "rate_limit_every": int(os.getenv("BENCH_RATE_LIMIT_EVERY", "50")),
+        "redirect_every": int(os.getenv("BENCH_REDIRECT_EVERY", "7")),
+        "duplicate_every": int(os.getenv("BENCH_DUPLICATE_EVERY", "5")),
+        "analyze_pages": int(os.getenv("BENCH_ANALYZE_PAGES", "30"))
+    }
+    targets = [t for t in os.getenv("BENCH_TARGETS", ",".join(TARGETS)).split(",") if t in TARGETS]
+    trace_memory = os.getenv("BENCH_TRACEMALLOC", "1") != "0"
+
+    site = FixtureSite(
+        pages=config["site_pages"], page_kb=config["page_kb"], fanout=config["fanout"],
+        latency_ms=config["latency_ms"], rate_limit_every=config["rate_limit_every"],
+        redirect_every=config["redirect_every"], duplicate_every=config["duplicate_every"]
+    )
+    results = {}
+    with site:
+        for target in targets:
+            site.reset_stats()
+            result = child(target, site.url, config["max_pages"], config["analyze_pages"])
+            result["server"] = site.stats()
+            if trace_memory and target != "analyzers":
+                result.update(child(target, site.url, config["max_pages"], config["analyze_pages"], "trace"))
+            results[target] = result
+
+    report = {"config": config, "results": results}
+    print(json.dumps(report, indent=2))
+
+    output = os.getenv("BENCH_OUTPUT")
+    if output:
+        with open(output, "a") as f:
+            f.write(json.dumps(dict(report, benchmark="crawl", timestamp=time.time(), commit=git_commit())) + "\n")
+
+
+if __name__ == "__main__":
+    main()
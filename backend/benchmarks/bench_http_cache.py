@@ -0,0 +1,74 @@
+"""
+Analysis response transfer: identity vs per-request vs precompressed
+Run with: python benchmarks/bench_http_cache.py
+
+Builds a realistic /api/analyze result by crawling the local fixture site,
+then reports the encoded size of each representation and the CPU each
+request pays for it:
+
+- identity: the raw JSON bytes
+- per request: compressed by CompressionMiddleware on every response
+- precompressed: CachedBody variant, built on the first request and reused
+- revalidation: If-None-Match against the stored ETag (304, no body)
+
+Tunables: BENCH_PAGES, BENCH_COMPETITORS, BENCH_ROUNDS
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scraper
+from fixture_server import FixtureSite
+from http_cache import BROTLI_AVAILABLE, CachedBody, cached_response, compress, supported_encodings
+from serialization import dumps
+
+
+class NoSleep:
+    def sleep(self, seconds):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def best_ms(fn, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+def main():
+    pages = int(os.getenv("BENCH_PAGES", "50"))
+    competitors = int(os.getenv("BENCH_COMPETITORS", "5"))
+    rounds = int(os.getenv("BENCH_ROUNDS", "20"))
+
+    scraper.time = NoSleep()
+    with FixtureSite(pages=pages * 2, page_kb=20, fanout=12) as site:
+        your_site = scraper.crawl_site(site.url, pages)
+        rivals = {f"competitor{i}.example": scraper.crawl_site(f"{site.url}/page/{i + 2}", 15) for i in range(competitors)}
+    data = dumps({"your_site": your_site, "competitors": rivals, "content_gaps": {"keyword_gaps": []}})
+    body = CachedBody(data)
+
+    report = {"brotli": BROTLI_AVAILABLE, "identity_kb": round(len(data) / 1024, 1), "encodings": {}}
+    for encoding in supported_encodings():
+        headers = {"accept-encoding": encoding}
+        report["encodings"][encoding] = {
+            "per_request_kb": round(len(compress(data, encoding)) / 1024, 1),
+            "per_request_ms": best_ms(lambda: compress(data, encoding), rounds),
+            "precompressed_kb": round(len(body.variant(encoding)) / 1024, 1),
+            "first_request_ms": best_ms(lambda: compress(data, encoding, static=True), max(1, rounds // 4)),
+            "cached_request_ms": best_ms(lambda: cached_response(headers, body), rounds)
+        }
+    report["revalidation_ms"] = best_ms(lambda: cached_response({"if-none-match": body.etag}, body), rounds)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
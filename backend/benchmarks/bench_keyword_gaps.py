@@ -0,0 +1,87 @@
+"""
+Keyword gap scoring: previous set-difference / rescan paths vs the TF-IDF index
+Run with: python benchmarks/bench_keyword_gaps.py
+
+Synthetic corpus: your site plus BENCH_COMPETITORS competitors with
+BENCH_PAGES pages each (deep_crawler-style keyword lists). Reports index
+build time, vectorized gap scoring time and the old ContentGapAnalyzer
+loop (which rescans every competitor page per keyword).
+"""
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tfidf_index import CorpusIndex, SELF
+
+VOCAB = [f"term{i}" for i in range(5000)]
+
+
+def make_site(rng, pages, biases):
+    # Zipf-like draws; each bias picks a disjoint slice of the vocabulary,
+    # so sites overlap only where they share a bias
+    def word():
+        return VOCAB[min(len(VOCAB) - 1, int(rng.paretovariate(1.1)) * 7 + rng.choice(biases))]
+    return [{"keywords": [word() for _ in range(100)]} for _ in range(pages)]
+
+
+def old_content_gaps(yours, competitors):
+    your_keywords = set()
+    for page in yours:
+        your_keywords.update(page["keywords"])
+    competitor_keywords = Counter()
+    for comp in competitors:
+        for page in comp:
+            competitor_keywords.update(page["keywords"])
+    gaps = []
+    for keyword, freq in competitor_keywords.most_common(50):
+        if keyword not in your_keywords:
+            comp_count = sum(1 for comp in competitors if any(keyword in p["keywords"] for p in comp))
+            if comp_count >= 2:
+                gaps.append(keyword)
+    return gaps
+
+
+def timed(fn, rounds=5):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - start) / rounds, result
+
+
+def run():
+    rng = random.Random(3)
+    pages = int(os.getenv("BENCH_PAGES", "300"))
+    count = int(os.getenv("BENCH_COMPETITORS", "5"))
+    # You share topic 0 with competitors; they also share topic 1 among themselves
+    yours = make_site(rng, pages, [0, 0, 6])
+    competitors = [make_site(rng, pages, [0, 1, 2 + i % 4]) for i in range(count)]
+
+    docs = [(SELF, Counter(p["keywords"])) for p in yours]
+    for i, comp in enumerate(competitors):
+        docs.extend((i, Counter(p["keywords"])) for p in comp)
+
+    build, index = timed(lambda: CorpusIndex(docs))
+    score, gaps = timed(lambda: index.keyword_gaps(SELF, top_n=30, min_competitors=2))
+    old, old_gaps = timed(lambda: old_content_gaps(yours, competitors), rounds=1)
+
+    print(json.dumps({
+        "competitors": count,
+        "pages_per_site": pages,
+        "documents": index.num_docs,
+        "terms": index.num_terms,
+        "nonzeros": int(len(index.indices)),
+        "index_build_ms": round(build * 1000, 1),
+        "gap_scoring_ms": round(score * 1000, 2),
+        "old_rescan_ms": round(old * 1000, 1),
+        "top_gaps": [g["keyword"] for g in gaps[:5]],
+        "old_top_gaps": old_gaps[:5],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,108 @@
+"""
+Keyword extraction: previous per-call paths vs the shared keyword engine
+Run with: python benchmarks/bench_keywords.py
+
+Compares, on synthetic crawled pages:
+- YAKE: new KeywordExtractor per call over one concatenated string vs
+  cached extractors run per page (process pool) and merged, cold and
+  with per-page results already cached (a re-crawl)
+- tokenizing: the old per-module regex + stopword filtering vs
+  keyword_engine.tokenize
+
+Tunables: BENCH_PAGES, BENCH_ROUNDS, KEYWORD_WORKERS, KEYWORD_POOL_MIN_PAGES
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yake
+import keyword_engine
+from text_cache import text_cache
+from keyword_engine import count_keywords, extract_keywords_from_pages
+
+TOPICS = ["trail running shoes", "waterproof hiking boots", "merino wool socks",
+          "ultralight tents", "camping stoves", "climbing harness", "rain jackets"]
+FILLER = ("Free shipping on orders over fifty dollars. Our experts test every product "
+          "in the field so you can shop with confidence and return anything within thirty days.")
+
+
+def make_pages(count, seed=11):
+    """(keyword text, body text) per page; keyword text mirrors scraper.page_keyword_text"""
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(count):
+        topic = rng.choice(TOPICS)
+        head = ". ".join([
+            f"Best {topic} for 2024 | Outdoor Store",
+            f"Shop {topic} from top brands. {FILLER}",
+            f"{topic.title()} buying guide",
+            f"How to choose {rng.choice(TOPICS)}",
+        ])
+        body = " ".join(rng.choice(FILLER.split() + topic.split()) for _ in range(600))
+        pages.append((head, body))
+    return pages
+
+
+def old_yake(pages, top_n=20):
+    all_text = ""
+    for page in pages:
+        all_text += page + " "
+    extractor = yake.KeywordExtractor(lan="en", n=3, top=70)
+    return extractor.extract_keywords(all_text)[:top_n]
+
+
+OLD_STOP_WORDS = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for"}
+
+
+def old_tokenize(text):
+    words = re.findall(r'\b[a-z]{3,}\b', text.lower())
+    return Counter(w for w in words if w not in OLD_STOP_WORDS)
+
+
+def timed(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def run():
+    pages = make_pages(int(os.getenv("BENCH_PAGES", "15")))
+    heads = [head for head, _ in pages]
+    bodies = [body for _, body in pages]
+    rounds = int(os.getenv("BENCH_ROUNDS", "3"))
+
+    # Warm the pool and extractor cache outside the measured region
+    extract_keywords_from_pages(heads[:keyword_engine.KEYWORD_POOL_MIN_PAGES])
+
+    yake_old = timed(lambda: old_yake(heads), rounds)
+    def engine_cold():
+        text_cache.clear()
+        return extract_keywords_from_pages(heads)
+
+    yake_new = timed(engine_cold, rounds)
+    yake_warm = timed(lambda: extract_keywords_from_pages(heads), rounds)
+    tok_old = timed(lambda: [old_tokenize(b) for b in bodies], rounds * 20)
+    tok_new = timed(lambda: [count_keywords(b) for b in bodies], rounds * 20)
+
+    print(json.dumps({
+        "pages": len(pages),
+        "workers": keyword_engine.KEYWORD_WORKERS,
+        "yake_concatenated_ms": round(yake_old * 1000, 1),
+        "yake_per_page_merged_ms": round(yake_new * 1000, 1),
+        "yake_speedup": round(yake_old / yake_new, 2),
+        "yake_recrawl_cached_ms": round(yake_warm * 1000, 2),
+        "tokenize_old_ms": round(tok_old * 1000, 2),
+        "tokenize_new_ms": round(tok_new * 1000, 2),
+        "top_keywords": [kw["term"] for kw in extract_keywords_from_pages(heads, top_n=5)],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    run()
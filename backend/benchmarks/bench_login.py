@@ -0,0 +1,102 @@
+"""
+Login load test: concurrent /api/token attempts against the in-process app
+Run with: python benchmarks/bench_login.py
+
+Reports p50/p95/p99 login latency, 503 (shed) count and the latency of a
+cheap endpoint measured during the storm, which shows whether bcrypt work
+is starving other requests.
+
+Tunables: BENCH_LOGINS, BENCH_CONCURRENCY, BCRYPT_ROUNDS, PASSWORD_WORKERS,
+PASSWORD_QUEUE_LIMIT
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/bench_login.db")
+os.environ.setdefault("ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("ADMIN_PASSWORD", "bench-password")
+
+import logging
+import httpx
+import main
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("ai-grinners").setLevel(logging.WARNING)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def run():
+    total = int(os.getenv("BENCH_LOGINS", "200"))
+    concurrency = int(os.getenv("BENCH_CONCURRENCY", "50"))
+
+    await main.startup()
+    main.get_geo_location = lambda ip: "Local"
+    main.rate_limiter.limits["login"] = (10 ** 9, 60)
+
+    transport = httpx.ASGITransport(app=main.app)
+    semaphore = asyncio.Semaphore(concurrency)
+    login_latencies, health_latencies, statuses = [], [], {}
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(i):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/token",
+                    data={"username": os.environ["ADMIN_EMAIL"], "password": os.environ["ADMIN_PASSWORD"]},
+                    headers={"X-Forwarded-For": f"10.0.{i // 250}.{i % 250}"}
+                )
+                login_latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/")
+                health_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+
+    print(json.dumps({
+        "bcrypt_rounds": int(os.getenv("BCRYPT_ROUNDS", "12")),
+        "workers": main.password_pool.workers,
+        "queue_limit": main.password_pool.max_pending,
+        "concurrency": concurrency,
+        "logins_per_sec": round(total / elapsed, 1),
+        "status_counts": statuses,
+        "login_latency": summarize(login_latencies),
+        "root_latency_during_storm": summarize(health_latencies),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,94 @@
+"""
+Logo index: multi-index hash lookup vs linear scan, and end-to-end match latency
+Run with: python benchmarks/bench_logos.py
+
+Indexes BENCH_LOGOS synthetic logos (random shapes on transparent
+canvases), then matches BENCH_ADS 450x300 banners with a known logo pasted
+at a random offset and scale. Reports index build time, per-hash lookup
+time (multi-index table vs comparing against every hash), ms per banner
+and recall.
+
+Tunables: BENCH_LOGOS, BENCH_ADS, LOGO_MAX_DISTANCE
+"""
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logo_index import LogoIndex, hamming
+
+
+def make_logo(seed, size=120):
+    rng = random.Random(seed)
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for _ in range(4):
+        x0, y0 = rng.randint(0, size - 40), rng.randint(0, size - 40)
+        box = [x0, y0, x0 + rng.randint(20, 60), y0 + rng.randint(20, 60)]
+        fill = tuple(rng.randint(0, 200) for _ in range(3)) + (255,)
+        getattr(draw, rng.choice(["ellipse", "rectangle"]))(box, fill=fill)
+    return img
+
+
+def make_ad(rng, logo):
+    background = np.linspace(rng.uniform(120, 200), 240, 450)[None, :, None] + rng.normal(0, 3, (300, 450, 3))
+    ad = Image.fromarray(np.clip(background, 0, 255).astype(np.uint8))
+    size = int(rng.integers(90, 180))
+    logo = logo.resize((size, size))
+    ad.paste(logo, (int(rng.integers(0, 450 - size)), int(rng.integers(0, 300 - size))), logo)
+    return ad
+
+
+def brute_force(hashes, probe, radius):
+    return [h for h in hashes if hamming(probe, h) <= radius]
+
+
+def main():
+    logo_count = int(os.getenv("BENCH_LOGOS", "5000"))
+    ad_count = int(os.getenv("BENCH_ADS", "50"))
+    rng = np.random.default_rng(11)
+
+    index = LogoIndex()
+    logos = [make_logo(i) for i in range(logo_count)]
+    start = time.perf_counter()
+    for i, logo in enumerate(logos):
+        index.add(f"brand{i}", logo)
+    build_seconds = time.perf_counter() - start
+
+    hashes = [key for bucket in index.table._tables[0].values() for key, _ in bucket]
+    probes = [int(h) ^ (1 << int(rng.integers(0, 64))) for h in rng.choice(hashes, 200)]
+
+    start = time.perf_counter()
+    for probe in probes:
+        index.table.search(probe)
+    table_ms = (time.perf_counter() - start) / len(probes) * 1000
+    start = time.perf_counter()
+    for probe in probes:
+        brute_force(hashes, probe, index.max_distance)
+    linear_ms = (time.perf_counter() - start) / len(probes) * 1000
+
+    targets = rng.integers(0, logo_count, ad_count)
+    ads = [make_ad(rng, logos[t]) for t in targets]
+    start = time.perf_counter()
+    found = sum(any(m["name"] == f"brand{t}" for m in index.match(ad)) for ad, t in zip(ads, targets))
+    match_ms = (time.perf_counter() - start) / ad_count * 1000
+
+    print(json.dumps({
+        "logos": logo_count,
+        "hashes": len(index.table),
+        "build_seconds": round(build_seconds, 2),
+        "lookup_multi_index_ms": round(table_ms, 3),
+        "lookup_linear_ms": round(linear_ms, 3),
+        "match_ms_per_banner": round(match_ms, 1),
+        "recall": round(found / ad_count, 3)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
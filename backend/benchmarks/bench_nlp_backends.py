@@ -0,0 +1,105 @@
+"""
+Compare pysentimiento inference backends: latency, RSS and agreement with torch
+Run with: python benchmarks/bench_nlp_backends.py [--backends torch,quantized,onnx]
+
+Each backend runs in its own process so resident memory is measured in
+isolation. Reports load time, RSS after load, single-text latency, batched
+texts/sec, and the max probability difference / label agreement against
+the torch backend.
+
+Tunables: BENCH_TEXTS, NLP_ONNX_DIR, NLP_ONNX_QUANTIZE, NLP_ONNX_THREADS
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_sentiment import make_reviews
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_backend(backend, count):
+    """Child process: load one backend and measure it"""
+    os.environ["NLP_INFERENCE_BACKEND"] = backend
+    from pysentimiento import create_analyzer
+    from model_registry import rss_bytes
+    from nlp_backends import apply_inference_backend
+    from nlp_inference import predict_batch
+
+    texts = make_reviews(count)
+    start = time.perf_counter()
+    analyzer = apply_inference_backend(create_analyzer(task="sentiment", lang="en"), backend)
+    load_seconds = time.perf_counter() - start
+    rss_mb = rss_bytes() / 1024 / 1024
+
+    analyzer.predict(texts[0])
+    latencies = []
+    for text in texts[:200]:
+        start = time.perf_counter()
+        analyzer.predict(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    probas = predict_batch(analyzer, texts)["sentiment"]
+    batch_elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "backend": getattr(analyzer, "inference_backend", "torch"),
+        "load_seconds": round(load_seconds, 2),
+        "rss_mb": round(rss_mb, 1),
+        "single_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "single_p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "batch_texts_per_sec": round(count / batch_elapsed, 1),
+        "probas": probas,
+    }))
+
+
+def compare(reference, other):
+    diffs, agree = [], 0
+    for a, b in zip(reference, other):
+        diffs.append(max(abs(a[label] - b[label]) for label in a))
+        agree += max(a, key=a.get) == max(b, key=b.get)
+    return {"max_prob_diff": round(max(diffs), 5), "label_agreement": round(agree / len(reference), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="torch,quantized,onnx")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    count = int(os.getenv("BENCH_TEXTS", "1000"))
+
+    if args.child:
+        run_backend(args.child, count)
+        return
+
+    results = {}
+    for backend in args.backends.split(","):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", backend],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            results[backend] = {"error": proc.stderr.strip().splitlines()[-1:]}
+            continue
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    reference = results.get("torch", {}).get("probas")
+    for backend, result in results.items():
+        probas = result.pop("probas", None)
+        if reference and probas and backend != "torch":
+            result.update(compare(reference, probas))
+
+    print(json.dumps({"texts": count, "backends": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark for the rate limiter
+Run with: python benchmarks/bench_rate_limiter.py
+
+Compares the GCRA limiter (memory and SQLite backends) against the previous
+list-of-timestamps implementation, with hot keys and unique-IP floods.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RateLimiter, MemoryBackend, SQLiteBackend
+
+
+class ListRateLimiter:
+    """The previous sliding-window limiter, kept here as a baseline"""
+    def __init__(self):
+        self.requests = defaultdict(list)
+        self.limits = {"default": (60, 60)}
+
+    def is_allowed(self, key, limit_type="default"):
+        now = time.time()
+        max_requests, window = self.limits[limit_type]
+        self.requests[key] = [t for t in self.requests[key] if now - t < window]
+        if len(self.requests[key]) >= max_requests:
+            return False
+        self.requests[key].append(now)
+        return True
+
+
+def run(limiter, keys, n):
+    start = time.perf_counter()
+    for i in range(n):
+        limiter.is_allowed(keys[i % len(keys)])
+    elapsed = time.perf_counter() - start
+    return {"ops": n, "seconds": round(elapsed, 4), "ns_per_op": round(elapsed / n * 1e9)}
+
+
+def main():
+    n = int(os.getenv("BENCH_OPS", "200000"))
+    hot_keys = ["ip:1"]
+    unique_keys = [f"ip:{i}" for i in range(n)]
+    results = {}
+
+    for name, factory in [
+        ("list_baseline", ListRateLimiter),
+        ("gcra_memory", lambda: RateLimiter(MemoryBackend())),
+    ]:
+        results[f"{name}.hot_key"] = run(factory(), hot_keys, n)
+        limiter = factory()
+        results[f"{name}.unique_keys"] = run(limiter, unique_keys, n)
+        state = getattr(limiter, "requests", None) or limiter.backend.state
+        results[f"{name}.unique_keys"]["keys_retained"] = len(state)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_ops = max(1, n // 20)
+        limiter = RateLimiter(SQLiteBackend(os.path.join(tmp, "bench.db")))
+        results["gcra_sqlite.hot_key"] = run(limiter, hot_keys, sqlite_ops)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
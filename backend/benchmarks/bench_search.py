@@ -0,0 +1,96 @@
+"""
+Search index throughput and query latency
+Run with: python benchmarks/bench_search.py
+
+Synthetic pages (Zipf-distributed vocabulary) spread over BENCH_WORKSPACES
+workspaces and BENCH_DOMAINS domains per workspace are indexed in crawl-
+sized batches. Reports indexing pages/sec, on-disk size, and p50/p95
+latency for single-term, multi-term, phrase and domain-filtered queries
+against one workspace.
+
+Tunables: BENCH_PAGES, BENCH_WORKSPACES, BENCH_DOMAINS, BENCH_QUERIES
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex, SEARCH_INDEX_BATCH
+
+VOCAB = [f"word{i}" for i in range(20000)]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def make_text(rng, words):
+    return " ".join(VOCAB[min(len(VOCAB) - 1, int(rng.paretovariate(1.05)) - 1)] for _ in range(words))
+
+
+def make_page(rng, domain, n):
+    return {
+        "url": f"https://{domain}/page{n}",
+        "title": make_text(rng, 6),
+        "headings": make_text(rng, 12),
+        "description": make_text(rng, 25),
+        "body": make_text(rng, 400)
+    }
+
+
+def timed_queries(index, workspace, queries, **kwargs):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(workspace, query, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(percentile(latencies, 50), 2), "p95_ms": round(percentile(latencies, 95), 2)}
+
+
+def main():
+    total = int(os.getenv("BENCH_PAGES", "50000"))
+    workspaces = int(os.getenv("BENCH_WORKSPACES", "10"))
+    domains = int(os.getenv("BENCH_DOMAINS", "6"))
+    query_count = int(os.getenv("BENCH_QUERIES", "200"))
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.db")
+        index = SearchIndex(path)
+        per_domain = max(1, total // (workspaces * domains))
+
+        start = time.perf_counter()
+        for ws in range(workspaces):
+            for d in range(domains):
+                domain = f"site{d}.com"
+                for offset in range(0, per_domain, SEARCH_INDEX_BATCH):
+                    batch = [make_page(rng, domain, n) for n in range(offset, min(per_domain, offset + SEARCH_INDEX_BATCH))]
+                    index.add_pages(ws, domain, batch)
+        index_seconds = time.perf_counter() - start
+        pages = index.stats()["pages"]
+
+        common = [VOCAB[rng.randint(0, 20)] for _ in range(query_count)]
+        rare = [VOCAB[rng.randint(200, 2000)] for _ in range(query_count)]
+        multi = [f"{VOCAB[rng.randint(0, 50)]} {VOCAB[rng.randint(50, 500)]}" for _ in range(query_count)]
+        phrase = [f'"{VOCAB[0]} {VOCAB[rng.randint(0, 5)]}"' for _ in range(query_count)]
+
+        print(json.dumps({
+            "pages": pages,
+            "workspaces": workspaces,
+            "index_pages_per_sec": round(pages / index_seconds, 1),
+            "db_mb": round(sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 1024 / 1024, 1),
+            "common_term": timed_queries(index, 0, common),
+            "rare_term": timed_queries(index, 0, rare),
+            "two_terms": timed_queries(index, 0, multi),
+            "phrase": timed_queries(index, 0, phrase),
+            "domain_filter": timed_queries(index, 0, multi, domain="site1.com"),
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Analysis response serialization: jsonable_encoder + json.dumps vs encode once
+Run with: python benchmarks/bench_serialization.py
+
+Builds a realistic /api/analyze result by crawling the local fixture site
+(BENCH_PAGES pages for the site and for each of BENCH_COMPETITORS
+competitors), then times how each version of deep_analysis produces its
+bytes:
+
+- fresh (before): json.dumps for the DB row, then FastAPI's
+  jsonable_encoder + json.dumps for the response
+- fresh (after): dumps() once, reused for the DB row, cache and response
+- cache hit (before): jsonable_encoder + json.dumps of the cached dict
+- cache hit (after): embed() of the cached bytes into the envelope
+
+Tunables: BENCH_PAGES, BENCH_COMPETITORS, BENCH_ROUNDS
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+
+import scraper
+from fixture_server import FixtureSite
+from serialization import ORJSON_AVAILABLE, dumps, embed
+
+
+class NoSleep:
+    def sleep(self, seconds):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def best_ms(fn, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 2)
+
+
+def main():
+    pages = int(os.getenv("BENCH_PAGES", "50"))
+    competitors = int(os.getenv("BENCH_COMPETITORS", "5"))
+    rounds = int(os.getenv("BENCH_ROUNDS", "20"))
+
+    scraper.time = NoSleep()
+    with FixtureSite(pages=pages * 2, page_kb=20, fanout=12) as site:
+        your_site = scraper.crawl_site(site.url, pages)
+        rivals = {f"competitor{i}.example": scraper.crawl_site(f"{site.url}/page/{i + 2}", 15) for i in range(competitors)}
+    result = {
+        "your_site": your_site,
+        "competitors": rivals,
+        "content_gaps": {"keyword_gaps": []},
+        "analyzed_at": "2026-01-01T00:00:00"
+    }
+    envelope = {"success": True, "job_id": "job_1", "status": "completed", "remaining_quota": 10}
+
+    def fresh_before():
+        json.dumps(result)
+        json.dumps(jsonable_encoder(dict(envelope, data=result))).encode()
+
+    def fresh_after():
+        encoded = dumps(result)
+        encoded.decode()
+        embed(envelope, data=encoded)
+
+    encoded = dumps(result)
+
+    def hit_before():
+        json.dumps(jsonable_encoder({"success": True, "job_id": "cached", "status": "completed",
+                                     "data": result, "cached": True})).encode()
+
+    def hit_after():
+        embed({"success": True, "job_id": "cached", "status": "completed", "cached": True}, data=encoded)
+
+    print(json.dumps({
+        "orjson": ORJSON_AVAILABLE,
+        "pages": your_site["total_pages"] + sum(r["total_pages"] for r in rivals.values()),
+        "response_kb": round(len(encoded) / 1024, 1),
+        "fresh_before_ms": best_ms(fresh_before, rounds),
+        "fresh_after_ms": best_ms(fresh_after, rounds),
+        "cache_hit_before_ms": best_ms(hit_before, rounds),
+        "cache_hit_after_ms": best_ms(hit_after, rounds)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Cold start: process launch to the first /health 200
+Run with: python benchmarks/bench_startup.py
+
+Each round starts a fresh interpreter that imports main, runs the startup
+hook and polls /health in-process until it returns 200 (models listed in
+NLP_PRELOAD_MODELS must be warm before it does). Reports the median
+import, startup and first-200 times over BENCH_ROUNDS rounds, plus the
+slowest direct imports of main from -X importtime.
+
+Tunables: BENCH_ROUNDS, NLP_PRELOAD_MODELS, NLP_PRELOAD_BACKGROUND, WARM_IMPORTS
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    while client.get("/health").status_code != 200:
+        time.sleep(0.005)
+    healthy = time.perf_counter()
+import json
+print(json.dumps({"import_ms": (imported - start) * 1000, "startup_ms": (started - imported) * 1000,
+                  "first_health_200_ms": (healthy - start) * 1000}))
+"""
+
+
+def child_env(workdir):
+    return dict(os.environ, DATABASE_URL=f"sqlite:///{workdir}/startup.db", SEARCH_INDEX_DB=":memory:",
+                PROFILE_DIR=os.path.join(workdir, "profiles"), BCRYPT_ROUNDS=os.getenv("BCRYPT_ROUNDS", "4"))
+
+
+def main():
+    rounds = int(os.getenv("BENCH_ROUNDS", "5"))
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        env = child_env(workdir)
+        for _ in range(rounds):
+            output = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        importtime = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR,
+                                    env=env, capture_output=True, text=True, check=True).stderr
+
+    direct = []
+    for line in importtime.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit() and name.startswith("   ") and not name.startswith("    "):
+                direct.append((int(cumulative) / 1000, name.strip()))
+
+    print(json.dumps({
+        "rounds": rounds,
+        **{key: round(statistics.median(r[key] for r in runs), 1) for key in runs[0]},
+        "slowest_direct_imports_ms": {name: round(ms, 1) for ms, name in sorted(direct, reverse=True)[:10]}
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Batch vision analysis: per-URL full-size fetch/decode vs pooled batch with downscaled decode
+Run with: python benchmarks/bench_vision_batch.py
+
+Serves BENCH_IMAGES distinct 2400x1600 JPEG creatives from a local HTTP
+server that waits BENCH_LATENCY_MS before each response (CDN round trip), then analyses them the old way (a fresh download and a
+full-resolution decode per analyzer, one URL at a time) and through
+analyze_images_batch(). Reports ms per image and peak traced memory for
+both.
+
+Tunables: BENCH_IMAGES, BENCH_LATENCY_MS, IMAGE_FETCH_WORKERS, IMAGE_DECODE_WORKERS, IMAGE_DECODE_SIZE
+"""
+import json
+import os
+import sys
+import threading
+import time
+import resource
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import numpy as np
+import requests
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_services import analyze_images_batch, detect_brands_in_image, detect_logos_in_image
+
+
+def make_creatives(count):
+    rng = np.random.default_rng(5)
+    bodies = {}
+    for i in range(count):
+        base = rng.integers(0, 255, (16, 24, 3)).astype(np.uint8)
+        img = Image.fromarray(base).resize((2400, 1600), Image.BILINEAR)
+        buffer = BytesIO()
+        img.save(buffer, "JPEG", quality=85)
+        bodies[f"/creative{i}.jpg"] = buffer.getvalue()
+    return bodies
+
+
+def serve(bodies, latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = bodies[self.path]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+def legacy_fetch(url):
+    response = requests.get(url, timeout=10)
+    image = Image.open(BytesIO(response.content))
+    image.load()
+    return image
+
+
+def legacy(urls):
+    # Previously logos and brands each fetched and decoded the full image
+    for url in urls:
+        detect_logos_in_image(url, legacy_fetch(url), fetch=False)
+        detect_brands_in_image(url, legacy_fetch(url), fetch=False)
+
+
+def run_mode(mode, base, count):
+    urls = [f"{base}/creative{i}.jpg" for i in range(count)]
+    with open("/proc/self/statm") as f:
+        rss_before = int(f.read().split()[1]) * resource.getpagesize() / 1024
+    start = time.perf_counter()
+    legacy(urls) if mode == "legacy" else analyze_images_batch(urls)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        f"{mode}_ms_per_image": round(elapsed / count * 1000, 1),
+        f"{mode}_peak_rss_growth_mb": round((peak - rss_before) / 1024, 1)
+    }))
+
+
+def main():
+    if len(sys.argv) == 4:
+        return run_mode(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+
+    count = int(os.getenv("BENCH_IMAGES", "100"))
+    latency = float(os.getenv("BENCH_LATENCY_MS", "50")) / 1000
+    httpd, base = serve(make_creatives(count), latency)
+    report = {"images": count}
+    for mode in ("legacy", "batch"):
+        output = subprocess.run([sys.executable, __file__, mode, base, str(count)], capture_output=True, text=True, check=True).stdout
+        report.update(json.loads(output.strip().splitlines()[-1]))
+    httpd.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Local HTTP server serving synthetic sites for offline crawl benchmarks
+
+    with FixtureSite(pages=200, page_kb=30, fanout=12, latency_ms=20) as site:
+        crawl_site(site.url, max_pages=100)
+        print(site.stats())
+
+Every page is generated from its number with a seeded RNG, so two runs
+with the same settings serve byte-identical sites. Shapes that matter to a
+crawler can be switched on independently:
+
+- latency_ms (+ jitter_ms) sleeps before every response, like a far host
+- rate_limit_every=N answers every Nth request with 429 + Retry-After
+- redirect_every=N links every Nth page through a 301 hop (/go/<n>)
+- duplicate_every=N links every Nth page under a variant URL (trailing
+  slash, tracking query, fragment, mixed case) that serves the same page
+- sitemap=True serves /robots.txt and a sitemap index split into chunks
+  of sitemap_chunk URLs; otherwise those paths are 404
+
+Run standalone to poke at a site in a browser:
+    python benchmarks/fixture_server.py --pages 50 --port 8765
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+WORDS = (
+    "running shoes trail road marathon training cushion grip lightweight waterproof breathable "
+    "outsole midsole heel drop stability neutral racing recovery sprint distance pace runner "
+    "terrain mountain forest urban daily comfort support fit sizing review guide beginner "
+    "advanced sale price shipping return warranty collection women men kids accessories socks"
+).split()
+
+VARIANTS = ("{path}/", "{path}?utm_source=newsletter", "{path}#reviews", "{upper}")
+
+
+class FixtureSite:
+    """A synthetic site on 127.0.0.1; use as a context manager or call start()/stop()"""
+
+    def __init__(self, pages: int = 100, page_kb: int = 20, fanout: int = 10, latency_ms: float = 0,
+                 jitter_ms: float = 0, rate_limit_every: int = 0, redirect_every: int = 0,
+                 duplicate_every: int = 0, sitemap: bool = True, sitemap_chunk: int = 500,
+                 seed: int = 7, port: int = 0):
+        self.pages = max(1, pages)
+        self.page_kb = page_kb
+        self.fanout = fanout
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_limit_every = rate_limit_every
+        self.redirect_every = redirect_every
+        self.duplicate_every = duplicate_every
+        self.sitemap = sitemap
+        self.sitemap_chunk = max(1, sitemap_chunk)
+        self.seed = seed
+        self.port = port
+        self.url = None
+        self._httpd = None
+        self._bodies: Dict[int, bytes] = {}
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._status: Counter = Counter()
+        self._bytes = 0
+        self._paths: Counter = Counter()
+
+    # Content
+
+    @staticmethod
+    def page_path(n: int) -> str:
+        return "/" if n == 0 else f"/page/{n}"
+
+    def link_path(self, n: int) -> str:
+        """Path a link to page n uses: direct, through a redirect, or a duplicate variant"""
+        path = self.page_path(n)
+        if n and self.redirect_every and n % self.redirect_every == 0:
+            return f"/go/{n}"
+        if n and self.duplicate_every and n % self.duplicate_every == 0:
+            variant = VARIANTS[(n // self.duplicate_every) % len(VARIANTS)]
+            return variant.format(path=path, upper=path.replace("/page/", "/Page/"))
+        return path
+
+    def render(self, n: int) -> bytes:
+        body = self._bodies.get(n)
+        if body is None:
+            body = self._render(n)
+            with self._lock:
+                self._bodies[n] = body
+        return body
+
+    def _render(self, n: int) -> bytes:
+        rng = random.Random(self.seed * 1_000_003 + n)
+
+        def text(count):
+            return " ".join(rng.choice(WORDS) for _ in range(count))
+
+        # Link to the next pages first so a BFS reaches the whole site, then random ones
+        targets = [(n + k) % self.pages for k in range(1, 3)]
+        targets += [rng.randrange(self.pages) for _ in range(max(0, self.fanout - len(targets)))]
+        nav = "".join(f'<li><a href="{self.link_path(t)}">{text(3)}</a></li>' for t in targets)
+
+        head = [
+            f"<title>{text(6).title()} | Page {n}</title>",
+            '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        ]
+        if n % 4:
+            head.append(f'<meta name="description" content="{text(24)}">')
+        if n % 3 == 0:
+            head.append('<meta property="og:title" content="Fixture page">')
+            head.append('<script type="application/ld+json">{"@context": "https://schema.org", "@type": "Product"}</script>')
+        if n % 5 == 0:
+            head.append("<script>(function(w,d,s,l,i){w[l]=w[l]||[];})(window,document,'script','dataLayer','GTM-BENCH');</script>")
+
+        parts = [
+            f"<!DOCTYPE html><html lang='en'><head>{''.join(head)}</head><body>",
+            f"<nav><ul>{nav}</ul></nav><h1>{text(5)}</h1>"
+        ]
+        size = sum(len(p) for p in parts)
+        section = 0
+        while size < self.page_kb * 1024:
+            block = f"<h2>{text(4)}</h2><p>{text(60)}</p><p>{text(40)}</p>"
+            if section % 3 == 0:
+                alt = f' alt="{text(3)}"' if section % 2 == 0 else ""
+                block += f'<img src="/img/{n}-{section}.jpg"{alt}>'
+            parts.append(block)
+            size += len(block)
+            section += 1
+        parts.append('<footer><a href="/">Home</a> <a href="mailto:shop@example.com">Mail</a></footer></body></html>')
+        return "".join(parts).encode()
+
+    def _sitemap(self, path: str) -> Optional[bytes]:
+        chunks = (self.pages + self.sitemap_chunk - 1) // self.sitemap_chunk
+        if path == "/sitemap.xml":
+            locs = "".join(f"<sitemap><loc>{self.url}/sitemap-{i}.xml</loc></sitemap>" for i in range(chunks))
+            return (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</sitemapindex>'
+            ).encode()
+        if path.startswith("/sitemap-") and path.endswith(".xml"):
+            try:
+                chunk = int(path[len("/sitemap-"):-len(".xml")])
+            except ValueError:
+                return None
+            if not 0 <= chunk < chunks:
+                return None
+            first = chunk * self.sitemap_chunk
+            urls = range(first, min(self.pages, first + self.sitemap_chunk))
+            locs = "".join(f"<url><loc>{self.url}{self.page_path(n)}</loc></url>" for n in urls)
+            return (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'
+            ).encode()
+        return None
+
+    def resolve(self, raw_path: str):
+        """(status, content type, body, extra headers) for a request path"""
+        path = raw_path.split("#", 1)[0].split("?", 1)[0]
+        if self.sitemap:
+            if path == "/robots.txt":
+                return 200, "text/plain", f"User-agent: *\nAllow: /\nSitemap: {self.url}/sitemap.xml\n".encode(), {}
+            body = self._sitemap(path)
+            if body is not None:
+                return 200, "application/xml", body, {}
+        if path.startswith("/go/"):
+            tail = path[len("/go/"):]
+            if tail.isdigit() and int(tail) < self.pages:
+                return 301, "text/html", b"", {"Location": self.page_path(int(tail))}
+        if path in ("", "/"):
+            return 200, "text/html; charset=utf-8", self.render(0), {}
+        lowered = path.lower().rstrip("/")
+        if lowered.startswith("/page/") and lowered[len("/page/"):].isdigit():
+            n = int(lowered[len("/page/"):])
+            if 0 < n < self.pages:
+                return 200, "text/html; charset=utf-8", self.render(n), {}
+        return 404, "text/html", b"<html><body>Not found</body></html>", {}
+
+    # Server
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with site._lock:
+                    site._requests += 1
+                    count = site._requests
+                    site._paths[self.path] += 1
+                delay = site.latency + (random.random() * site.jitter if site.jitter else 0)
+                if delay:
+                    time.sleep(delay)
+
+                if site.rate_limit_every and count % site.rate_limit_every == 0:
+                    status, ctype, body, extra = 429, "text/plain", b"Too Many Requests", {"Retry-After": "1"}
+                else:
+                    status, ctype, body, extra = site.resolve(self.path)
+
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in extra.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                with site._lock:
+                    site._status[status] += 1
+                    site._bytes += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureSite":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, name="fixture-site", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def reset_stats(self):
+        with self._lock:
+            self._requests = 0
+            self._status.clear()
+            self._paths.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Requests served since start (or reset_stats), by status, plus repeat fetches of one path"""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "status": {str(k): v for k, v in sorted(self._status.items())},
+                "bytes": self._bytes,
+                "distinct_paths": len(self._paths),
+                "repeat_fetches": sum(c - 1 for c in self._paths.values())
+            }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic site")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--page-kb", type=int, default=20)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--redirect-every", type=int, default=0)
+    parser.add_argument("--duplicate-every", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    site = FixtureSite(pages=args.pages, page_kb=args.page_kb, fanout=args.fanout, latency_ms=args.latency_ms,
+                       rate_limit_every=args.rate_limit_every, redirect_every=args.redirect_every,
+                       duplicate_every=args.duplicate_every, port=args.port).start()
+    print(f"Serving {args.pages} pages at {site.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
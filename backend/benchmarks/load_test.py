@@ -0,0 +1,359 @@
+"""
+API load test: a realistic request mix against the real app at rising concurrency
+Run with: python benchmarks/load_test.py
+
+Drives main.app in-process over ASGI (default) or through a local uvicorn
+server (BENCH_TRANSPORT=uvicorn, needs uvicorn installed). Every crawl the
+app makes goes to a local fixture site (benchmarks/fixture_server.py), geo
+lookups are stubbed, rate limits are lifted and the database, search index
+and profile store always live in a temp dir (any exported DATABASE_URL or
+SEARCH_INDEX_DB is overridden), so nothing leaves the machine.
+
+Closed-loop virtual users pick a scenario by weight and wait for the reply
+before the next one:
+
+- login             POST /api/token (bcrypt)
+- me                GET /api/me
+- analyze_hit       POST /api/analyze for a domain already in the cache
+- analyze_miss      POST /api/analyze for a domain never seen (full crawl)
+- seo_comparison    POST /api/seo-comparison with one competitor
+- sentiment         POST /api/language/sentiment
+- admin             GET /api/admin/stats, /users or /activity
+
+For each concurrency level the report has requests/sec, p50/p95/p99
+latency and error rate per scenario (a 4xx/5xx, a transport error or a
+200 with "success": false all count as errors). A probe sends GET / every
+50 ms throughout, and in ASGI mode a ticker measures event-loop lag. If
+probe latency climbs with load while the probe route does no work, a
+handler is blocking the event loop. Crawler politeness sleeps are skipped
+unless BENCH_REAL_SLEEPS=1.
+
+Prints JSON; BENCH_OUTPUT=path also appends it as one JSON line.
+
+Tunables: BENCH_CONCURRENCY (e.g. 1,4,16), BENCH_STAGE_SECONDS, BENCH_MIX (e.g. me=40,sentiment=20),
+BENCH_TRANSPORT, BENCH_ANALYZE_PAGES, BENCH_LATENCY_MS, BENCH_SITE_PAGES, BENCH_REAL_SLEEPS, BCRYPT_ROUNDS, BENCH_OUTPUT
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORKDIR = tempfile.mkdtemp(prefix="ai-grinners-load-")
+# Assigned, not defaulted: an exported DATABASE_URL must never receive load-test users and reports
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/load.db"
+os.environ["SEARCH_INDEX_DB"] = f"{WORKDIR}/search_index.db"
+os.environ["PROFILE_DIR"] = f"{WORKDIR}/profiles"
+os.environ["ADMIN_EMAIL"] = "load-admin@example.com"
+os.environ["ADMIN_PASSWORD"] = "load-admin-password"
+os.environ.setdefault("NLP_PRELOAD_BACKGROUND", "false")
+os.environ.pop("METRICS_DIR", None)
+
+import httpx
+import main
+import scraper
+from credentials import get_password_hash
+from fixture_server import FixtureSite
+from models import SessionLocal, User
+
+try:
+    import uvicorn
+    UVICORN_AVAILABLE = True
+except ImportError:
+    UVICORN_AVAILABLE = False
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("ai-grinners").setLevel(logging.WARNING)
+logging.getLogger("ai-grinners.scraper").setLevel(logging.ERROR)
+
+DEFAULT_MIX = "login=2,me=35,analyze_hit=20,analyze_miss=3,seo_comparison=2,sentiment=28,admin=10"
+USER_EMAIL = "load-user@example.com"
+USER_PASSWORD = "load-user-password"
+
+SENTENCES = [
+    "Absolutely love these running shoes, the grip on wet trails is fantastic.",
+    "Shipping took three weeks and the box arrived damaged.",
+    "Decent value for the price, although sizing runs a little small.",
+    "Customer support never answered my emails about the refund.",
+    "Best marathon shoe I've owned, light and still well cushioned."
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summarize(latencies, errors, seconds):
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / seconds, 1),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 3) if latencies else 0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1)
+    }
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() in SCENARIOS and float(weight or 0) > 0:
+            mix[name.strip()] = float(weight)
+    return mix
+
+
+class PolicySleeps:
+    """Stands in for the time module inside the crawler: sleeps are skipped"""
+
+    def sleep(self, seconds):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class LoadContext:
+    """Tokens, fixture site and counters shared by the virtual users"""
+
+    def __init__(self, site, user_token, admin_token, analyze_pages):
+        self.site = site
+        self.user = {"Authorization": f"Bearer {user_token}"}
+        self.admin = {"Authorization": f"Bearer {admin_token}"}
+        self.analyze_pages = analyze_pages
+        self.hit_domain = f"{site.url}/page/1"
+        self._miss = 0
+
+    def next_miss_domain(self):
+        # A fresh seed page each time: a new cache key and a real crawl
+        self._miss += 1
+        return f"{self.site.url}/page/{2 + self._miss % (self.site.pages - 2)}?run={self._miss}"
+
+
+async def login(client, ctx, rng):
+    return await client.post("/api/token", data={"username": USER_EMAIL, "password": USER_PASSWORD},
+                             headers={"X-Forwarded-For": f"10.1.{rng.randrange(250)}.{rng.randrange(250)}"})
+
+
+async def me(client, ctx, rng):
+    return await client.get("/api/me", headers=ctx.user)
+
+
+async def analyze_hit(client, ctx, rng):
+    return await client.post("/api/analyze", headers=ctx.user,
+                             json={"domain": ctx.hit_domain, "max_pages": ctx.analyze_pages})
+
+
+async def analyze_miss(client, ctx, rng):
+    return await client.post("/api/analyze", headers=ctx.user,
+                             json={"domain": ctx.next_miss_domain(), "max_pages": ctx.analyze_pages})
+
+
+async def seo_comparison(client, ctx, rng):
+    return await client.post("/api/seo-comparison", headers=ctx.user,
+                             json={"your_domain": ctx.site.url, "competitors": [f"{ctx.site.url}/page/3"]})
+
+
+async def sentiment(client, ctx, rng):
+    return await client.post("/api/language/sentiment", headers=ctx.user, json={"text": rng.choice(SENTENCES)})
+
+
+async def admin(client, ctx, rng):
+    path = rng.choice(("/api/admin/stats", "/api/admin/users", "/api/admin/activity?limit=20"))
+    return await client.get(path, headers=ctx.admin)
+
+
+SCENARIOS = {
+    "login": login,
+    "me": me,
+    "analyze_hit": analyze_hit,
+    "analyze_miss": analyze_miss,
+    "seo_comparison": seo_comparison,
+    "sentiment": sentiment,
+    "admin": admin
+}
+
+
+def failed(response):
+    if response.status_code >= 400:
+        return True
+    if response.headers.get("content-type", "").startswith("application/json"):
+        body = response.json()
+        return isinstance(body, dict) and body.get("success") is False
+    return False
+
+
+async def run_stage(client, ctx, mix, concurrency, seconds, measure_loop_lag):
+    names, weights = list(mix), list(mix.values())
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    probe, lag = [], []
+    deadline = time.perf_counter() + seconds
+
+    async def virtual_user(n):
+        rng = random.Random(n)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                bad = failed(await SCENARIOS[name](client, ctx, rng))
+            except httpx.HTTPError:
+                bad = True
+            latencies[name].append(time.perf_counter() - start)
+            errors[name] += bad
+
+    async def prober():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await client.get("/")
+            probe.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+    async def ticker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag.append(max(0.0, time.perf_counter() - start - 0.01))
+
+    tasks = [virtual_user(n) for n in range(concurrency)] + [prober()]
+    if measure_loop_lag:
+        tasks.append(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [l for values in latencies.values() for l in values]
+    stage = {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 1),
+        "total": summarize(all_latencies, sum(errors.values()), elapsed),
+        "routes": {name: summarize(latencies[name], errors[name], elapsed) for name in names if latencies[name]},
+        "probe": summarize(probe, 0, elapsed)
+    }
+    if measure_loop_lag:
+        stage["loop_lag_ms"] = {
+            "p50": round(percentile(lag, 50) * 1000, 1),
+            "p99": round(percentile(lag, 99) * 1000, 1),
+            "max": round(max(lag, default=0) * 1000, 1)
+        }
+    return stage
+
+
+def prepare_database():
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == USER_EMAIL).first()
+        if not user:
+            user = User(email=USER_EMAIL, hashed_password=get_password_hash(USER_PASSWORD))
+            db.add(user)
+        user.quota = 10 ** 9
+        admin_user = db.query(User).filter(User.email == os.environ["ADMIN_EMAIL"]).first()
+        admin_user.quota = 10 ** 9
+        db.commit()
+    finally:
+        db.close()
+    main.user_cache.clear()
+
+
+def start_uvicorn():
+    if not UVICORN_AVAILABLE:
+        raise SystemExit("BENCH_TRANSPORT=uvicorn needs uvicorn: pip install uvicorn")
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=0, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def run():
+    levels = [int(c) for c in os.getenv("BENCH_CONCURRENCY", "1,4,16,32").split(",")]
+    seconds = float(os.getenv("BENCH_STAGE_SECONDS", "10"))
+    mix = parse_mix(os.getenv("BENCH_MIX", DEFAULT_MIX))
+    transport_name = os.getenv("BENCH_TRANSPORT", "asgi")
+    analyze_pages = int(os.getenv("BENCH_ANALYZE_PAGES", "5"))
+
+    if not os.getenv("BENCH_REAL_SLEEPS"):
+        scraper.time = PolicySleeps()
+    main.get_geo_location = lambda ip: "Local"
+    for limit_type in list(main.rate_limiter.limits):
+        main.rate_limiter.limits[limit_type] = (10 ** 9, 60)
+
+    await main.startup()
+    prepare_database()
+
+    site = FixtureSite(pages=int(os.getenv("BENCH_SITE_PAGES", "200")), page_kb=20, fanout=10,
+                       latency_ms=float(os.getenv("BENCH_LATENCY_MS", "10"))).start()
+    server = None
+    if transport_name == "uvicorn":
+        server, server_thread, base_url = start_uvicorn()
+        client = httpx.AsyncClient(base_url=base_url, timeout=120)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://load", timeout=120)
+
+    async with client:
+        admin_token = (await client.post("/api/token", data={
+            "username": os.environ["ADMIN_EMAIL"], "password": os.environ["ADMIN_PASSWORD"]
+        })).json()["access_token"]
+        user_token = (await client.post("/api/token", data={
+            "username": USER_EMAIL, "password": USER_PASSWORD
+        })).json()["access_token"]
+        ctx = LoadContext(site, user_token, admin_token, analyze_pages)
+
+        # Warm-up: fill the analysis cache for analyze_hit and load models and code paths once
+        rng = random.Random(0)
+        for name in mix:
+            await SCENARIOS[name](client, ctx, rng)
+
+        stages = []
+        for concurrency in levels:
+            stage = await run_stage(client, ctx, mix, concurrency, seconds, transport_name == "asgi")
+            stages.append(stage)
+            print(f"concurrency {concurrency}: {stage['total']['rps']} req/s, "
+                  f"p95 {stage['total']['p95_ms']} ms, probe p95 {stage['probe']['p95_ms']} ms", file=sys.stderr)
+
+    if server is not None:
+        server.should_exit = True
+        server_thread.join(timeout=10)
+    site.stop()
+
+    report = {
+        "transport": transport_name,
+        "mix": mix,
+        "stage_seconds": seconds,
+        "analyze_pages": analyze_pages,
+        "fixture_latency_ms": site.latency * 1000,
+        "stages": stages
+    }
+    print(json.dumps(report, indent=2))
+
+    output = os.getenv("BENCH_OUTPUT")
+    if output:
+        with open(output, "a") as f:
+            f.write(json.dumps(dict(report, benchmark="load_test", timestamp=time.time(), commit=git_commit())) + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
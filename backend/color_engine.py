@@ -0,0 +1,185 @@
+"""
+Dominant colour palettes for brand and ad images
+
+Pixels are never visited one at a time in Python:
+
+1. downsample to PALETTE_SAMPLE_SIZE and drop transparent pixels
+2. bucket every pixel into a 5-bit-per-channel histogram (np.bincount)
+3. weighted k-means over the bucket means in CIELAB, so clusters follow
+   perceived colour difference rather than raw RGB distance
+4. merge clusters closer than MERGE_DELTA_E and drop slivers under
+   MIN_SHARE percent
+
+Photos therefore yield a handful of meaningful brand colours instead of
+five near-identical pixel values. Palettes are memoized in text_cache by
+a digest of the sampled pixels, so the same creative served from several
+URLs is analysed once.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from text_cache import text_cache
+
+logger = logging.getLogger("ai-grinners.color_engine")
+
+# Bump when sampling, clustering or the output format changes (part of cache keys)
+ENGINE_VERSION = "1"
+
+PALETTE_SAMPLE_SIZE = int(os.getenv("PALETTE_SAMPLE_SIZE", "150"))
+BUCKET_BITS = 5
+KMEANS_ITERATIONS = 12
+# CIE76 distance below which two clusters read as the same colour
+MERGE_DELTA_E = 12.0
+# Clusters covering less than this percentage of the image are dropped
+MIN_SHARE = 1.0
+
+# sRGB (D65) -> XYZ, and the D65 white point
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def srgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """(n, 3) sRGB values in 0-255 to CIELAB"""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = linear @ _RGB_TO_XYZ.T / _WHITE
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]), 200 * (f[:, 1] - f[:, 2])], axis=1)
+
+
+def sample_pixels(image, size: int = PALETTE_SAMPLE_SIZE) -> np.ndarray:
+    """(n, 3) uint8 RGB pixels of a downsampled copy, transparent pixels removed"""
+    img = image.copy()
+    img.thumbnail((size, size))
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = np.asarray(img.convert("RGBA")).reshape(-1, 4)
+        opaque = rgba[rgba[:, 3] >= 128, :3]
+        return opaque if len(opaque) else rgba[:, :3]
+    return np.asarray(img.convert("RGB")).reshape(-1, 3)
+
+
+def _histogram(pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean RGB and pixel count of every non-empty histogram bucket"""
+    q = (pixels >> (8 - BUCKET_BITS)).astype(np.int64)
+    idx = (q[:, 0] << (2 * BUCKET_BITS)) | (q[:, 1] << BUCKET_BITS) | q[:, 2]
+    size = 1 << (3 * BUCKET_BITS)
+    counts = np.bincount(idx, minlength=size)
+    filled = np.flatnonzero(counts)
+    sums = np.stack([np.bincount(idx, weights=pixels[:, c], minlength=size)[filled] for c in range(3)], axis=1)
+    return sums / counts[filled, None], counts[filled].astype(np.float64)
+
+
+def _init_centers(points: np.ndarray, weights: np.ndarray, k: int) -> np.ndarray:
+    # Deterministic k-means++: heaviest bucket first, then the bucket with
+    # the largest weight x squared distance to the chosen centres
+    chosen = [int(np.argmax(weights))]
+    dist = ((points - points[chosen[0]]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        nxt = int(np.argmax(weights * dist))
+        if dist[nxt] == 0:
+            break
+        chosen.append(nxt)
+        dist = np.minimum(dist, ((points - points[nxt]) ** 2).sum(axis=1))
+    return points[chosen].copy()
+
+
+def _kmeans(points: np.ndarray, weights: np.ndarray, k: int) -> np.ndarray:
+    """Cluster label of every point (weighted Lloyd iterations)"""
+    centers = _init_centers(points, weights, k)
+    labels = np.zeros(len(points), dtype=np.int64)
+    for i in range(KMEANS_ITERATIONS):
+        dist = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = dist.argmin(axis=1)
+        if i and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        totals = np.bincount(labels, weights=weights, minlength=len(centers))
+        for c in range(3):
+            sums = np.bincount(labels, weights=weights * points[:, c], minlength=len(centers))
+            centers[:, c] = np.where(totals > 0, sums / np.maximum(totals, 1e-12), centers[:, c])
+    return labels
+
+
+def _merge_clusters(lab: np.ndarray, rgb: np.ndarray, weights: np.ndarray) -> List[Tuple[np.ndarray, float]]:
+    """Fold clusters within MERGE_DELTA_E of a heavier one; returns (rgb, weight), heaviest first"""
+    kept: List[List] = []
+    for i in np.argsort(-weights):
+        for entry in kept:
+            if np.linalg.norm(entry[0] - lab[i]) < MERGE_DELTA_E:
+                total = entry[2] + weights[i]
+                entry[0] = (entry[0] * entry[2] + lab[i] * weights[i]) / total
+                entry[1] = (entry[1] * entry[2] + rgb[i] * weights[i]) / total
+                entry[2] = total
+                break
+        else:
+            kept.append([lab[i].copy(), rgb[i].copy(), float(weights[i])])
+    kept.sort(key=lambda entry: -entry[2])
+    return [(entry[1], entry[2]) for entry in kept]
+
+
+def palette_from_pixels(pixels: np.ndarray, max_colors: int = 5) -> List[Dict]:
+    """Dominant colours of (n, 3) uint8 pixels as [{"color", "rgb", "percentage"}]"""
+    if not len(pixels):
+        return []
+    bucket_rgb, bucket_weight = _histogram(pixels)
+    bucket_lab = srgb_to_lab(bucket_rgb)
+
+    # Over-segment, then merge perceptually identical clusters
+    k = min(len(bucket_rgb), max_colors * 2)
+    labels = _kmeans(bucket_lab, bucket_weight, k)
+    weights = np.bincount(labels, weights=bucket_weight, minlength=k)
+    used = np.flatnonzero(weights)
+    lab = np.stack([np.bincount(labels, weights=bucket_weight * bucket_lab[:, c], minlength=k)[used] for c in range(3)], axis=1)
+    rgb = np.stack([np.bincount(labels, weights=bucket_weight * bucket_rgb[:, c], minlength=k)[used] for c in range(3)], axis=1)
+    weights = weights[used]
+    lab /= weights[:, None]
+    rgb /= weights[:, None]
+
+    total = float(len(pixels))
+    palette = []
+    for color, weight in _merge_clusters(lab, rgb, weights)[:max_colors]:
+        percentage = round(weight / total * 100, 1)
+        if percentage < MIN_SHARE:
+            break
+        rgb_int = [int(v) for v in np.clip(np.round(color), 0, 255)]
+        palette.append({
+            "color": "#{:02x}{:02x}{:02x}".format(*rgb_int),
+            "rgb": rgb_int,
+            "percentage": percentage
+        })
+    return palette
+
+
+def extract_palette(image, max_colors: int = 5) -> List[Dict]:
+    """Dominant colours of a PIL image, memoized by its sampled pixels"""
+    pixels = sample_pixels(image)
+    digest = hashlib.sha1(pixels.tobytes()).hexdigest()
+    version = f"{max_colors}/{ENGINE_VERSION}"
+    hit, cached = text_cache.get("palette", digest, version)
+    if hit:
+        return cached
+
+    palette = palette_from_pixels(pixels, max_colors)
+    text_cache.set("palette", digest, palette, version)
+    return palette
+
+
+def extract_palettes(images: Sequence, max_colors: int = 5) -> List[List[Dict]]:
+    """Palettes for many images; failures yield an empty palette"""
+    palettes = []
+    for image in images:
+        try:
+            palettes.append(extract_palette(image, max_colors))
+        except Exception as e:
+            logger.warning(f"Palette extraction failed: {e}")
+            palettes.append([])
+    return palettes
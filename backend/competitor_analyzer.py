@@ -1,20 +1,120 @@
-import requests
+"""
+Competitor discovery: search, rank, then scrape the top competitors
+
+A domain analysis used to run 4 Custom Search queries one after another
+(10 s timeout each) and then scrape each competitor in turn (45 s each),
+so one analyze_domain call could take minutes:
+
+- the queries run concurrently, and each search response is cached by
+  query for SEARCH_CACHE_TTL (search quota is paid per query); failed
+  searches are not cached
+- discover_competitors() scrapes the ranked competitors in parallel under
+  one overall COMPETITOR_DEADLINE; competitors whose scrape didn't finish
+  in time come back unscraped with timed_out=True
+- GOOGLE_SEARCH_URL and SCRAPER_SERVICE_URL can point at a local stand-in
+"""
+
+import logging
 import os
-from typing import List, Dict
-from urllib.parse import urlparse
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger("ai-grinners.competitor_analyzer")
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1")
 SCRAPER_URL = os.getenv("SCRAPER_SERVICE_URL")
 
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+SCRAPE_TIMEOUT = float(os.getenv("COMPETITOR_SCRAPE_TIMEOUT", "45"))
+# Overall budget for searching plus scraping all competitors of one domain
+COMPETITOR_DEADLINE = float(os.getenv("COMPETITOR_DEADLINE", "60"))
+COMPETITOR_WORKERS = int(os.getenv("COMPETITOR_WORKERS", "8"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))
+
 BLACKLIST = [
     'amazon', 'noon.com', 'jumia', 'namshi', 'ebay', 'alibaba', 
     'walmart', 'target', 'bestbuy', 'aliexpress', 'facebook',
     'instagram', 'twitter', 'linkedin', 'youtube', 'wikipedia'
 ]
 
-def find_competitors(domain: str, page_info: dict, max_results: int = 5) -> List[Dict]:
+search_cache = TTLCache("search", ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_MAX_ENTRIES)
+
+_session = None
+_pool = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session for search and scraper calls"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=COMPETITOR_WORKERS, pool_maxsize=COMPETITOR_WORKERS)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """Thread pool for concurrent searches and competitor scrapes (network-bound)"""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=COMPETITOR_WORKERS, thread_name_prefix="competitors")
+    return _pool
+
+
+def _remaining(deadline: Optional[float], cap: float) -> float:
+    if deadline is None:
+        return cap
+    return max(0.1, min(cap, deadline - time.monotonic()))
+
+
+def search(query: str, deadline: Optional[float] = None) -> List[Dict]:
+    """Custom Search result items for query (cached; [] on failure)"""
+    items = search_cache.get(query)
+    if items is not None:
+        return items
+    try:
+        response = get_session().get(
+            GOOGLE_SEARCH_URL,
+            params={
+                'key': GOOGLE_API_KEY,
+                'cx': GOOGLE_CSE_ID,
+                'q': query,
+                'num': 10
+            },
+            timeout=_remaining(deadline, SEARCH_TIMEOUT)
+        )
+        if response.status_code != 200:
+            logger.warning(f"Search for '{query}' returned {response.status_code}")
+            return []
+        items = response.json().get('items', [])
+    except Exception as e:
+        logger.warning(f"Search error for '{query}': {e}")
+        return []
+    search_cache.set(query, items)
+    return items
+
+
+def find_competitors(domain: str, page_info: dict, max_results: int = 5,
+                     deadline: Optional[float] = None) -> List[Dict]:
     """Smarter competitor finding with multiple search strategies"""
     
     title = page_info.get('title', '')
@@ -32,48 +132,30 @@ def find_competitors(domain: str, page_info: dict, max_results: int = 5) -> List
     ]
     
     all_competitors = {}
-    
-    for query in queries:
-        try:
-            response = requests.get(
-                'https://www.googleapis.com/customsearch/v1',
-                params={
-                    'key': GOOGLE_API_KEY,
-                    'cx': GOOGLE_CSE_ID,
-                    'q': query,
-                    'num': 10
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                results = response.json().get('items', [])
-                
-                for item in results:
-                    url = item.get('link', '')
-                    comp_domain = extract_domain(url)
-                    
-                    if comp_domain == domain:
-                        continue
-                    if any(bl in comp_domain.lower() for bl in BLACKLIST):
-                        continue
-                    if comp_domain in all_competitors:
-                        continue
-                    
-                    all_competitors[comp_domain] = {
-                        'domain': comp_domain,
-                        'url': url,
-                        'title': item.get('title', ''),
-                        'snippet': item.get('snippet', ''),
-                        'relevance_score': calculate_relevance(item, keywords, domain)
-                    }
-                    
-                    if len(all_competitors) >= max_results * 2:
-                        break
-            
-        except Exception as e:
-            print(f"Search error for '{query}': {e}")
-            continue
+
+    # Queries run concurrently; results are merged in query order as before
+    for results in get_pool().map(lambda query: search(query, deadline), queries):
+        for item in results:
+            url = item.get('link', '')
+            comp_domain = extract_domain(url)
+
+            if comp_domain == domain:
+                continue
+            if any(bl in comp_domain.lower() for bl in BLACKLIST):
+                continue
+            if comp_domain in all_competitors:
+                continue
+
+            all_competitors[comp_domain] = {
+                'domain': comp_domain,
+                'url': url,
+                'title': item.get('title', ''),
+                'snippet': item.get('snippet', ''),
+                'relevance_score': calculate_relevance(item, keywords, domain)
+            }
+
+            if len(all_competitors) >= max_results * 2:
+                break
     
     sorted_competitors = sorted(
         all_competitors.values(),
@@ -125,21 +207,18 @@ def calculate_relevance(item: dict, keywords: str, original_domain: str) -> int:
     
     return score
 
-def analyze_competitor_pages(competitor: Dict) -> Dict:
+def analyze_competitor_pages(competitor: Dict, timeout: float = SCRAPE_TIMEOUT) -> Dict:
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{SCRAPER_URL}/scrape-competitor",
             json={'domain': competitor['domain'], 'maxPages': 3},
-            timeout=45
+            timeout=timeout
         )
         
         if response.status_code == 200:
             data = response.json()
             social_links = data.get('social', {})
             
-            # Import social analyzer
-            from social_media_analyzer import generate_ads_library_urls, analyze_social_presence
-            
             return {
                 **competitor, 
                 'pages': data.get('pages', []),
@@ -148,10 +227,44 @@ def analyze_competitor_pages(competitor: Dict) -> Dict:
                 'ads_library_urls': generate_ads_library_urls(social_links)
             }
     except Exception as e:
-        print(f"Competitor scraping error: {e}")
+        logger.warning(f"Competitor scraping error for {competitor.get('domain')}: {e}")
     
     return competitor
 
+
+def analyze_competitors(competitors: List[Dict], deadline: Optional[float] = None) -> List[Dict]:
+    """
+    Scrape competitors in parallel. Those not done by deadline (a
+    time.monotonic() value) are returned as found, with timed_out=True.
+    Order is preserved.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + COMPETITOR_DEADLINE
+    futures = [
+        get_pool().submit(analyze_competitor_pages, comp, _remaining(deadline, SCRAPE_TIMEOUT))
+        for comp in competitors
+    ]
+    wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    results = []
+    for comp, future in zip(competitors, futures):
+        if future.done():
+            results.append(future.result())
+        else:
+            future.cancel()
+            results.append({**comp, 'timed_out': True})
+    timed_out = sum(1 for r in results if r.get('timed_out'))
+    if timed_out:
+        logger.warning(f"{timed_out}/{len(competitors)} competitor scrapes missed the deadline")
+    return results
+
+
+def discover_competitors(domain: str, page_info: dict, max_results: int = 5,
+                         deadline_seconds: float = COMPETITOR_DEADLINE) -> List[Dict]:
+    """find_competitors + analyze_competitors under one overall deadline"""
+    deadline = time.monotonic() + deadline_seconds
+    competitors = find_competitors(domain, page_info, max_results=max_results, deadline=deadline)
+    return analyze_competitors(competitors, deadline=deadline)
+
 def extract_domain(url: str) -> str:
     parsed = urlparse(url)
     return parsed.netloc.replace('www.', '')
@@ -4,40 +4,31 @@ Find content gaps vs competitors
 
 from typing import Dict, List
 from collections import Counter
-import re
+
+from tfidf_index import CorpusIndex, SELF
 
 class ContentGapAnalyzer:
     def analyze_gaps(self, your_content: Dict, competitor_content: List[Dict]) -> Dict:
         """Find content opportunities"""
         
-        # Your keywords
-        your_keywords = set()
-        for page in your_content.get('pages_analyzed', []):
-            your_keywords.update(page.get('keywords', []))
-        
-        # Competitor keywords
-        competitor_keywords = Counter()
-        for comp in competitor_content:
-            for page in comp.get('pages_analyzed', []):
-                competitor_keywords.update(page.get('keywords', []))
+        # One document per crawled page, grouped by site
+        docs = [(SELF, Counter(page.get('keywords', []))) for page in your_content.get('pages_analyzed', [])]
+        for i, comp in enumerate(competitor_content):
+            docs.extend((i, Counter(page.get('keywords', []))) for page in comp.get('pages_analyzed', []))
+        index = CorpusIndex(docs)
         
-        # Find gaps
-        gaps = []
-        for keyword, freq in competitor_keywords.most_common(50):
-            if keyword not in your_keywords:
-                # Count how many competitors use it
-                comp_count = sum(
-                    1 for comp in competitor_content
-                    if any(keyword in page.get('keywords', []) for page in comp.get('pages_analyzed', []))
-                )
-                
-                if comp_count >= 2:  # Used by at least 2 competitors
-                    gaps.append({
-                        'keyword': keyword,
-                        'competitor_usage': comp_count,
-                        'total_frequency': freq,
-                        'priority': 'high' if comp_count >= 3 else 'medium'
-                    })
+        # Find gaps used by at least 2 competitors, ranked by BM25 weight
+        gaps = [
+            {
+                'keyword': gap['keyword'],
+                'score': gap['score'],
+                'status': gap['status'],
+                'competitor_usage': gap['competitor_usage'],
+                'total_frequency': gap['frequency'],
+                'priority': 'high' if gap['competitor_usage'] >= 3 else 'medium'
+            }
+            for gap in index.keyword_gaps(SELF, competitors=range(len(competitor_content)), top_n=30, min_competitors=2)
+        ]
         
         # Content type gaps
         your_topics = self._extract_topics(your_content)
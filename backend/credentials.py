@@ -1,10 +1,19 @@
 """
 Secure credentials management
 All sensitive data is loaded from environment variables
+
+bcrypt work runs on a small dedicated pool (PASSWORD_WORKERS threads, at
+most PASSWORD_QUEUE_LIMIT pending) so login storms queue or shed instead of
+saturating every request thread. Async callers await the pool (run(),
+verify_async(), hash_async()) and hold no request thread while queued. BCRYPT_ROUNDS sets the cost factor; hashes
+with a different cost are upgraded transparently on the next login.
 """
+import asyncio
 import bcrypt
 import os
 import secrets
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Load admin credentials from environment variables
 DEFAULT_ADMIN = {
@@ -12,25 +21,85 @@ DEFAULT_ADMIN = {
     "password": os.getenv("ADMIN_PASSWORD", "AliTia20")
 }
 
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 # Warn if using default credentials
 if not os.getenv("ADMIN_EMAIL") or not os.getenv("ADMIN_PASSWORD"):
     print("⚠️  WARNING: Using default admin credentials. Set ADMIN_EMAIL and ADMIN_PASSWORD environment variables!")
 
-def get_password_hash(password: str) -> str:
-    """Hash password using bcrypt directly"""
+def _truncate(password: str) -> bytes:
     password_bytes = password.encode('utf-8')
     if len(password_bytes) > 72:
         password_bytes = password_bytes[:72]
-    
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
+    return password_bytes
+
+def get_password_hash(password: str) -> str:
+    """Hash password using bcrypt directly"""
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(_truncate(password), salt)
     return hashed.decode('utf-8')
 
 def verify_password(plain: str, hashed: str) -> bool:
     """Verify password using bcrypt directly"""
-    password_bytes = plain.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    
     hashed_bytes = hashed.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
+    return bcrypt.checkpw(_truncate(plain), hashed_bytes)
+
+def needs_rehash(hashed: str) -> bool:
+    """True if hashed was produced with a cost factor other than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password pool's queue is full"""
+
+
+class PasswordWorkerPool:
+    """Bounded executor for bcrypt calls (bcrypt releases the GIL while hashing)"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.workers = workers
+        self.max_pending = max_pending
+
+    def _queue(self, fn, *args) -> Future:
+        """Queue fn on the pool; sheds load when the queue is full"""
+        if not self.slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def submit(self, fn, *args):
+        """Run fn on the pool and wait for it (blocks the calling thread)"""
+        return self._queue(fn, *args).result()
+
+    async def run(self, fn, *args):
+        """Run fn on the pool and await it without holding a thread"""
+        return await asyncio.wrap_future(self._queue(fn, *args))
+
+    def hash(self, password: str) -> str:
+        return self.submit(get_password_hash, password)
+
+    def verify(self, plain: str, hashed: str) -> bool:
+        return self.submit(verify_password, plain, hashed)
+
+    async def hash_async(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify_async(self, plain: str, hashed: str) -> bool:
+        return await self.run(verify_password, plain, hashed)
+
+
+# Global pool instance
+password_pool = PasswordWorkerPool(
+    workers=int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("PASSWORD_QUEUE_LIMIT", "64"))
+)
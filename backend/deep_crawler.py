@@ -6,9 +6,10 @@ import requests
 from bs4 import BeautifulSoup
 from typing import Dict, List, Set
 from urllib.parse import urljoin, urlparse
-import re
 from collections import Counter
 
+from keyword_engine import tokenize, STOP_WORDS
+
 class DeepCrawler:
     def __init__(self, max_pages: int = 50):
         self.max_pages = max_pages
@@ -116,7 +117,7 @@ class DeepCrawler:
         
         # Extract content
         body_text = soup.get_text()
-        words = re.findall(r'\b[a-z]{4,}\b', body_text.lower())
+        words = tokenize(body_text, min_length=4, stop_words=None)
         
         # Word count
         word_count = len(words)
@@ -137,7 +138,7 @@ class DeepCrawler:
             'h1_tags': h1_tags,
             'h2_tags': h2_tags,
             'word_count': word_count,
-            'keywords': words[:100],
+            'keywords': [w for w in words if w not in STOP_WORDS][:100],
             'images_total': len(images),
             'images_with_alt': images_with_alt,
             'internal_links': internal_links,
@@ -3,7 +3,7 @@ Enhanced Ads Analyzer with social discovery
 """
 
 from social_extractor import extract_social_links
-from unified_ads_analyzer import UnifiedAdsAnalyzer
+from unified_ads_analyzer import ads_analyzer
 from typing import Dict
 
 def analyze_competitor_ads_enhanced(domain: str, brand_name: str = None) -> Dict:
@@ -19,8 +19,8 @@ def analyze_competitor_ads_enhanced(domain: str, brand_name: str = None) -> Dict
         'platforms': {}
     }
     
-    # Analyze with discovered accounts
-    analyzer = UnifiedAdsAnalyzer()
+    # Analyze with discovered accounts (shared analyzer and session)
+    analyzer = ads_analyzer
     
     # Meta
     fb_username = social_links.get('facebook') or social_links.get('instagram') or brand_name
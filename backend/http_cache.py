@@ -0,0 +1,210 @@
+"""
+Response compression and HTTP caching for API results
+
+Crawl payloads are hundreds of KB of JSON that compress 5-10x, and the
+dashboard refetches the same analysis as users move between pages:
+
+- CompressionMiddleware (pure ASGI) gzips or brotli-compresses compressible
+  responses of at least COMPRESS_MIN_BYTES, by the client's Accept-Encoding
+  (br preferred when the brotli package is installed). Streaming and
+  already-encoded responses pass through untouched.
+- CachedBody holds one encoded response with a strong ETag (content hash)
+  and its compressed variants, built on first request and kept with the
+  cache entry, so compression CPU is paid once per result, not per request
+- cached_response() answers If-None-Match with 304 (GET/HEAD) or sends the
+  variant the client accepts, with ETag, Vary and Cache-Control
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+from typing import Dict, Iterable, Mapping, Optional
+
+from fastapi.responses import Response
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger("ai-grinners.http_cache")
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+# Per-request compression favours speed; cached variants are built once and can afford more
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+GZIP_STATIC_LEVEL = int(os.getenv("GZIP_STATIC_LEVEL", "9"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+BROTLI_STATIC_QUALITY = int(os.getenv("BROTLI_STATIC_QUALITY", "9"))
+
+# Results are per account: browsers may keep them but must revalidate (cheap 304s)
+PRIVATE_REVALIDATE = "private, no-cache"
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def supported_encodings() -> Iterable[str]:
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best encoding we support that the Accept-Encoding header allows (None = identity)"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_STATIC_QUALITY if static else BROTLI_QUALITY)
+    if encoding == "gzip":
+        # mtime=0 keeps the output (and so any ETag over it) deterministic
+        return gzip.compress(data, compresslevel=GZIP_STATIC_LEVEL if static else GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def etag_for(data: bytes) -> str:
+    """Strong validator: a hash of the uncompressed body"""
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+
+def _variant_etag(etag: str, encoding: Optional[str]) -> str:
+    # Each representation needs its own strong ETag
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, any encoded variant of etag matches)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for encoding in ("br", "gzip"):
+            if candidate.endswith(f"-{encoding}"):
+                candidate = candidate[:-len(encoding) - 1]
+        if candidate == base:
+            return True
+    return False
+
+
+class CachedBody:
+    """An encoded response body with its ETag and lazily built compressed variants"""
+    __slots__ = ("data", "etag", "media_type", "headers", "_variants")
+
+    def __init__(self, data: bytes, media_type: str = "application/json", headers: Optional[Dict[str, str]] = None):
+        self.data = data
+        self.etag = etag_for(data)
+        self.media_type = media_type
+        self.headers = headers or {}
+        self._variants: Dict[str, bytes] = {}
+
+    def variant(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.data
+        body = self._variants.get(encoding)
+        if body is None:
+            # Two racing requests may both compress; the result is identical either way
+            body = self._variants[encoding] = compress(self.data, encoding, static=True)
+        return body
+
+    def __len__(self):
+        return len(self.data)
+
+
+def cached_response(request_headers: Mapping[str, str], body: CachedBody, method: str = "GET",
+                    cache_control: str = PRIVATE_REVALIDATE, headers: Optional[Dict[str, str]] = None) -> Response:
+    """304 when the client's copy is current (GET/HEAD only), else the best encoded variant"""
+    headers = dict(body.headers, **(headers or {}))
+    headers["Cache-Control"] = cache_control
+    headers["Vary"] = "Accept-Encoding"
+
+    if method in ("GET", "HEAD") and etag_matches(request_headers.get("if-none-match"), body.etag):
+        headers["ETag"] = body.etag
+        return Response(status_code=304, headers=headers)
+
+    encoding = negotiate(request_headers.get("accept-encoding")) if len(body) >= COMPRESS_MIN_BYTES else None
+    headers["ETag"] = _variant_etag(body.etag, encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body.variant(encoding), media_type=body.media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """Compress complete (single-message) responses by the request's Accept-Encoding"""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = None
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate(accept_encoding)
+        start = None
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal start, streaming
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None or streaming:
+                return await send(message)
+            if message.get("more_body", False):
+                # Streaming response: send as is rather than buffer it
+                streaming = True
+                await send(start)
+                return await send(message)
+            start_message, body = self._encode(start, message.get("body", b""), encoding)
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _encode(self, start, body: bytes, encoding: Optional[str]):
+        headers = MutableHeaders(raw=list(start.get("headers", [])))
+        status = start["status"]
+        if (status < 200 or status in (204, 304) or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                or len(body) < self.minimum_size):
+            return start, body
+
+        headers.add_vary_header("Accept-Encoding")
+        if encoding:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            if "etag" in headers:
+                headers["ETag"] = _variant_etag(headers["etag"], encoding)
+        return dict(start, headers=headers.raw), body
@@ -0,0 +1,207 @@
+"""
+Pooled, size-limited image fetching and downscaled decoding
+
+- one requests.Session with a connection pool sized for IMAGE_FETCH_WORKERS,
+  so batches of creatives from the same CDN reuse keep-alive connections
+- bodies are streamed and abandoned past IMAGE_MAX_BYTES (checked against
+  Content-Length first, then while reading)
+- decode goes straight to analysis size: JPEG uses draft() to decode at
+  1/2, 1/4 or 1/8 scale in the DCT, other formats reduce() after load;
+  the original dimensions are kept in image.info["original_size"]
+- map_images() downloads IMAGE_FETCH_WORKERS URLs at a time and hands
+  each body to a separate IMAGE_DECODE_WORKERS pool (default: CPU count)
+  for decoding and analysis, so slow CDNs overlap while only a few
+  decoded images are alive
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("ai-grinners.image_fetcher")
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "8"))
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+IMAGE_DECODE_WORKERS = int(os.getenv("IMAGE_DECODE_WORKERS", str(os.cpu_count() or 1)))
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "10"))
+# Longest side images are decoded to; analyzers downscale further themselves
+IMAGE_DECODE_SIZE = int(os.getenv("IMAGE_DECODE_SIZE", "1024"))
+# Refuse to decode more pixels than this (decompression bombs)
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+class ImageFetchError(Exception):
+    """Image could not be downloaded or decoded"""
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session for image downloads"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=IMAGE_FETCH_WORKERS, pool_maxsize=IMAGE_FETCH_WORKERS)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                _session = session
+    return _session
+
+
+def fetch_bytes(url: str, max_bytes: int = IMAGE_MAX_BYTES, timeout: float = IMAGE_FETCH_TIMEOUT) -> bytes:
+    """Download a body, giving up as soon as it exceeds max_bytes"""
+    with get_session().get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ImageFetchError(f"Image is {int(declared)} bytes (limit {max_bytes})")
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            body += chunk
+            if len(body) > max_bytes:
+                raise ImageFetchError(f"Image exceeds {max_bytes} bytes")
+        return bytes(body)
+
+
+def decode_image(data: bytes, max_size: int = IMAGE_DECODE_SIZE) -> "Image.Image":
+    """Decode at most max_size on the longest side, doing as little full-size work as possible"""
+    try:
+        image = Image.open(BytesIO(data))
+        width, height = image.size
+        if width * height > IMAGE_MAX_PIXELS:
+            raise ImageFetchError(f"Image is {width}x{height} (limit {IMAGE_MAX_PIXELS} pixels)")
+        image_format = image.format
+
+        # JPEG: decode directly at a reduced DCT scale (no-op for other formats)
+        image.draft("RGB", (max_size, max_size))
+        image.load()
+
+        factor = max(image.size) // max_size
+        if factor >= 2:
+            image = image.reduce(factor)
+        if max(image.size) > max_size:
+            image.thumbnail((max_size, max_size))
+    except ImageFetchError:
+        raise
+    except Exception as e:
+        raise ImageFetchError(f"Could not decode image: {e}")
+
+    image.format = image_format
+    image.info["original_size"] = (width, height)
+    return image
+
+
+def download(url: str) -> bytes:
+    """fetch_bytes() with every failure reported as ImageFetchError"""
+    try:
+        return fetch_bytes(url)
+    except ImageFetchError:
+        raise
+    except Exception as e:
+        raise ImageFetchError(f"Could not fetch image: {e}")
+
+
+def fetch_image(url: str, max_size: int = IMAGE_DECODE_SIZE) -> "Image.Image":
+    """Download and decode one image (raises ImageFetchError)"""
+    data = download(url)
+    image = decode_image(data, max_size)
+    image.info["bytes"] = len(data)
+    return image
+
+
+_pool = None
+_decode_pool = None
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """Thread pool for concurrent downloads (network-bound)"""
+    global _pool
+    if _pool is None:
+        with _session_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS, thread_name_prefix="image-fetch")
+    return _pool
+
+
+def get_decode_pool() -> ThreadPoolExecutor:
+    """
+    Small pool that decodes and analyses downloaded images. Keeping decoding
+    on a few long-lived threads (rather than every download thread) bounds
+    how many decoded images exist at once and keeps the allocator from
+    growing a separate heap per download thread.
+    """
+    global _decode_pool
+    if _decode_pool is None:
+        with _session_lock:
+            if _decode_pool is None:
+                _decode_pool = ThreadPoolExecutor(max_workers=IMAGE_DECODE_WORKERS, thread_name_prefix="image-decode")
+    return _decode_pool
+
+
+def map_images(urls: List[str], process: Callable[[str, Optional["Image.Image"], Optional[str]], Dict]) -> List[Dict]:
+    """
+    Download each distinct URL concurrently, then decode it and call
+    process(url, image, error) on the decode pool as soon as its body
+    arrives; each decoded image is released once it has been analysed.
+    At most IMAGE_FETCH_WORKERS bodies wait for decoding at a time. Results
+    come back in input order; repeated URLs share one fetch.
+    """
+    pending = threading.BoundedSemaphore(IMAGE_FETCH_WORKERS)
+
+    def fetch(url: str):
+        pending.acquire()
+        start = time.perf_counter()
+        try:
+            return download(url), None, time.perf_counter() - start
+        except ImageFetchError as e:
+            return None, str(e), time.perf_counter() - start
+
+    def analyze(url: str, fetched) -> Dict:
+        data, error, fetch_seconds = fetched
+        start = time.perf_counter()
+        try:
+            image = None
+            if data is not None:
+                try:
+                    image = decode_image(data)
+                    image.info["bytes"] = len(data)
+                except ImageFetchError as e:
+                    error = str(e)
+            del data
+            result = process(url, image, error)
+        finally:
+            pending.release()
+        result["timing_ms"] = {
+            "fetch": round(fetch_seconds * 1000, 1),
+            "analyze": round((time.perf_counter() - start) * 1000, 1)
+        }
+        return result
+
+    distinct = list(dict.fromkeys(urls))
+    downloads = {get_pool().submit(fetch, url): url for url in distinct}
+    analyses = {}
+    for future in as_completed(downloads):
+        url = downloads[future]
+        analyses[url] = get_decode_pool().submit(analyze, url, future.result())
+    results = {url: future.result() for url, future in analyses.items()}
+    return [results[url] for url in urls]
@@ -10,6 +10,7 @@ import json
 from datetime import datetime
 from sqlalchemy.orm import sessionmaker
 from models import Base, engine, AnalysisJob  # Import from models
+from metrics import JOB_DURATION, JOB_QUEUE_DEPTH, JOB_WAIT
 
 class JobQueue:
     def __init__(self):
@@ -42,6 +43,10 @@ class JobQueue:
         job_id = job['job_id']
         func = job['func']
         args = job['args']
+        job_type = job.get('type', 'unknown')
+        started = time.time()
+        JOB_WAIT.observe(started - job.get('enqueued_at', started), type=job_type)
+        status = 'failed'
         
         try:
             # Update status
@@ -59,6 +64,7 @@ class JobQueue:
                 db_job.result = json.dumps(result)
                 db_job.completed_at = datetime.utcnow()
                 db.commit()
+            status = 'completed'
                 
         except Exception as e:
             if db_job:
@@ -66,6 +72,7 @@ class JobQueue:
                 db_job.error = str(e)
                 db.commit()
         finally:
+            JOB_DURATION.observe(time.time() - started, type=job_type, status=status)
             db.close()
     
     def enqueue(self, job_id: str, analysis_type: str, func: Callable, *args, **kwargs) -> str:
@@ -88,7 +95,9 @@ class JobQueue:
         self.queue.put({
             'job_id': job_id,
             'func': func,
-            'args': args
+            'args': args,
+            'type': analysis_type,
+            'enqueued_at': time.time()
         })
         
         return job_id
@@ -123,3 +132,4 @@ class JobQueue:
 # Global queue instance
 job_queue = JobQueue()
 job_queue.start_worker()
+JOB_QUEUE_DEPTH.set_function(job_queue.queue.qsize)
@@ -5,12 +5,12 @@ Deep Keyword Analysis - finds keyword gaps & opportunities
 import requests
 from bs4 import BeautifulSoup
 from collections import Counter
-import re
 from typing import Dict, List
 
+from keyword_engine import count_keywords
+from tfidf_index import CorpusIndex, SELF
+
 class KeywordAnalyzer:
-    def __init__(self):
-        self.stop_words = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for'])
     
     def analyze_keywords(self, your_domain: str, competitor_domains: List[str]) -> Dict:
         """Compare your keywords vs competitors"""
@@ -45,34 +45,19 @@ class KeywordAnalyzer:
             response = requests.get(domain, timeout=10, headers={'User-Agent': 'Mozilla/5.0'})
             soup = BeautifulSoup(response.text, 'html.parser')
             
-            # Get text
-            text = soup.get_text().lower()
-            
-            # Extract words
-            words = re.findall(r'\b[a-z]{3,}\b', text)
-            
-            # Filter stop words
-            filtered = [w for w in words if w not in self.stop_words]
-            
-            # Count frequency
-            freq = Counter(filtered)
-            
-            return freq.most_common(100)
+            # Count non-stopword terms with the shared tokenizer
+            return count_keywords(soup.get_text()).most_common(100)
             
         except Exception as e:
             return []
     
     def _find_keyword_gaps(self, your_kw: List, comp_kw: Dict) -> List[str]:
-        """Find keywords competitors use but you don't"""
-        
-        your_words = set([w[0] for w in your_kw])
+        """Find keywords competitors weight heavily but you don't use (BM25-ranked)"""
         
-        gaps = set()
-        for comp, keywords in comp_kw.items():
-            comp_words = set([w[0] for w in keywords[:30]])
-            gaps.update(comp_words - your_words)
+        docs = [(SELF, dict(your_kw))] + [(comp, dict(keywords)) for comp, keywords in comp_kw.items()]
+        index = CorpusIndex(docs)
         
-        return list(gaps)[:20]
+        return [gap['keyword'] for gap in index.keyword_gaps(SELF, top_n=20)]
     
     def _find_opportunities(self, your_kw: List, comp_kw: Dict) -> List[Dict]:
         """Find high-value keywords to target"""
@@ -0,0 +1,171 @@
+"""
+Shared keyword extraction engine
+
+One tokenizer, one stopword set and one YAKE configuration for every
+endpoint that pulls keywords out of text:
+
+- tokenize()/count_keywords(): compiled, letter-only word regex plus the
+  shared STOP_WORDS set (used by frequency-based analyzers)
+- extract_keywords(): YAKE with extractors cached per (n, top)
+- extract_keywords_from_pages(): YAKE per page (memoized, fanned out over
+  a process pool for multi-page crawls), merged so terms that recur across
+  pages rank above one-off phrases
+"""
+
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from lazy_imports import is_installed, lazy_import
+
+logger = logging.getLogger("ai-grinners.keyword_engine")
+
+# YAKE (and its networkx/jellyfish/segtok stack) loads on first extraction
+yake = lazy_import("yake")
+YAKE_AVAILABLE = is_installed("yake")
+
+# Bump when tokenization or scoring changes (part of text_cache keys)
+ENGINE_VERSION = "1"
+
+KEYWORD_WORKERS = int(os.getenv("KEYWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+KEYWORD_POOL_MIN_PAGES = int(os.getenv("KEYWORD_POOL_MIN_PAGES", "8"))
+
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
+    "of", "with", "by", "from", "as", "is", "was", "are", "were", "been",
+    "be", "have", "has", "had", "do", "does", "did", "will", "would",
+    "could", "should", "may", "might", "must", "shall", "can", "this",
+    "that", "these", "those", "i", "you", "he", "she", "it", "we", "they",
+    "your", "our", "their", "its", "his", "her", "them", "us", "me", "my",
+    "not", "no", "all", "any", "more", "most", "other", "some", "such",
+    "than", "then", "there", "here", "when", "where", "which", "who",
+    "what", "how", "why", "about", "into", "over", "also", "just", "only",
+    "very", "out", "up", "so", "if", "each"
+})
+
+
+@lru_cache(maxsize=8)
+def _word_pattern(min_length: int):
+    # Letters only (any script); digits and underscores split words
+    return re.compile(rf"\b[^\W\d_]{{{min_length},}}\b")
+
+
+def tokenize(text: str, min_length: int = 3, stop_words: Optional[Iterable[str]] = STOP_WORDS) -> List[str]:
+    """Lowercased words of at least min_length letters, minus stop words"""
+    if not text:
+        return []
+    words = _word_pattern(min_length).findall(text.lower())
+    if not stop_words:
+        return words
+    return [w for w in words if w not in stop_words]
+
+
+def count_keywords(text: str, min_length: int = 3) -> Counter:
+    """Frequency of non-stopword tokens"""
+    return Counter(tokenize(text, min_length))
+
+
+@lru_cache(maxsize=16)
+def get_extractor(n: int = 3, top: int = 20):
+    """Reusable YAKE extractor (positional args work across yake versions)"""
+    return yake.KeywordExtractor("en", n, 0.9, "seqm", 1, top)
+
+
+def extract_keywords(text: str, top_n: int = 20, n: int = 3) -> List[Dict]:
+    """YAKE keyphrases as [{"term", "score"}], best (lowest score) first"""
+    if not YAKE_AVAILABLE or not text or not text.strip():
+        return []
+    return [
+        {"term": term, "score": float(score)}
+        for term, score in get_extractor(n, top_n).extract_keywords(text)
+    ]
+
+
+def _page_keywords(args) -> List[Dict]:
+    text, top_n = args
+    try:
+        return extract_keywords(text, top_n)
+    except Exception as e:
+        logger.warning(f"Keyword extraction failed for page: {e}")
+        return []
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process pool for YAKE (None when KEYWORD_WORKERS <= 1); spawned workers, as forking a threaded server isn't safe"""
+    global _pool
+    if _pool is None and KEYWORD_WORKERS > 1:
+        with _pool_lock:
+            if _pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                _pool = ProcessPoolExecutor(max_workers=KEYWORD_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def merge_page_keywords(per_page: List[List[Dict]], top_n: int = 20) -> List[Dict]:
+    """
+    Merge per-page YAKE results. A term's merged score is its best page
+    score divided by the number of pages it appears on (lower is better).
+    """
+    best: Dict[str, float] = {}
+    pages: Counter = Counter()
+    display: Dict[str, str] = {}
+    for keywords in per_page:
+        seen = set()
+        for kw in keywords:
+            key = kw["term"].lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            pages[key] += 1
+            display.setdefault(key, kw["term"])
+            best[key] = min(best.get(key, kw["score"]), kw["score"])
+
+    merged = [
+        {"term": display[key], "score": best[key] / pages[key], "pages": pages[key]}
+        for key in best
+    ]
+    merged.sort(key=lambda kw: (kw["score"], -kw["pages"], kw["term"]))
+    return merged[:top_n]
+
+
+def extract_keywords_from_pages(page_texts: List[str], top_n: int = 20, per_page: int = 20) -> List[Dict]:
+    """
+    YAKE per page, merged across pages. Per-page results are memoized in
+    text_cache (repeat crawls and shared templates skip YAKE); the misses
+    run in the process pool for larger crawls.
+    """
+    from text_cache import text_cache, normalize_text
+
+    texts = [text for text in page_texts if text and text.strip()]
+    version = f"yake{per_page}/{ENGINE_VERSION}"
+    results: List[Optional[List[Dict]]] = [None] * len(texts)
+    pending: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        hit, cached = text_cache.get("yake", text, version)
+        if hit:
+            results[i] = cached
+        else:
+            pending.setdefault(normalize_text(text), []).append(i)
+
+    if pending:
+        jobs = [(texts[positions[0]], per_page) for positions in pending.values()]
+        pool = get_pool() if len(jobs) >= KEYWORD_POOL_MIN_PAGES else None
+        if pool is None:
+            scored = [_page_keywords(job) for job in jobs]
+        else:
+            scored = list(pool.map(_page_keywords, jobs, chunksize=max(1, len(jobs) // (KEYWORD_WORKERS * 2))))
+        for (text, _), positions, keywords in zip(jobs, pending.values(), scored):
+            text_cache.set("yake", text, keywords, version)
+            for i in positions:
+                results[i] = keywords
+
+    return merge_page_keywords(results, top_n)
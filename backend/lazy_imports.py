@@ -0,0 +1,98 @@
+"""
+Deferred imports for heavy dependencies
+
+Importing main used to import YAKE, TextBlob/NLTK, NumPy, Pillow and, where
+installed, pysentimiento with torch/transformers before the first request
+could be served. Modules that only need those inside functions bind a
+proxy instead:
+
+    yake = lazy_import("yake")       # nothing imported yet
+    yake.KeywordExtractor(...)       # imported here, on first use
+
+- is_installed(name) answers *_AVAILABLE checks from the import system's
+  finders without executing the package
+- warm_up() imports every deferred module on a daemon thread once the app
+  is up, so the first real request doesn't pay for them either
+"""
+
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger("ai-grinners.lazy_imports")
+
+_deferred: List[str] = []
+
+
+class LazyModule:
+    """Stands in for a module until an attribute is first read"""
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            # The import system's per-module lock makes a concurrent first use safe
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Proxy for module name, imported on first attribute access"""
+    if name not in _deferred:
+        _deferred.append(name)
+    return LazyModule(name)
+
+
+def is_installed(name: str) -> bool:
+    """True if name can be imported (without importing it)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def deferred_modules() -> List[str]:
+    return list(_deferred)
+
+
+def warm_up(names: Optional[Iterable[str]] = None, background: bool = True,
+            after: Optional[Callable[[], bool]] = None):
+    """
+    Import deferred modules now, or in a daemon thread when background=True.
+    With after (e.g. lambda: model_registry.ready) the thread first waits for
+    it to return True, so warm-up doesn't compete with readiness work.
+    """
+    names = [n for n in (names if names is not None else _deferred) if is_installed(n)]
+
+    def run():
+        while after is not None and not after():
+            time.sleep(0.05)
+        start = time.perf_counter()
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logger.warning(f"Warm-up import of {name} failed: {e}")
+        logger.info(f"Warmed {len(names)} deferred modules in {time.perf_counter() - start:.2f}s")
+
+    if background:
+        threading.Thread(target=run, name="import-warmup", daemon=True).start()
+    else:
+        run()
@@ -15,80 +15,109 @@ Enhanced with open-source alternatives from GitHub:
 import os
 import re
 import json
+import copy
+import functools
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from collections import Counter
 import logging
-import requests
-from io import BytesIO
+import multiprocessing
+import threading
+import time
 
 logger = logging.getLogger("ai-grinners.local_services")
 
-# TextBlob for sentiment analysis (free, local)
-try:
-    from textblob import TextBlob
-    TEXTBLOB_AVAILABLE = True
-except ImportError:
-    TEXTBLOB_AVAILABLE = False
+from lazy_imports import is_installed, lazy_import
+
+# TextBlob for sentiment analysis (free, local); NLTK loads on first use
+textblob = lazy_import("textblob")
+TEXTBLOB_AVAILABLE = is_installed("textblob")
+if not TEXTBLOB_AVAILABLE:
     print("⚠️  TextBlob not installed. Install with: pip install textblob")
 
+from model_registry import model_registry
+from text_cache import text_cache, normalize_text
+from keyword_engine import tokenize, ENGINE_VERSION as KEYWORD_ENGINE_VERSION
+
+# NumPy/Pillow-backed image helpers load with the first image request
+color_engine = lazy_import("color_engine")
+image_fetcher = lazy_import("image_fetcher")
+
+# Bump when the shape of cached analysis results changes
+RESULT_FORMAT_VERSION = "1"
+
 # PysSentimiento for advanced multilingual sentiment (optional)
-try:
+PYSENTIMIENTO_AVAILABLE = is_installed("pysentimiento")
+
+
+def _build_analyzer(task: str):
+    # pysentimiento imports torch and transformers; only the registry's loader pays for that
     from pysentimiento import create_analyzer
-    PYSENTIMIENTO_AVAILABLE = True
-    # Create analyzers lazily to avoid startup delays
-    _sentiment_analyzer = None
-    _emotion_analyzer = None
-except ImportError:
-    PYSENTIMIENTO_AVAILABLE = False
-    _sentiment_analyzer = None
-    _emotion_analyzer = None
+    from nlp_backends import apply_inference_backend
+    return apply_inference_backend(create_analyzer(task=task, lang="en"))
+
+
+if PYSENTIMIENTO_AVAILABLE:
+    # Models are built once by the registry, at startup or on first use
+    model_registry.register("sentiment", lambda: _build_analyzer("sentiment"))
+    model_registry.register("emotion", lambda: _build_analyzer("emotion"))
 
 
 def get_sentiment_analyzer():
-    """Lazy load sentiment analyzer"""
-    global _sentiment_analyzer
-    if PYSENTIMIENTO_AVAILABLE and _sentiment_analyzer is None:
-        try:
-            _sentiment_analyzer = create_analyzer(task="sentiment", lang="en")
-        except Exception:
-            pass
-    return _sentiment_analyzer
+    """Shared sentiment analyzer (None if pysentimiento is unavailable)"""
+    return model_registry.get("sentiment")
 
 
 def get_emotion_analyzer():
-    """Lazy load emotion analyzer"""
-    global _emotion_analyzer
-    if PYSENTIMIENTO_AVAILABLE and _emotion_analyzer is None:
-        try:
-            _emotion_analyzer = create_analyzer(task="emotion", lang="en")
-        except Exception:
-            pass
-    return _emotion_analyzer
+    """Shared emotion analyzer (None if pysentimiento is unavailable)"""
+    return model_registry.get("emotion")
 
 
 # PIL/Pillow for image processing (for LogoHunter-style detection)
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+Image = lazy_import("PIL.Image")
+PIL_AVAILABLE = is_installed("PIL")
+if not PIL_AVAILABLE:
     logger.warning("⚠️  Pillow not installed. Image analysis limited. Install with: pip install Pillow")
 
 # Optional: OpenCV for advanced image processing
-try:
-    import cv2
-    import numpy as np
-    OPENCV_AVAILABLE = True
-except ImportError:
-    OPENCV_AVAILABLE = False
+OPENCV_AVAILABLE = is_installed("cv2") and is_installed("numpy")
+
+# Reference logos, hashed once into a multi-index hash table by the registry
+LOGO_REFERENCE_DIR = os.getenv("LOGO_REFERENCE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logos"))
+
+
+def _build_logo_index():
+    from logo_index import load_logo_index
+    return load_logo_index(LOGO_REFERENCE_DIR)
+
+
+if PIL_AVAILABLE:
+    model_registry.register("logos", _build_logo_index)
+
+
+def get_logo_index():
+    """Shared reference logo index (None if Pillow is unavailable)"""
+    return model_registry.get("logos")
+
+
+def match_logos(image: "Image.Image", max_results: int = 5) -> List[Dict]:
+    """Reference logos found in an image, most confident first"""
+    index = get_logo_index()
+    if index is None or not len(index):
+        return []
+    try:
+        return index.match(image, max_results=max_results)
+    except Exception as e:
+        logger.error(f"Logo matching failed: {e}")
+        return []
 
 
 # Database imports for local analytics storage
 try:
-    from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Float
+    from sqlalchemy import create_engine, func, Column, Integer, String, Date, DateTime, Text, Float, UniqueConstraint
     from sqlalchemy.ext.declarative import declarative_base
     from sqlalchemy.orm import sessionmaker
+    from rollups import increment as increment_rollup
     SQLALCHEMY_AVAILABLE = True
 except ImportError:
     SQLALCHEMY_AVAILABLE = False
@@ -112,16 +141,32 @@ if SQLALCHEMY_AVAILABLE:
         results = Column(Text)
         user_id = Column(Integer, nullable=True)
 
+    class AnalyticsDailyRollup(Base):
+        """Per-day/type/user counts of AnalysisHistory, maintained on write"""
+        __tablename__ = "analytics_daily_rollups"
+        __table_args__ = (UniqueConstraint("day", "report_type", "user_id"),)
+
+        id = Column(Integer, primary_key=True, index=True)
+        day = Column(Date, index=True)
+        report_type = Column(String(100))
+        user_id = Column(Integer, default=0)
+        count = Column(Integer, default=0)
+
+
+_Session = None
+
 
 def get_db_session():
-    """Get database session"""
+    """Get database session (engine and tables are set up once per process)"""
+    global _Session
     if not SQLALCHEMY_AVAILABLE:
         return None
 
-    engine = create_engine(DATABASE_URL)
-    Base.metadata.create_all(bind=engine)
-    Session = sessionmaker(bind=engine)
-    return Session()
+    if _Session is None:
+        engine = create_engine(DATABASE_URL)
+        Base.metadata.create_all(bind=engine)
+        _Session = sessionmaker(bind=engine)
+    return _Session()
 
 
 def save_analytics(analysis_data: dict) -> Dict:
@@ -132,6 +177,7 @@ def save_analytics(analysis_data: dict) -> Dict:
             return {"success": False, "error": "Database not available"}
 
         record = AnalysisHistory(
+            timestamp=datetime.utcnow(),
             domain=analysis_data.get("domain"),
             analysis_type=analysis_data.get("type"),
             results=json.dumps(analysis_data.get("results", {})),
@@ -139,6 +185,8 @@ def save_analytics(analysis_data: dict) -> Dict:
         )
 
         session.add(record)
+        increment_rollup(session, AnalyticsDailyRollup, record.timestamp.date(),
+                         record.analysis_type, record.user_id)
         session.commit()
         session.close()
 
@@ -147,37 +195,34 @@ def save_analytics(analysis_data: dict) -> Dict:
         return {"success": False, "error": str(e)}
 
 
-def query_analytics(days: int = 30) -> Dict:
-    """Query analytics from local database (replaces BigQuery)"""
+def query_analytics(days: int = 30, user_id: Optional[int] = None) -> Dict:
+    """Query analytics from local database (replaces BigQuery); one user's when user_id is given"""
     try:
         session = get_db_session()
         if not session:
             return {"success": False, "error": "Database not available"}
 
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-
-        results = session.query(AnalysisHistory).filter(
-            AnalysisHistory.timestamp >= cutoff_date
-        ).order_by(AnalysisHistory.timestamp.desc()).all()
+        cutoff_day = (datetime.utcnow() - timedelta(days=days)).date()
 
-        # Aggregate by date and type
-        data = {}
-        for record in results:
-            date_key = record.timestamp.strftime("%Y-%m-%d")
-            if date_key not in data:
-                data[date_key] = {}
-            analysis_type = record.analysis_type or "unknown"
-            data[date_key][analysis_type] = data[date_key].get(analysis_type, 0) + 1
+        # Read the daily rollup (O(days x types)) instead of every history row
+        query = session.query(
+            AnalyticsDailyRollup.day,
+            AnalyticsDailyRollup.report_type,
+            func.sum(AnalyticsDailyRollup.count)
+        ).filter(
+            AnalyticsDailyRollup.day >= cutoff_day
+        )
+        if user_id is not None:
+            query = query.filter(AnalyticsDailyRollup.user_id == user_id)
+        rows = query.group_by(
+            AnalyticsDailyRollup.day, AnalyticsDailyRollup.report_type
+        ).order_by(AnalyticsDailyRollup.day.desc()).all()
 
         # Format for response
-        formatted = []
-        for date, types in data.items():
-            for analysis_type, count in types.items():
-                formatted.append({
-                    "date": date,
-                    "type": analysis_type,
-                    "count": count
-                })
+        formatted = [
+            {"date": day.isoformat(), "type": analysis_type, "count": int(count)}
+            for day, analysis_type, count in rows
+        ]
 
         session.close()
         return {"success": True, "data": formatted}
@@ -187,10 +232,31 @@ def query_analytics(days: int = 30) -> Dict:
 
 # ============= Sentiment Analysis (Replaces Cloud Language API) =============
 
+def sentiment_backend() -> str:
+    """Which analyzer analyze_sentiment() will use; part of the result cache key"""
+    if get_sentiment_analyzer():
+        return "pysentimiento"
+    return "textblob" if TEXTBLOB_AVAILABLE else "simple"
+
+
+def _sentiment_cache_version(backend: str) -> str:
+    if backend == "pysentimiento":
+        # Quantized/ONNX probabilities differ slightly from torch ones
+        inference = getattr(get_sentiment_analyzer(), "inference_backend", "torch")
+        return f"{backend}-{inference}/{RESULT_FORMAT_VERSION}"
+    return f"{backend}/{RESULT_FORMAT_VERSION}"
+
+
+def _cacheable(result: Dict, backend: str) -> bool:
+    # Don't pin errors, or fallback results under the primary backend's key
+    return bool(result.get("success")) and result.get("method", "simple") == backend
+
+
 def analyze_sentiment(text: str) -> Dict:
     """
     Analyze sentiment using pysentimiento (if available) or TextBlob.
     pysentimiento provides advanced multilingual sentiment and emotion analysis.
+    Results are memoized by text content (see text_cache).
     """
     if not text or not text.strip():
         return {
@@ -199,17 +265,25 @@ def analyze_sentiment(text: str) -> Dict:
         }
 
     try:
-        # Try pysentimiento first (more accurate)
-        sentiment_analyzer = get_sentiment_analyzer()
-        if sentiment_analyzer:
-            return analyze_sentiment_pysentimiento(text, sentiment_analyzer)
+        backend = sentiment_backend()
+        version = _sentiment_cache_version(backend)
+        hit, cached = text_cache.get("sentiment", text, version)
+        if hit:
+            return cached
 
+        # Try pysentimiento first (more accurate)
+        if backend == "pysentimiento":
+            result = analyze_sentiment_pysentimiento(text, get_sentiment_analyzer())
         # Fallback to TextBlob
-        if TEXTBLOB_AVAILABLE:
-            return analyze_sentiment_textblob(text)
-
+        elif backend == "textblob":
+            result = analyze_sentiment_textblob(text)
         # Final fallback: Simple rule-based sentiment
-        return analyze_sentiment_simple(text)
+        else:
+            result = analyze_sentiment_simple(text)
+
+        if _cacheable(result, backend):
+            text_cache.set("sentiment", text, result, version)
+        return result
 
     except Exception as e:
         return {
@@ -218,67 +292,81 @@ def analyze_sentiment(text: str) -> Dict:
         }
 
 
+SENTIMENT_LABELS = {"NEG": "Negative", "NEU": "Neutral", "POS": "Positive"}
+
+
+def noun_phrases(text: str) -> List[str]:
+    """First 10 TextBlob noun phrases (the expensive part of entity extraction)"""
+    return list(textblob.TextBlob(text).noun_phrases[:10])
+
+
+def build_entities(phrases: List[str], score: float, magnitude: float) -> List[Dict]:
+    """Entity dicts in Cloud Language format, salience by rank"""
+    return [
+        {
+            "name": phrase,
+            "type": classify_entity(phrase),
+            "salience": round(1.0 / (i + 1), 3),
+            "sentiment": {
+                "score": round(score, 3),
+                "magnitude": round(magnitude, 3)
+            }
+        }
+        for i, phrase in enumerate(phrases)
+    ]
+
+
+def format_pysentimiento_result(probas: Dict[str, float], emotion_probas: Optional[Dict[str, float]],
+                                phrases: List[str]) -> Dict:
+    """Map pysentimiento probabilities (NEG/NEU/POS + emotions) to our response format"""
+    label = SENTIMENT_LABELS.get(max(probas, key=probas.get), "Neutral")
+    pos_score = probas.get("POS", 0)
+    neg_score = probas.get("NEG", 0)
+    polarity = pos_score - neg_score  # Convert to -1 to 1 scale
+
+    emotions = []
+    for emotion, score in (emotion_probas or {}).items():
+        if score > 0.1:  # Only include significant emotions
+            emotions.append({
+                "emotion": emotion.capitalize(),
+                "score": round(score, 3)
+            })
+    emotions.sort(key=lambda x: x["score"], reverse=True)
+
+    return {
+        "success": True,
+        "sentiment": {
+            "score": round(polarity, 3),
+            "magnitude": round(max(pos_score, neg_score), 3),
+            "label": label,
+            "confidence": round(max(probas.values()) * 100, 1)
+        },
+        "emotions": emotions[:5] if emotions else None,
+        "entities": build_entities(phrases, polarity, abs(polarity)),
+        "method": "pysentimiento"
+    }
+
+
 def analyze_sentiment_pysentimiento(text: str, analyzer) -> Dict:
     """Analyze sentiment using pysentimiento (transformer-based)"""
     try:
-        # Get sentiment prediction
-        result = analyzer.predict(text)
-
-        # Map pysentimiento output to our format
-        # pysentimiento returns: NEG, NEU, POS with probabilities
-        label_map = {"NEG": "Negative", "NEU": "Neutral", "POS": "Positive"}
-        label = label_map.get(result.output, "Neutral")
-
-        # Get confidence scores
-        probas = result.probas
-        pos_score = probas.get("POS", 0)
-        neg_score = probas.get("NEG", 0)
-        polarity = pos_score - neg_score  # Convert to -1 to 1 scale
-
-        # Try to get emotions too
-        emotions = []
         emotion_analyzer = get_emotion_analyzer()
-        if emotion_analyzer:
-            try:
-                emotion_result = emotion_analyzer.predict(text)
-                for emotion, score in emotion_result.probas.items():
-                    if score > 0.1:  # Only include significant emotions
-                        emotions.append({
-                            "emotion": emotion.capitalize(),
-                            "score": round(score, 3)
-                        })
-                emotions.sort(key=lambda x: x["score"], reverse=True)
-            except Exception:
-                pass
+        with model_registry.inference("sentiment"):
+            # pysentimiento returns: NEG, NEU, POS with probabilities
+            probas = analyzer.predict(text).probas
+
+            # Try to get emotions too
+            emotion_probas = None
+            if emotion_analyzer:
+                try:
+                    emotion_probas = emotion_analyzer.predict(text).probas
+                except Exception:
+                    pass
 
         # Extract entities using TextBlob
-        entities = []
-        if TEXTBLOB_AVAILABLE:
-            blob = TextBlob(text)
-            for i, phrase in enumerate(blob.noun_phrases[:10]):
-                entity_type = classify_entity(phrase)
-                entities.append({
-                    "name": phrase,
-                    "type": entity_type,
-                    "salience": round(1.0 / (i + 1), 3),
-                    "sentiment": {
-                        "score": round(polarity, 3),
-                        "magnitude": round(abs(polarity), 3)
-                    }
-                })
+        phrases = noun_phrases(text) if TEXTBLOB_AVAILABLE else []
 
-        return {
-            "success": True,
-            "sentiment": {
-                "score": round(polarity, 3),
-                "magnitude": round(max(pos_score, neg_score), 3),
-                "label": label,
-                "confidence": round(max(probas.values()) * 100, 1)
-            },
-            "emotions": emotions[:5] if emotions else None,
-            "entities": entities,
-            "method": "pysentimiento"
-        }
+        return format_pysentimiento_result(probas, emotion_probas, phrases)
     except Exception as e:
         # Fall back to TextBlob on error
         if TEXTBLOB_AVAILABLE:
@@ -288,25 +376,14 @@ def analyze_sentiment_pysentimiento(text: str, analyzer) -> Dict:
 
 def analyze_sentiment_textblob(text: str) -> Dict:
     """Analyze sentiment using TextBlob"""
-    blob = TextBlob(text)
+    blob = textblob.TextBlob(text)
 
     # Sentiment analysis
     polarity = blob.sentiment.polarity  # -1 to 1
     subjectivity = blob.sentiment.subjectivity  # 0 to 1
 
     # Extract entities (noun phrases)
-    entities = []
-    for i, phrase in enumerate(blob.noun_phrases[:10]):
-        entity_type = classify_entity(phrase)
-        entities.append({
-            "name": phrase,
-            "type": entity_type,
-            "salience": round(1.0 / (i + 1), 3),
-            "sentiment": {
-                "score": round(polarity, 3),
-                "magnitude": round(abs(polarity) * subjectivity, 3)
-            }
-        })
+    entities = build_entities(list(blob.noun_phrases[:10]), polarity, abs(polarity) * subjectivity)
 
     return {
         "success": True,
@@ -409,6 +486,155 @@ def get_sentiment_label(score: float) -> str:
         return "Neutral"
 
 
+# ============= Batch Sentiment Analysis =============
+
+NLP_WORKERS = int(os.getenv("NLP_WORKERS", str(min(4, os.cpu_count() or 1))))
+NLP_POOL_MIN_BATCH = int(os.getenv("NLP_POOL_MIN_BATCH", "32"))
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+
+_nlp_pool = None
+_nlp_pool_lock = threading.Lock()
+
+
+def get_nlp_pool():
+    """
+    Process pool for CPU-bound TextBlob work (None when disabled). Workers
+    are spawned, not forked: the server is multi-threaded and may hold
+    torch/model state that isn't fork-safe.
+    """
+    global _nlp_pool
+    if _nlp_pool is None and NLP_WORKERS > 1:
+        with _nlp_pool_lock:
+            if _nlp_pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                _nlp_pool = ProcessPoolExecutor(max_workers=NLP_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _nlp_pool
+
+
+def _map_texts(fn, texts: List[str]):
+    """
+    Lazily run fn over texts, across processes when the batch is big enough
+    to pay for it. Pool work starts immediately; iterate to collect results.
+    """
+    pool = get_nlp_pool() if len(texts) >= NLP_POOL_MIN_BATCH else None
+    if pool is None:
+        return map(fn, texts)
+    return pool.map(fn, texts, chunksize=max(1, len(texts) // (NLP_WORKERS * 4)))
+
+
+def _safe_noun_phrases(text: str) -> List[str]:
+    try:
+        return noun_phrases(text)
+    except Exception:
+        return []
+
+
+def _analyze_sentiment_fallback(text: str, use_textblob: bool) -> Dict:
+    try:
+        if use_textblob:
+            return analyze_sentiment_textblob(text)
+        return analyze_sentiment_simple(text)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def aggregate_sentiment(results: List[Dict]) -> Dict:
+    """Label distribution, mean score, top entities and mean emotions over a batch"""
+    ok = [r for r in results if r.get("success")]
+    labels = Counter(r["sentiment"]["label"] for r in ok)
+    entity_counts = Counter(e["name"].lower() for r in ok for e in r.get("entities") or [])
+
+    emotion_totals = Counter()
+    for r in ok:
+        for e in r.get("emotions") or []:
+            emotion_totals[e["emotion"]] += e["score"]
+
+    return {
+        "total": len(results),
+        "analyzed": len(ok),
+        "failed": len(results) - len(ok),
+        "labels": {label: labels.get(label, 0) for label in ("Positive", "Neutral", "Negative")},
+        "mean_score": round(sum(r["sentiment"]["score"] for r in ok) / len(ok), 3) if ok else 0,
+        "top_entities": [{"name": name, "count": count} for name, count in entity_counts.most_common(10)],
+        "emotions": {
+            emotion: round(total / len(ok), 3)
+            for emotion, total in emotion_totals.most_common()
+        } if emotion_totals else None
+    }
+
+
+def _score_sentiment_batch(texts: List[str], batch_size: int):
+    """Run the best available analyzer over texts. Returns (results, method)"""
+    sentiment_analyzer = get_sentiment_analyzer()
+    if sentiment_analyzer:
+        try:
+            from nlp_inference import predict_batch
+
+            # Submit entity extraction first so pool workers overlap with model inference
+            phrases = _map_texts(_safe_noun_phrases, texts) if TEXTBLOB_AVAILABLE else [[] for _ in texts]
+            emotion_analyzer = get_emotion_analyzer()
+            with model_registry.inference("sentiment_batch"):
+                scores = predict_batch(sentiment_analyzer, texts, emotion_analyzer, batch_size=batch_size)
+
+            results = [
+                format_pysentimiento_result(probas, emotion_probas, item_phrases)
+                for probas, emotion_probas, item_phrases in zip(scores["sentiment"], scores["emotion"], phrases)
+            ]
+            return results, "pysentimiento"
+        except Exception as e:
+            logger.warning(f"Batched pysentimiento inference failed, falling back: {e}")
+
+    # The analyzer is chosen here and passed along: spawned workers re-import this module
+    fallback = functools.partial(_analyze_sentiment_fallback, use_textblob=TEXTBLOB_AVAILABLE)
+    results = list(_map_texts(fallback, texts))
+    return results, "textblob" if TEXTBLOB_AVAILABLE else "simple"
+
+
+def analyze_sentiment_batch(texts: List[str], batch_size: int = SENTIMENT_BATCH_SIZE) -> Dict:
+    """
+    Analyze many texts at once. Per-item results match analyze_sentiment().
+
+    Cached and duplicate texts are scored once. With pysentimiento, sentiment
+    and emotion run as padded mini-batches (see nlp_inference) while noun
+    phrases are extracted in the process pool. Without it, the TextBlob/simple
+    analyzers are fanned out over the pool.
+    """
+    results: List[Optional[Dict]] = [None] * len(texts)
+    backend = method = None
+    pending: Dict[str, List[int]] = {}
+
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            results[i] = {"success": False, "error": "No text provided"}
+            continue
+        if backend is None:
+            backend = sentiment_backend()
+            version = _sentiment_cache_version(backend)
+        hit, cached = text_cache.get("sentiment", text, version)
+        if hit:
+            results[i] = cached
+        else:
+            pending.setdefault(normalize_text(text), []).append(i)
+
+    if pending:
+        misses = [texts[positions[0]] for positions in pending.values()]
+        scored, method = _score_sentiment_batch(misses, batch_size)
+        for text, positions, result in zip(misses, pending.values(), scored):
+            if _cacheable(result, backend):
+                text_cache.set("sentiment", text, result, version)
+            results[positions[0]] = result
+            for i in positions[1:]:
+                results[i] = copy.deepcopy(result)
+
+    return {
+        "success": True,
+        "results": results,
+        "aggregate": aggregate_sentiment(results),
+        "method": method or backend,
+        "scored": len(pending)
+    }
+
+
 # ============= Image Analysis (Replaces Cloud Vision API) =============
 
 # Common brand/logo names for detection
@@ -427,11 +653,12 @@ COMMON_LABELS = [
 ]
 
 
-def detect_logos_in_image(image_url: str) -> Dict:
+def detect_logos_in_image(image_url: str, image: Optional["Image.Image"] = None, fetch: bool = True) -> Dict:
     """
-    Detect logos in an image (simplified version)
-    Note: Without Cloud Vision, we can only do basic URL analysis
-    For full functionality, consider integrating a free OCR service
+    Detect logos in an image by matching it against the reference logo
+    index (perceptual hashes over multi-scale crops), plus brand names
+    found in the image URL. Pass an already decoded image (fetch=False)
+    to skip the download.
     """
     try:
         if not image_url:
@@ -453,22 +680,20 @@ def detect_logos_in_image(image_url: str) -> Dict:
                     "source": "url_analysis"
                 })
 
-        # Add generic detection note
-        if not detected_logos:
-            detected_logos.append({
-                "description": "Unknown/Generic Image",
-                "score": 0.5,
-                "confidence": 50.0,
-                "source": "default",
-                "note": "Full image analysis requires Cloud Vision or similar service"
-            })
+        if image is None and fetch and PIL_AVAILABLE:
+            image = fetch_image(image_url)
+        if image:
+            detected_logos = merge_logo_matches(detected_logos, match_logos(image), key="description")
 
-        return {
+        result = {
             "success": True,
             "logos": detected_logos,
             "count": len(detected_logos),
-            "method": "url_analysis"
+            "method": "logo_index" if any(l["source"] == "logo_index" for l in detected_logos) else "url_analysis"
         }
+        if not detected_logos:
+            result["note"] = "No known logos matched this image"
+        return result
     except Exception as e:
         return {
             "success": False,
@@ -476,60 +701,53 @@ def detect_logos_in_image(image_url: str) -> Dict:
         }
 
 
-def fetch_image(image_url: str) -> Optional[Image.Image]:
-    """Fetch image from URL and return PIL Image object"""
+def merge_logo_matches(logos: List[Dict], matches: List[Dict], key: str = "name") -> List[Dict]:
+    """Add logo-index matches to URL-derived logos, keeping the higher confidence per brand"""
+    by_name = {logo[key].lower(): logo for logo in logos}
+    for match in matches:
+        existing = by_name.get(match["name"].lower())
+        if existing is not None:
+            if match["confidence"] > existing["confidence"]:
+                existing.update(confidence=match["confidence"], box=match["box"], source="logo_index")
+                if "score" in existing:
+                    existing["score"] = round(match["confidence"] / 100, 3)
+            continue
+        logo = {key: match["name"], "confidence": match["confidence"], "box": match["box"], "source": "logo_index"}
+        if key == "description":
+            logo["score"] = round(match["confidence"] / 100, 3)
+        logos.append(logo)
+        by_name[match["name"].lower()] = logo
+    logos.sort(key=lambda logo: -logo["confidence"])
+    return logos
+
+
+def fetch_image(image_url: str) -> Optional["Image.Image"]:
+    """Fetch image from URL (pooled, size-capped, decoded at analysis size)"""
     if not PIL_AVAILABLE:
         return None
 
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(image_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        return Image.open(BytesIO(response.content))
-    except Exception as e:
+        return image_fetcher.fetch_image(image_url)
+    except image_fetcher.ImageFetchError as e:
         logger.error(f"Failed to fetch image: {e}")
         return None
 
 
-def analyze_image_colors(image: Image.Image) -> Dict:
+def analyze_image_colors(image: "Image.Image") -> Dict:
     """Analyze dominant colors in image (useful for brand detection)"""
     try:
-        # Resize for faster processing
-        img = image.copy()
-        img.thumbnail((150, 150))
-
-        # Convert to RGB if necessary
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        # Get color data
-        pixels = list(img.getdata())
-        color_counts = Counter(pixels)
-
-        # Get top 5 dominant colors
-        dominant_colors = []
-        for color, count in color_counts.most_common(5):
-            # Convert RGB to hex
-            hex_color = '#{:02x}{:02x}{:02x}'.format(*color)
-            percentage = round(count / len(pixels) * 100, 1)
-            dominant_colors.append({
-                "color": hex_color,
-                "rgb": list(color),
-                "percentage": percentage
-            })
-
-        return {"dominant_colors": dominant_colors}
+        # Vectorized histogram + CIELAB k-means, memoized per image
+        return {"dominant_colors": color_engine.extract_palette(image, max_colors=5)}
     except Exception as e:
         logger.error(f"Color analysis failed: {e}")
         return {"dominant_colors": []}
 
 
-def analyze_image_properties(image: Image.Image) -> Dict:
+def analyze_image_properties(image: "Image.Image") -> Dict:
     """Analyze image properties (size, format, aspect ratio)"""
     try:
-        width, height = image.size
+        # Images are decoded downscaled; report the source dimensions
+        width, height = image.info.get("original_size", image.size)
         aspect_ratio = round(width / height, 2) if height > 0 else 0
 
         return {
@@ -547,10 +765,11 @@ def analyze_image_properties(image: Image.Image) -> Dict:
         return {}
 
 
-def detect_brands_in_image(image_url: str) -> Dict:
+def detect_brands_in_image(image_url: str, image: Optional["Image.Image"] = None, fetch: bool = True) -> Dict:
     """
     Detect brands and objects in an image.
     Uses PIL for image analysis when available, falls back to URL analysis.
+    Pass an already decoded image (fetch=False) to skip the download.
 
     Inspired by LogoHunter approach but simplified for local use.
     """
@@ -585,7 +804,8 @@ def detect_brands_in_image(image_url: str) -> Dict:
 
         # Try to fetch and analyze the actual image
         if PIL_AVAILABLE:
-            image = fetch_image(image_url)
+            if image is None and fetch:
+                image = fetch_image(image_url)
             if image:
                 # Analyze image properties
                 result["image_properties"] = analyze_image_properties(image)
@@ -594,6 +814,13 @@ def detect_brands_in_image(image_url: str) -> Dict:
                 color_analysis = analyze_image_colors(image)
                 result["colors"] = color_analysis.get("dominant_colors", [])
 
+                # Match crops of the image against the reference logo index
+                matches = match_logos(image)
+                result["logos"] = merge_logo_matches(result["logos"], matches)
+                for match in matches:
+                    if not any(e["name"] == f"{match['name']} Brand" for e in result["web_entities"]):
+                        result["web_entities"].append({"name": f"{match['name']} Brand", "score": match["confidence"]})
+
                 # Add labels based on image analysis
                 props = result["image_properties"]
                 if props.get("is_banner"):
@@ -641,13 +868,15 @@ def detect_brands_in_image(image_url: str) -> Dict:
         }
 
 
-def analyze_image_content(image_url: str) -> Dict:
+def analyze_image_content(image_url: str, image: Optional["Image.Image"] = None, fetch: bool = True) -> Dict:
     """
     Comprehensive image analysis (simplified)
-    Combines logo and brand detection
+    Combines logo and brand detection over a single fetch and decode
     """
-    logos = detect_logos_in_image(image_url)
-    brands = detect_brands_in_image(image_url)
+    if image is None and fetch:
+        image = fetch_image(image_url)
+    logos = detect_logos_in_image(image_url, image, fetch=False)
+    brands = detect_brands_in_image(image_url, image, fetch=False)
 
     return {
         "success": True,
@@ -663,27 +892,52 @@ def analyze_image_content(image_url: str) -> Dict:
     }
 
 
+def analyze_images_batch(image_urls: List[str]) -> Dict:
+    """
+    Analyze many images: concurrent pooled downloads, one downscaled
+    decode per distinct URL, fanned out to every analyzer
+    """
+    start = time.perf_counter()
+
+    def analyze(url: str, image: Optional["Image.Image"], error: Optional[str]) -> Dict:
+        result = analyze_image_content(url, image, fetch=False)
+        result["url"] = url
+        if error:
+            result["fetch_error"] = error
+        return result
+
+    results = image_fetcher.map_images(image_urls, analyze)
+
+    brands = Counter()
+    for result in {r["url"]: r for r in results}.values():
+        brands.update({logo["name"] for logo in result["brands"].get("logos", [])})
+
+    return {
+        "success": True,
+        "results": results,
+        "summary": {
+            "images": len(results),
+            "failed": sum(1 for r in results if "fetch_error" in r),
+            "brands": [{"name": name, "images": count} for name, count in brands.most_common()]
+        },
+        "took_ms": round((time.perf_counter() - start) * 1000, 1)
+    }
+
+
 # ============= Text Analysis Utilities =============
 
 def extract_keywords_local(text: str, top_n: int = 20) -> List[Dict]:
-    """Extract keywords from text locally"""
+    """Extract keywords from text locally (memoized by text content)"""
     if not text:
         return []
 
-    # Clean text
-    text_clean = re.sub(r'[^\w\s]', ' ', text.lower())
-    words = text_clean.split()
-
-    # Remove common stop words
-    stop_words = {
-        "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
-        "of", "with", "by", "from", "as", "is", "was", "are", "were", "been",
-        "be", "have", "has", "had", "do", "does", "did", "will", "would",
-        "could", "should", "may", "might", "must", "shall", "can", "this",
-        "that", "these", "those", "i", "you", "he", "she", "it", "we", "they"
-    }
+    version = f"top{top_n}/{RESULT_FORMAT_VERSION}.{KEYWORD_ENGINE_VERSION}"
+    hit, cached = text_cache.get("keywords", text, version)
+    if hit:
+        return cached
 
-    filtered_words = [w for w in words if w not in stop_words and len(w) > 2]
+    # Shared tokenizer: lowercased words of 3+ letters, stop words removed
+    filtered_words = tokenize(text, min_length=3)
 
     # Count frequency
     word_counts = Counter(filtered_words)
@@ -697,14 +951,19 @@ def extract_keywords_local(text: str, top_n: int = 20) -> List[Dict]:
             "score": round(count / len(filtered_words), 4) if filtered_words else 0
         })
 
+    text_cache.set("keywords", text, keywords, version)
     return keywords
 
 
 def analyze_text_complexity(text: str) -> Dict:
-    """Analyze text complexity and readability"""
+    """Analyze text complexity and readability (memoized by text content)"""
     if not text:
         return {"success": False, "error": "No text provided"}
 
+    hit, cached = text_cache.get("complexity", text, RESULT_FORMAT_VERSION)
+    if hit:
+        return cached
+
     words = text.split()
     sentences = re.split(r'[.!?]+', text)
     sentences = [s.strip() for s in sentences if s.strip()]
@@ -722,7 +981,7 @@ def analyze_text_complexity(text: str) -> Dict:
     readability = 100 - (avg_word_length * 5) - (avg_sentence_length * 0.5)
     readability = max(0, min(100, readability))
 
-    return {
+    result = {
         "success": True,
         "metrics": {
             "word_count": word_count,
@@ -733,6 +992,8 @@ def analyze_text_complexity(text: str) -> Dict:
         },
         "readability_level": get_readability_level(readability)
     }
+    text_cache.set("complexity", text, result, RESULT_FORMAT_VERSION)
+    return result
 
 
 def get_readability_level(score: float) -> str:
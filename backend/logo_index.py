@@ -0,0 +1,354 @@
+"""
+Perceptual-hash logo index for local brand detection
+
+Reference logos (LOGO_REFERENCE_DIR) are hashed once with a 64-bit DCT
+pHash and a 64-bit dHash and stored in a multi-index hash table keyed by
+pHash, so finding every logo within LOGO_MAX_DISTANCE bits probes a few
+hundred buckets instead of comparing against every logo.
+
+An image is matched by hashing multi-scale crops (the whole image plus
+overlapping square windows from 3/4 down to 1/3 of its short side), each
+cropped to its artwork with the background painted out. Candidates are
+ranked by the mean of pHash and dHash distance and, when OpenCV is
+installed and LOGO_USE_ORB=true, re-ranked with ORB descriptor matches.
+
+Reference layout: one file per logo (``nike.png``) or one directory per
+brand holding several variants (``coca_cola/red.png``). Hashes are cached
+in ``.logo_hashes.json`` next to the logos, keyed by file size and mtime.
+"""
+
+import json
+import logging
+import os
+from itertools import combinations
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("ai-grinners.logo_index")
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Optional: ORB descriptors for re-ranking
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+LOGO_MAX_DISTANCE = int(os.getenv("LOGO_MAX_DISTANCE", "10"))
+LOGO_USE_ORB = os.getenv("LOGO_USE_ORB", "true").lower() == "true" and OPENCV_AVAILABLE
+CROP_SCALES = (0.75, 0.6, 0.45, 1 / 3)
+MAX_CROPS = 256
+# Images are downscaled to this before cropping
+MATCH_SIZE = 512
+# Crops flatter than this (grey-level std) carry no logo signal
+MIN_CROP_CONTRAST = 8.0
+# Grey levels within this of the median border level count as background
+TRIM_TOLERANCE = 24
+ORB_FEATURES = 250
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp")
+HASH_CACHE_FILE = ".logo_hashes.json"
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    return np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def flatten(image) -> "Image.Image":
+    """RGB copy with any transparency composited onto white"""
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        return Image.alpha_composite(background, rgba).convert("RGB")
+    return image.convert("RGB")
+
+
+def isolate(gray) -> Tuple["Image.Image", Tuple[int, int, int, int]]:
+    """
+    Crop a greyscale image to the artwork that stands out from its
+    background (the median border level) and paint the remaining
+    background white, so a logo hashes the same on any backdrop. Returns
+    the isolated image and its box within gray.
+    """
+    pixels = np.asarray(gray, dtype=np.float64)
+    border = np.concatenate([pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]])
+    mask = np.abs(pixels - np.median(border)) > TRIM_TOLERANCE
+    rows, cols = np.flatnonzero(mask.any(axis=1)), np.flatnonzero(mask.any(axis=0))
+    if not len(rows):
+        return gray, (0, 0) + gray.size
+    top, bottom, left, right = int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1
+    artwork = np.where(mask, pixels, 255.0)[top:bottom, left:right]
+    return Image.fromarray(artwork.astype(np.uint8), "L"), (left, top, right, bottom)
+
+
+def phash(gray) -> int:
+    """64-bit DCT perceptual hash of a greyscale PIL image"""
+    pixels = np.asarray(gray.resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT32 @ pixels @ _DCT32.T)[:8, :8]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def dhash(gray) -> int:
+    """64-bit gradient hash of a greyscale PIL image"""
+    pixels = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def orb_descriptors(gray):
+    if not LOGO_USE_ORB:
+        return None
+    _, descriptors = cv2.ORB_create(nfeatures=ORB_FEATURES).detectAndCompute(np.asarray(gray), None)
+    return descriptors
+
+
+def orb_similarity(a, b) -> float:
+    """Share of ORB descriptors passing Lowe's ratio test (0-1)"""
+    if a is None or b is None or len(a) < 2 or len(b) < 2:
+        return 0.0
+    pairs = cv2.BFMatcher(cv2.NORM_HAMMING).knnMatch(a, b, k=2)
+    good = sum(1 for p in pairs if len(p) == 2 and p[0].distance < 0.75 * p[1].distance)
+    return good / min(len(a), len(b))
+
+
+def brand_name(stem: str) -> str:
+    return stem.replace("_", " ").replace("-", " ").strip().title()
+
+
+class MultiIndexHash:
+    """
+    Multi-index hash table over 64-bit hashes (Norouzi et al.): each hash
+    is split into CHUNKS 16-bit substrings, each with its own table. Any
+    hash within radius bits of a query matches it within radius // CHUNKS
+    bits on at least one substring, so a lookup probes those few buckets
+    instead of scanning every stored hash.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self, radius: int = LOGO_MAX_DISTANCE):
+        self.radius = radius
+        self.size = 0
+        self._tables: List[Dict[int, List[Tuple[int, object]]]] = [{} for _ in range(self.CHUNKS)]
+        chunk_radius = radius // self.CHUNKS
+        self._masks = [
+            sum(1 << bit for bit in bits)
+            for r in range(chunk_radius + 1)
+            for bits in combinations(range(self.CHUNK_BITS), r)
+        ]
+
+    def _chunks(self, key: int) -> Iterator[int]:
+        mask = (1 << self.CHUNK_BITS) - 1
+        for i in range(self.CHUNKS):
+            yield (key >> (i * self.CHUNK_BITS)) & mask
+
+    def add(self, key: int, item):
+        self.size += 1
+        for table, chunk in zip(self._tables, self._chunks(key)):
+            table.setdefault(chunk, []).append((key, item))
+
+    def search(self, key: int, radius: int = None) -> List[Tuple[int, object]]:
+        """(distance, item) for every item within radius bits of key"""
+        radius = self.radius if radius is None else min(radius, self.radius)
+        found, seen = [], set()
+        for table, chunk in zip(self._tables, self._chunks(key)):
+            for mask in self._masks:
+                for stored, item in table.get(chunk ^ mask, ()):
+                    if id(item) in seen:
+                        continue
+                    seen.add(id(item))
+                    distance = hamming(key, stored)
+                    if distance <= radius:
+                        found.append((distance, item))
+        return found
+
+    def __len__(self):
+        return self.size
+
+
+class LogoEntry:
+    """Hashes of one reference logo image"""
+    __slots__ = ("name", "source", "phash", "dhash", "descriptors")
+
+    def __init__(self, name: str, source: str, phash: int, dhash: int, descriptors=None):
+        self.name = name
+        self.source = source
+        self.phash = phash
+        self.dhash = dhash
+        self.descriptors = descriptors
+
+
+def candidate_crops(size: Tuple[int, int], scales=CROP_SCALES, max_crops: int = MAX_CROPS) -> Iterator[Tuple[int, int, int, int]]:
+    """Whole image, then square windows (a share of the short side) overlapping by 3/4"""
+    width, height = size
+    yield (0, 0, width, height)
+    emitted = 1
+    for scale in scales:
+        side = int(min(width, height) * scale)
+        if side < 16:
+            continue
+        step = max(1, side // 4)
+        for top in range(0, height - side + 1, step):
+            for left in range(0, width - side + 1, step):
+                if emitted >= max_crops:
+                    return
+                yield (left, top, left + side, top + side)
+                emitted += 1
+
+
+class LogoIndex:
+    """Reference logos in a pHash multi-index hash table"""
+
+    def __init__(self, max_distance: int = LOGO_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.table = MultiIndexHash(max_distance)
+        self.brands = set()
+        self.logos = 0
+
+    def __len__(self):
+        return self.logos
+
+    def add(self, name: str, image, source: str = "") -> List[LogoEntry]:
+        """
+        Index a reference logo. Both the logo trimmed to its artwork and the
+        full canvas are hashed, since ads show either (a transparent mark on
+        the ad's background, or the logo on its own backdrop)
+        """
+        gray = flatten(image).convert("L")
+        entries = []
+        for variant in (isolate(gray)[0], gray):
+            entry = LogoEntry(name, source, phash(variant), dhash(variant), orb_descriptors(variant))
+            if entries and entry.phash == entries[0].phash:
+                break
+            self._insert(entry)
+            entries.append(entry)
+        self.logos += 1
+        return entries
+
+    def _insert(self, entry: LogoEntry):
+        self.table.add(entry.phash, entry)
+        self.brands.add(entry.name)
+
+    def load_directory(self, path: str) -> int:
+        """Index every logo under path, reusing cached hashes; returns logos added"""
+        cache_path = os.path.join(path, HASH_CACHE_FILE)
+        try:
+            with open(cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+        fresh, added = {}, 0
+        for root, _, files in os.walk(path):
+            for filename in sorted(files):
+                if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                full = os.path.join(root, filename)
+                rel = os.path.relpath(full, path)
+                parent = os.path.dirname(rel)
+                name = brand_name(parent.split(os.sep)[0] if parent else os.path.splitext(filename)[0])
+                stat = os.stat(full)
+                cached = cache.get(rel)
+                try:
+                    # ORB descriptors aren't cached, so ORB mode always decodes
+                    if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime and not LOGO_USE_ORB:
+                        entries = [LogoEntry(name, rel, int(p, 16), int(d, 16)) for p, d in cached["hashes"]]
+                        for entry in entries:
+                            self._insert(entry)
+                        self.logos += 1
+                    else:
+                        with Image.open(full) as image:
+                            entries = self.add(name, image, rel)
+                except Exception as e:
+                    logger.warning(f"Skipping logo {rel}: {e}")
+                    continue
+                fresh[rel] = {"size": stat.st_size, "mtime": stat.st_mtime,
+                              "hashes": [[f"{e.phash:016x}", f"{e.dhash:016x}"] for e in entries]}
+                added += 1
+
+        if fresh != cache:
+            try:
+                with open(cache_path, "w") as f:
+                    json.dump(fresh, f)
+            except OSError as e:
+                logger.debug(f"Could not write logo hash cache: {e}")
+        return added
+
+    def match(self, image, max_results: int = 5) -> List[Dict]:
+        """Best match per brand across multi-scale crops of image, most confident first"""
+        if not len(self):
+            return []
+        gray = flatten(image)
+        gray.thumbnail((MATCH_SIZE, MATCH_SIZE))
+        gray = gray.convert("L")
+        scale = image.size[0] / gray.size[0]
+
+        best: Dict[str, Dict] = {}
+        for window in candidate_crops(gray.size):
+            crop = gray.crop(window)
+            if np.asarray(crop, dtype=np.float32).std() < MIN_CROP_CONTRAST:
+                continue
+            crop, (left, top, right, bottom) = isolate(crop)
+            crop_phash, crop_dhash = phash(crop), dhash(crop)
+            for phash_distance, entry in self.table.search(crop_phash, self.max_distance):
+                distance = (phash_distance + hamming(crop_dhash, entry.dhash)) / 2
+                if distance > self.max_distance:
+                    continue
+                current = best.get(entry.name)
+                if current is None or distance < current["distance"]:
+                    box = (window[0] + left, window[1] + top, window[0] + right, window[1] + bottom)
+                    best[entry.name] = {
+                        "name": entry.name,
+                        "distance": distance,
+                        "box": [round(v * scale) for v in box],
+                        "entry": entry,
+                        "crop": crop
+                    }
+
+        matches = []
+        for hit in best.values():
+            entry, crop = hit.pop("entry"), hit.pop("crop")
+            confidence = 100 * (1 - hit["distance"] / 64)
+            method = "phash"
+            if entry.descriptors is not None:
+                similarity = orb_similarity(orb_descriptors(crop), entry.descriptors)
+                if similarity > 0:
+                    confidence = max(confidence, 100 * min(1.0, 0.5 + similarity))
+                    method = "phash+orb"
+            hit.update(confidence=round(confidence, 1), method=method, reference=entry.source)
+            matches.append(hit)
+
+        matches.sort(key=lambda m: (-m["confidence"], m["name"]))
+        return matches[:max_results]
+
+    def stats(self) -> Dict:
+        return {"logos": self.logos, "hashes": len(self.table), "brands": len(self.brands),
+                "max_distance": self.max_distance, "orb": LOGO_USE_ORB}
+
+
+def load_logo_index(path: str) -> LogoIndex:
+    """LogoIndex over a reference directory (empty if it doesn't exist)"""
+    index = LogoIndex()
+    if not path or not os.path.isdir(path):
+        logger.warning(f"Logo reference directory not found: {path}")
+        return index
+    count = index.load_directory(path)
+    logger.info(f"Indexed {count} reference logos ({len(index.brands)} brands) from {path}")
+    return index
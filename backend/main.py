@@ -1,32 +1,50 @@
 from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, func, case
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 import os
+import hmac
 import logging
 import time
 from functools import wraps
-from collections import defaultdict
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-import json
 import requests
 import asyncio
 
-from models import Base, engine, SessionLocal, User, ActivityLog, AnalysisReport
-from credentials import DEFAULT_ADMIN, get_password_hash, verify_password
-from scraper import crawl_site, find_social_accounts
+from models import Base, engine, SessionLocal, User, ActivityLog, AnalysisReport, AnalysisTrace, ReportDailyRollup
+from credentials import DEFAULT_ADMIN, get_password_hash, needs_rehash, password_pool, PasswordHashingBusy
+from rate_limiter import create_rate_limiter
+from user_cache import Principal, user_cache
+from quota import QuotaReservation, QuotaExceeded
+from rollups import ensure_rollups, record_report
+from model_registry import model_registry
+from text_cache import text_cache
+from scraper import crawl_site, find_social_accounts, extract_site_keywords, page_keyword_text, crawl_page_texts
+from search_index import search_index
+from metrics import metrics, MetricsMiddleware, instrument_engine, record_cache, uptime_seconds
+from tracing import annotate, span, start_trace, traced
+from profiler import MODES as PROFILE_MODES, PROFILE_MAX_SECONDS, ProfileMiddleware, ProfilerBusy, finish_profile, profile_store, start_profile
+from lazy_imports import lazy_import, warm_up
+from serialization import FastJSONResponse, RawJSONResponse, dumps, embed
+from http_cache import CachedBody, CompressionMiddleware, cached_response
+
+# NumPy-backed; loads with the first keyword-gap analysis (or the startup warm-up)
+tfidf_index = lazy_import("tfidf_index")
 
 # Local AI services (NO Google Cloud required!)
 from ai_local import LocalAnalyzer, analyze_with_local_ai
 from local_services import (
     analyze_sentiment as local_sentiment,
+    analyze_sentiment_batch as local_sentiment_batch,
     detect_brands_in_image as local_detect_brands,
     analyze_image_content,
+    analyze_images_batch,
     save_analytics,
     query_analytics as local_query_analytics
 )
@@ -42,39 +60,18 @@ logging.basicConfig(
 logger = logging.getLogger("ai-grinners")
 
 # ==================== RATE LIMITING ====================
-class RateLimiter:
-    """Simple in-memory rate limiter"""
-    def __init__(self):
-        self.requests: Dict[str, List[float]] = defaultdict(list)
-        self.limits = {
-            "default": (60, 60),      # 60 requests per 60 seconds
-            "analyze": (10, 60),       # 10 analysis requests per minute
-            "login": (5, 60),          # 5 login attempts per minute
-        }
-
-    def is_allowed(self, key: str, limit_type: str = "default") -> bool:
-        """Check if request is allowed"""
-        now = time.time()
-        max_requests, window = self.limits.get(limit_type, self.limits["default"])
-
-        # Clean old requests
-        self.requests[key] = [t for t in self.requests[key] if now - t < window]
+rate_limiter = create_rate_limiter()
 
-        if len(self.requests[key]) >= max_requests:
-            return False
-
-        self.requests[key].append(now)
-        return True
-
-    def get_retry_after(self, key: str, limit_type: str = "default") -> int:
-        """Get seconds until rate limit resets"""
-        if not self.requests[key]:
-            return 0
-        max_requests, window = self.limits.get(limit_type, self.limits["default"])
-        oldest = min(self.requests[key])
-        return int(window - (time.time() - oldest))
-
-rate_limiter = RateLimiter()
+def enforce_rate_limit(key: str, limit_type: str, detail: str):
+    """Consume one request for key or raise 429 with Retry-After"""
+    allowed, retry_after = rate_limiter.check(key, limit_type)
+    if not allowed:
+        logger.warning(f"Rate limit exceeded for {key}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{detail}. Try again in {retry_after} seconds",
+            headers={"Retry-After": str(retry_after)}
+        )
 
 # ==================== CACHING ====================
 class SimpleCache:
@@ -88,9 +85,11 @@ class SimpleCache:
             value, expiry = self.cache[key]
             if time.time() < expiry:
                 logger.debug(f"Cache HIT: {key}")
+                record_cache("analysis", True)
                 return value
             else:
                 del self.cache[key]
+        record_cache("analysis", False)
         return None
 
     def set(self, key: str, value: Any, ttl: int = 300):
@@ -115,7 +114,8 @@ analysis_cache = SimpleCache()
 app = FastAPI(
     title="AI Grinners API",
     description="Marketing Intelligence & Competitive Analysis Platform (100% Local - No Google Cloud Required!)",
-    version="4.0.0"
+    version="4.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS - Configure allowed origins from environment
@@ -132,6 +132,9 @@ app.add_middleware(
     allow_headers=["*"],  # غيرت من Authorization, Content-Type لـ *
     expose_headers=["*"]  # ضفت السطر ده
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
 
 # Security - SECRET_KEY Management
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -160,6 +163,49 @@ def get_db():
     finally:
         db.close()
 
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Resolve the caller from the bearer token, hitting the DB only on cache miss"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    except JWTError:
+        raise HTTPException(401, "Invalid token")
+
+    email = payload.get("sub")
+    if not email:
+        raise HTTPException(401, "Invalid token")
+
+    principal = user_cache.get(email)
+    if principal is None:
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.email == email).first()
+            if not user:
+                raise HTTPException(401, "User not found")
+            principal = user_cache.set(Principal.from_user(user))
+        finally:
+            db.close()
+
+    if not principal.is_active:
+        raise HTTPException(403, "Account is deactivated")
+    return principal
+
+def get_current_admin(user: Principal = Depends(get_current_user)) -> Principal:
+    if not user.is_admin:
+        raise HTTPException(403, "Admin access required")
+    return user
+
+def is_admin_request(headers: Dict[str, str]) -> bool:
+    """Bearer token of an active admin (ProfileMiddleware's X-Profile check)"""
+    auth = headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return False
+    try:
+        return get_current_user(auth[7:]).is_admin
+    except HTTPException:
+        return False
+
+app.add_middleware(ProfileMiddleware, authorize=is_admin_request)
+
 def get_client_ip(request: Request) -> str:
     forwarded = request.headers.get("X-Forwarded-For")
     if forwarded:
@@ -194,6 +240,7 @@ async def startup():
     print("🚀 Starting AI Grinners API v4.0.0 (100% Local - No Google Cloud!)")
     print("=" * 60)
     Base.metadata.create_all(bind=engine)
+    metrics.start_flusher()
     db = SessionLocal()
     existing_admin = db.query(User).filter(User.email == DEFAULT_ADMIN["email"]).first()
     if not existing_admin:
@@ -209,7 +256,17 @@ async def startup():
     else:
         print(f"✅ Admin exists: {DEFAULT_ADMIN['email']}")
     db.close()
+    # Deployments that predate the rollup tables start with them empty
+    ensure_rollups()
     print("✅ Database initialized")
+
+    # Warm NLP models and the logo index so the first requests don't pay the load
+    preload = [m.strip() for m in os.getenv("NLP_PRELOAD_MODELS", "sentiment,emotion,logos").split(",")]
+    background = os.getenv("NLP_PRELOAD_BACKGROUND", "true").lower() == "true"
+    model_registry.preload([m for m in preload if model_registry.is_registered(m)], background=background)
+    # Heavy libraries are imported lazily; pull them in now, off the request path
+    if os.getenv("WARM_IMPORTS", "true").lower() == "true":
+        warm_up(background=background, after=lambda: model_registry.ready)
     print("✅ Local AI services loaded (no external APIs required)")
     print("=" * 60)
 
@@ -235,248 +292,351 @@ def health_check():
         db_status = f"unhealthy: {str(e)}"
         logger.error(f"Database health check failed: {e}")
 
-    return {
-        "status": "healthy" if db_status == "healthy" else "degraded",
+    models = model_registry.stats()
+    if not models["ready"]:
+        overall = "starting"
+    else:
+        overall = "healthy" if db_status == "healthy" else "degraded"
+
+    body = {
+        "status": overall,
         "timestamp": datetime.utcnow().isoformat(),
         "database": db_status,
+        "models": models,
         "cache_size": len(analysis_cache.cache),
         "version": "4.0.0",
         "mode": "local"
     }
+    # Not ready until preloaded models are warm, so load balancers hold traffic
+    if overall == "starting":
+        return JSONResponse(status_code=503, content=body)
+    return body
 
 @app.get("/api/stats")
 def api_stats():
     """API statistics"""
     return {
         "cache_entries": len(analysis_cache.cache),
-        "uptime": "running",
+        "text_cache": text_cache.stats(),
+        "search_index": search_index.stats(),
+        "uptime": str(timedelta(seconds=int(uptime_seconds()))),
+        "uptime_seconds": uptime_seconds(),
         "version": "4.0.0",
         "google_cloud": False,
         "mode": "100% Local"
     }
 
+# Bearer token the Prometheus scraper must send; /metrics is disabled while unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@app.get("/metrics")
+def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint (merged across workers when METRICS_DIR is set)"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def password_pool_busy() -> HTTPException:
+    logger.warning("Password pool saturated, shedding request")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+def hash_or_503(fn, *args):
+    """Run password work on the bounded pool, shedding load with 503 when it is full"""
+    try:
+        return fn(*args)
+    except PasswordHashingBusy:
+        raise password_pool_busy()
+
+def record_login(db: Session, user: User, new_hash: Optional[str], ip: str):
+    if new_hash:
+        user.hashed_password = new_hash
+    user.last_login = datetime.utcnow()
+    user.last_ip = ip
+    user.last_geo = get_geo_location(ip)
+    db.commit()
+    log_activity(db, user.id, user.email, "Login", "User logged in", ip)
+
 @app.post("/api/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), request: Request = None, db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), request: Request = None, db: Session = Depends(get_db)):
+    # Async so a login waiting on bcrypt holds no threadpool thread: a storm fills the
+    # password pool's queue and is shed with 503 instead of starving sync endpoints.
+    # DB and geo lookups still run in the threadpool.
     ip = get_client_ip(request)
 
-    # Rate limiting for login attempts
-    if not rate_limiter.is_allowed(f"login:{ip}", "login"):
-        retry_after = rate_limiter.get_retry_after(f"login:{ip}", "login")
-        logger.warning(f"Rate limit exceeded for login from IP: {ip}")
+    # Rate limiting for login attempts per IP. The per-account bucket only takes
+    # failed attempts and is refilled by a successful login, so a stream of
+    # requests naming an account can't lock its owner out the way counting
+    # every attempt would.
+    enforce_rate_limit(f"login:{ip}", "login", "Too many login attempts")
+    account_key = f"login:user:{form_data.username.lower()}"
+    retry_after = rate_limiter.get_retry_after(account_key, "login")
+    if retry_after:
+        logger.warning(f"Rate limit exceeded for {account_key}")
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Too many login attempts. Try again in {retry_after} seconds",
+            detail=f"Too many failed login attempts. Try again in {retry_after} seconds",
             headers={"Retry-After": str(retry_after)}
         )
 
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == form_data.username).first())
+    try:
+        valid = user is not None and await password_pool.verify_async(form_data.password, user.hashed_password)
+    except PasswordHashingBusy:
+        raise password_pool_busy()
+    if not valid:
+        rate_limiter.check(account_key, "login")
         logger.info(f"Failed login attempt for: {form_data.username} from IP: {ip}")
         raise HTTPException(401, "Invalid credentials")
+    rate_limiter.reset(account_key)
 
     if not user.is_active:
         logger.warning(f"Inactive user attempted login: {user.email}")
         raise HTTPException(403, "Account is deactivated")
 
-    user.last_login = datetime.utcnow()
-    user.last_ip = ip
-    user.last_geo = get_geo_location(ip)
-    db.commit()
+    # Upgrade hashes made with an old cost factor while we have the plaintext
+    new_hash = None
+    if needs_rehash(user.hashed_password):
+        try:
+            new_hash = await password_pool.hash_async(form_data.password)
+        except PasswordHashingBusy:
+            pass
 
-    log_activity(db, user.id, user.email, "Login", "User logged in", ip)
-    logger.info(f"Successful login: {user.email} from {ip}")
+    email = user.email
+    await run_in_threadpool(record_login, db, user, new_hash, ip)
+    logger.info(f"Successful login: {email} from {ip}")
 
     token = jwt.encode(
-        {"sub": user.email, "exp": datetime.utcnow() + timedelta(days=7)},
+        {"sub": email, "exp": datetime.utcnow() + timedelta(days=7)},
         SECRET_KEY,
         algorithm="HS256"
     )
     return {"access_token": token, "token_type": "bearer"}
 
 @app.get("/api/user")
-def get_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        email = payload.get("sub")
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            raise HTTPException(401)
-        return {
-            "email": user.email,
-            "id": user.id,
-            "quota": user.quota,
-            "is_admin": user.role == "admin"
-        }
-    except JWTError:
-        raise HTTPException(401, "Invalid token")
+def get_user(user: Principal = Depends(get_current_user)):
+    return {
+        "email": user.email,
+        "id": user.id,
+        "quota": user.quota,
+        "is_admin": user.is_admin
+    }
 
 @app.get("/api/me")
-async def get_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        email = payload.get("sub")
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            raise HTTPException(401, "User not found")
-        return {
-            "email": user.email,
-            "id": user.id,
-            "quota": user.quota,
-            "is_admin": user.role == "admin"
-        }
-    except JWTError:
-        raise HTTPException(401, "Invalid token")
+async def get_me(user: Principal = Depends(get_current_user)):
+    return {
+        "email": user.email,
+        "id": user.id,
+        "quota": user.quota,
+        "is_admin": user.is_admin
+    }
+
+def crawl_and_index(domain: str, max_pages: int, workspace: int) -> Dict:
+    """crawl_site() that streams each fetched page into the workspace's search index"""
+    with search_index.sink(workspace, domain) as sink:
+        return crawl_site(domain, max_pages, page_sink=sink)
+
+# Keep each analysis's span timeline next to its report
+STORE_ANALYSIS_TRACES = os.getenv("STORE_ANALYSIS_TRACES", "true").lower() == "true"
 
 class AnalyzeRequest(BaseModel):
     domain: str
     competitors: List[str] = []
     max_pages: int = 50  # Default to 50 pages
+    trace: bool = False  # Attach the span timeline to the response
+
+def save_trace(report_id: int, timeline: Dict):
+    """Store a trace timeline for a report; tracing never fails the analysis"""
+    db = SessionLocal()
+    try:
+        db.add(AnalysisTrace(
+            report_id=report_id,
+            trace_id=timeline["trace_id"],
+            total_ms=timeline["total_ms"],
+            timeline=dumps(timeline).decode()
+        ))
+        db.commit()
+    except Exception as e:
+        logger.warning(f"Could not store trace for report {report_id}: {e}")
+    finally:
+        db.close()
 
 @app.post("/api/analyze")
-async def deep_analysis(request: AnalyzeRequest, req: Request = None, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def deep_analysis(request: AnalyzeRequest, req: Request = None, user: Principal = Depends(get_current_user)):
     ip = get_client_ip(req)
 
     # Rate limiting for analysis requests
-    if not rate_limiter.is_allowed(f"analyze:{ip}", "analyze"):
-        retry_after = rate_limiter.get_retry_after(f"analyze:{ip}", "analyze")
-        logger.warning(f"Rate limit exceeded for analysis from IP: {ip}")
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Too many analysis requests. Try again in {retry_after} seconds",
-            headers={"Retry-After": str(retry_after)}
-        )
+    enforce_rate_limit(f"analyze:{ip}", "analyze", "Too many analysis requests")
+    enforce_rate_limit(f"analyze:user:{user.id}", "analyze", "Too many analysis requests")
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        user = db.query(User).filter(User.email == payload.get("sub")).first()
-
-        if not user:
-            raise HTTPException(401, "User not found")
-
-        # Check user quota
-        if user.quota <= 0:
-            logger.warning(f"User {user.email} exceeded quota")
-            raise HTTPException(403, "Analysis quota exceeded. Please upgrade your plan.")
-
-        # Check cache first
-        cache_key = f"analysis:{request.domain}:{request.max_pages}"
-        cached_result = analysis_cache.get(cache_key)
-
-        if cached_result:
-            logger.info(f"Cache hit for {request.domain}")
-            return {
-                "success": True,
-                "job_id": "cached",
-                "status": "completed",
-                "data": cached_result,
-                "cached": True
-            }
-
-        logger.info(f"Starting deep analysis for {request.domain} (max_pages: {request.max_pages})")
-
-        # Crawl with enhanced settings (50 pages default)
-        your_data = crawl_site(request.domain, min(request.max_pages, 50))
-
-        competitors_data = {}
-        for comp in request.competitors[:5]:  # Limit to 5 competitors
-            logger.info(f"Analyzing competitor: {comp}")
-            competitors_data[comp] = crawl_site(comp, 15)
-
-        # Generate keyword gaps based on actual data
-        keyword_gaps = generate_keyword_gaps(your_data, competitors_data)
-
-        result = {
-            "your_site": your_data,
-            "competitors": competitors_data,
-            "content_gaps": {"keyword_gaps": keyword_gaps},
-            "analyzed_at": datetime.utcnow().isoformat()
-        }
-
-        # Cache the result for 10 minutes
-        analysis_cache.set(cache_key, result, ttl=600)
-
-        # Decrease user quota
-        user.quota -= 1
-        db.commit()
-
-        report = AnalysisReport(
-            user_id=user.id,
-            report_type="deep_analysis",
-            domain=request.domain,
-            competitors=",".join(request.competitors),
-            results=json.dumps(result)
-        )
-        db.add(report)
-        log_activity(db, user.id, user.email, "Deep Analysis", f"Analyzed {request.domain} ({your_data.get('total_pages', 0)} pages)", ip)
-        db.commit()
-
-        logger.info(f"Analysis completed for {request.domain}: {your_data.get('total_pages', 0)} pages crawled")
+        # Reserve quota atomically; it is refunded on cache hit or failure
+        with QuotaReservation(user.id) as reservation:
+            # Check cache first
+            cache_key = f"analysis:{request.domain}:{request.max_pages}"
+            cached_result = analysis_cache.get(cache_key)
+
+            if cached_result:
+                logger.info(f"Cache hit for {request.domain}")
+                # Cached as the encoded response with its compressed variants: no re-encoding or re-compressing
+                return cached_response(req.headers, cached_result, method=req.method)
+
+            logger.info(f"Starting deep analysis for {request.domain} (max_pages: {request.max_pages})")
+
+            with start_trace("deep_analysis", domain=request.domain, max_pages=request.max_pages) as trace:
+                # Crawl with enhanced settings (50 pages default)
+                your_data = crawl_and_index(request.domain, min(request.max_pages, 50), user.id)
+
+                competitors_data = {}
+                with span("competitors", count=len(request.competitors[:5])):
+                    for comp in request.competitors[:5]:  # Limit to 5 competitors
+                        logger.info(f"Analyzing competitor: {comp}")
+                        competitors_data[comp] = crawl_and_index(comp, 15, user.id)
+
+                # Generate keyword gaps based on actual data
+                keyword_gaps = generate_keyword_gaps(your_data, competitors_data)
+
+                result = {
+                    "your_site": your_data,
+                    "competitors": competitors_data,
+                    "content_gaps": {"keyword_gaps": keyword_gaps},
+                    "analyzed_at": datetime.utcnow().isoformat()
+                }
 
-        return {
+                # Encoded once: the same bytes go to the DB row, the cache and the response
+                with span("serialize") as serialize:
+                    results_json = dumps(result)
+                    serialize.set(bytes=len(results_json))
+
+                # Short-lived session for the writes only; none is held during the crawl
+                with span("db.write"):
+                    db = SessionLocal()
+                    try:
+                        report = AnalysisReport(
+                            user_id=user.id,
+                            report_type="deep_analysis",
+                            domain=request.domain,
+                            competitors=",".join(request.competitors),
+                            results=results_json.decode()
+                        )
+                        db.add(report)
+                        record_report(db, report.report_type, user.id)
+                        log_activity(db, user.id, user.email, "Deep Analysis", f"Analyzed {request.domain} ({your_data.get('total_pages', 0)} pages)", ip)
+                        db.commit()
+                        report_id = report.id
+                    finally:
+                        db.close()
+
+            # Cache the result for 10 minutes. The entry is shared by every user who
+            # analyzes this domain, so nothing user-specific (like report_id) goes in it
+            cached_result = CachedBody(embed(
+                {"success": True, "job_id": "cached", "status": "completed", "cached": True},
+                data=results_json
+            ))
+            analysis_cache.set(cache_key, cached_result, ttl=600)
+
+            timeline = trace.timeline()
+            if STORE_ANALYSIS_TRACES:
+                save_trace(report_id, timeline)
+
+            reservation.commit()
+
+        logger.info(f"Analysis completed for {request.domain}: {your_data.get('total_pages', 0)} pages crawled in {timeline['total_ms']} ms")
+
+        response = {
             "success": True,
-            "job_id": f"job_{report.id}",
+            "job_id": f"job_{report_id}",
             "status": "completed",
-            "data": result,
-            "remaining_quota": user.quota
+            "remaining_quota": reservation.remaining
         }
+        if request.trace:
+            response["trace"] = timeline
+        return RawJSONResponse(embed(response, data=results_json))
+    except QuotaExceeded:
+        logger.warning(f"User {user.email} exceeded quota")
+        raise HTTPException(403, "Analysis quota exceeded. Please upgrade your plan.")
     except HTTPException:
         raise
-    except JWTError:
-        logger.error("Invalid JWT token")
-        raise HTTPException(401, "Invalid token")
     except Exception as e:
         logger.error(f"Analysis error for {request.domain}: {str(e)}")
         return {"success": False, "error": str(e)}
 
 
+@app.get("/api/reports/{report_id}")
+def get_report(report_id: int, req: Request, user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Stored analysis results (owner or admin), with an ETag so unchanged reports revalidate as 304"""
+    owner = db.query(AnalysisReport.user_id).filter(AnalysisReport.id == report_id).first()
+    if not owner or (owner.user_id != user.id and not user.is_admin):
+        raise HTTPException(404, "Report not found")
+    cache_key = f"report:{report_id}"
+    body = analysis_cache.get(cache_key)
+    if body is None:
+        report = db.query(AnalysisReport).filter(AnalysisReport.id == report_id).first()
+        body = CachedBody(embed({
+            "report_id": report.id,
+            "report_type": report.report_type,
+            "domain": report.domain,
+            "created_at": report.created_at.isoformat() if report.created_at else None
+        }, data=(report.results or "null").encode()))
+        # Reports never change once written
+        analysis_cache.set(cache_key, body, ttl=600)
+    return cached_response(req.headers, body, method=req.method)
+
+
+@app.get("/api/reports/{report_id}/trace")
+def get_report_trace(report_id: int, user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Span timeline recorded while the report was produced (owner or admin)"""
+    report = db.query(AnalysisReport).filter(AnalysisReport.id == report_id).first()
+    if not report or (report.user_id != user.id and not user.is_admin):
+        raise HTTPException(404, "Report not found")
+    stored = db.query(AnalysisTrace).filter(AnalysisTrace.report_id == report_id).order_by(AnalysisTrace.id.desc()).first()
+    if not stored:
+        raise HTTPException(404, "No trace recorded for this report")
+    return RawJSONResponse(embed({"report_id": report_id}, trace=stored.timeline.encode()))
+
+
+@traced("keyword_gaps")
 def generate_keyword_gaps(your_data: Dict, competitors_data: Dict) -> List[Dict]:
-    """Generate keyword gaps based on actual crawled data"""
-    gaps = []
-
-    # Extract keywords from competitor data that are missing in your data
-    your_keywords = set()
-    if your_data.get('pages'):
-        for page in your_data['pages']:
-            if 'analysis' in page:
-                # Extract from titles and headings
-                title = page['analysis'].get('title', {}).get('text', '')
-                your_keywords.update(title.lower().split())
-                for h1 in page['analysis'].get('headers', {}).get('h1_texts', []):
-                    your_keywords.update(h1.lower().split())
-
-    comp_keywords = set()
+    """Rank competitor terms you lack by BM25 weight over all crawled pages"""
+    if not competitors_data:
+        return []
+
+    sites = {tfidf_index.SELF: crawl_page_texts(your_data)}
     for comp, data in competitors_data.items():
-        if data.get('pages'):
-            for page in data['pages']:
-                if 'analysis' in page:
-                    title = page['analysis'].get('title', {}).get('text', '')
-                    comp_keywords.update(title.lower().split())
-
-    # Find keywords competitors have but you don't
-    missing = comp_keywords - your_keywords
-    common_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'is', 'are', '-', '|', '–'}
-    missing = [kw for kw in missing if len(kw) > 3 and kw not in common_words]
-
-    for i, kw in enumerate(list(missing)[:10]):
-        gaps.append({
-            "keyword": kw,
-            "competitor_usage": len(competitors_data),
+        sites[comp] = crawl_page_texts(data)
+    index = tfidf_index.CorpusIndex.from_texts(sites)
+    annotate(sites=len(sites), pages=sum(len(texts) for texts in sites.values()))
+
+    return [
+        {
+            "keyword": gap["keyword"],
+            "score": gap["score"],
+            "status": gap["status"],
+            "competitor_usage": gap["competitor_usage"],
             "priority": "high" if i < 3 else "medium",
             "volume": "Analyzing...",
             "difficulty": "Medium"
-        })
-
-    return gaps
+        }
+        for i, gap in enumerate(index.keyword_gaps(tfidf_index.SELF, top_n=10))
+    ]
 
 class AdsRequest(BaseModel):
     domain: str
     brand_name: Optional[str] = None
 
 @app.post("/api/analyze-ads")
-async def analyze_ads(request: AdsRequest, req: Request = None, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def analyze_ads(request: AdsRequest, req: Request = None, user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        user = db.query(User).filter(User.email == payload.get("sub")).first()
         social = find_social_accounts(request.domain)
         tiktok_username = social.get('tiktok') or request.brand_name or request.domain.split('.')[0]
         google_url = f"https://adstransparency.google.com/?domain={request.domain}&region=anywhere"
@@ -484,8 +644,7 @@ async def analyze_ads(request: AdsRequest, req: Request = None, token: str = Dep
         start_time = int((datetime.now() - timedelta(days=365)).timestamp() * 1000)
         tiktok_url = f'https://library.tiktok.com/ads?region=all&start_time={start_time}&end_time={end_time}&adv_name="{tiktok_username}"&query_type=1&sort_type=last_shown_date,desc'
         facebook_url = f"https://www.facebook.com/ads/library/?active_status=all&ad_type=all&country=ALL&q={request.brand_name or request.domain}"
-        if user:
-            log_activity(db, user.id, user.email, "Ads Analysis", f"Analyzed ads for {request.domain}", get_client_ip(req))
+        log_activity(db, user.id, user.email, "Ads Analysis", f"Analyzed ads for {request.domain}", get_client_ip(req))
         return {
             "success": True,
             "data": {
@@ -505,14 +664,12 @@ class SEORequest(BaseModel):
     competitors: List[str]
 
 @app.post("/api/seo-comparison")
-async def seo_comparison(request: SEORequest, req: Request = None, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def seo_comparison(request: SEORequest, req: Request = None, user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        user = db.query(User).filter(User.email == payload.get("sub")).first()
-        your_data = crawl_site(request.your_domain, 15)
+        your_data = crawl_and_index(request.your_domain, 15, user.id)
         competitors_data = {}
         for comp in request.competitors:
-            competitors_data[comp] = crawl_site(comp, 10)
+            competitors_data[comp] = crawl_and_index(comp, 10, user.id)
         insights = []
         
         # Calculate competitor averages
@@ -551,8 +708,7 @@ async def seo_comparison(request: SEORequest, req: Request = None, token: str =
                 insights.append(f"⚠️ Only {your_data['schema_coverage']}% of your pages have schema vs {int(avg_comp_schema)}% for competitors")
             elif your_data['schema_coverage'] > 80:
                 insights.append(f"✅ Excellent schema coverage ({your_data['schema_coverage']}%)")
-        if user:
-            log_activity(db, user.id, user.email, "SEO Comparison", f"Compared {request.your_domain}", get_client_ip(req))
+        log_activity(db, user.id, user.email, "SEO Comparison", f"Compared {request.your_domain}", get_client_ip(req))
         return {
             "success": True,
             "data": {
@@ -569,24 +725,18 @@ class AIRecommendationsRequest(BaseModel):
     competitors: List[str] = []
 
 @app.post("/api/ai-recommendations")
-async def ai_recommendations(request: AIRecommendationsRequest, req: Request = None, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def ai_recommendations(request: AIRecommendationsRequest, req: Request = None, user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get AI-powered marketing recommendations using local analysis (NO Google Cloud!)"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        user = db.query(User).filter(User.email == payload.get("sub")).first()
-
-        if not user:
-            raise HTTPException(401, "User not found")
-
         logger.info(f"Generating AI recommendations for {request.domain}")
 
         # Crawl your site
-        your_data = crawl_site(request.domain, 15)
+        your_data = crawl_and_index(request.domain, 15, user.id)
 
         # Crawl competitors
         competitor_data = []
         for comp in request.competitors[:3]:
-            comp_crawl = crawl_site(comp, 10)
+            comp_crawl = crawl_and_index(comp, 10, user.id)
             comp_crawl['domain'] = comp
             competitor_data.append(comp_crawl)
 
@@ -606,8 +756,7 @@ async def ai_recommendations(request: AIRecommendationsRequest, req: Request = N
             }
         })
 
-        if user:
-            log_activity(db, user.id, user.email, "AI Recommendations", f"Generated for {request.domain}", get_client_ip(req))
+        log_activity(db, user.id, user.email, "AI Recommendations", f"Generated for {request.domain}", get_client_ip(req))
 
         return {
             "success": True,
@@ -620,8 +769,6 @@ async def ai_recommendations(request: AIRecommendationsRequest, req: Request = N
         }
     except HTTPException:
         raise
-    except JWTError:
-        raise HTTPException(401, "Invalid token")
     except Exception as e:
         logger.error(f"AI recommendations error: {str(e)}")
         return {"success": False, "error": str(e)}
@@ -631,38 +778,21 @@ class KeywordRequest(BaseModel):
     domain: str
 
 @app.post("/api/keyword-analysis")
-async def keyword_analysis(request: KeywordRequest, req: Request = None, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def keyword_analysis(request: KeywordRequest, req: Request = None, user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        user = db.query(User).filter(User.email == payload.get("sub")).first()
-        
         # Crawl site to get content
-        site_data = crawl_site(request.domain, 15)
+        site_data = crawl_and_index(request.domain, 15, user.id)
         
-        # Combine all text from pages
-        all_text = ""
-        for page in site_data.get('pages', []):
-            # Extract text from analysis
-            if 'analysis' in page:
-                analysis = page['analysis']
-                # Get title
-                if 'title' in analysis:
-                    all_text += analysis['title'].get('text', '') + " "
-                # Get meta description
-                if 'meta' in analysis:
-                    all_text += analysis['meta'].get('description', '') + " "
-                # Get headings
-                if 'content' in analysis and 'headings' in analysis['content']:
-                    for h in analysis['content']['headings']:
-                        all_text += h + " "
-        
-        # Extract keywords using YAKE
-        from scraper import extract_keywords_with_yake
-        keywords = extract_keywords_with_yake(all_text, top_n=20)
+        # One text per page (title, description, headings); YAKE runs per page and merges
+        page_texts = [
+            page_keyword_text(page['analysis'])
+            for page in site_data.get('pages', [])
+            if 'analysis' in page
+        ]
+        keywords = extract_site_keywords(page_texts, top_n=20)
         
         # Log activity
-        if user:
-            log_activity(db, user.id, user.email, "Keyword Analysis", f"Analyzed keywords for {request.domain}", get_client_ip(req))
+        log_activity(db, user.id, user.email, "Keyword Analysis", f"Analyzed keywords for {request.domain}", get_client_ip(req))
         
         return {
             "success": True,
@@ -679,15 +809,33 @@ async def keyword_analysis(request: KeywordRequest, req: Request = None, token:
     except Exception as e:
         print(f"Error in keyword analysis: {str(e)}")
         return {"success": False, "error": str(e)}
-        date = (datetime.utcnow() - timedelta(days=i)).date()
-        daily_data.append({"date": date.isoformat(), "total": 10 + (i % 5) * 3})
-    return {"success": True, "data": {"daily": daily_data}}
+
+@app.get("/api/analytics/dashboard")
+def analytics_dashboard(days: int = 30, user: Principal = Depends(get_current_user)):
+    """Daily analysis totals from the analytics rollup: the caller's own, platform-wide for admins"""
+    result = local_query_analytics(days=min(max(days, 1), 365), user_id=None if user.is_admin else user.id)
+    if not result.get("success"):
+        return result
+
+    totals: Dict[str, int] = {}
+    for row in result["data"]:
+        totals[row["date"]] = totals.get(row["date"], 0) + row["count"]
+    daily_data = [{"date": date, "total": total} for date, total in sorted(totals.items())]
+
+    return {
+        "success": True,
+        "data": {
+            "daily": daily_data,
+            "by_type": result["data"],
+            "total_analyses": sum(totals.values())
+        }
+    }
 
 class ImageRequest(BaseModel):
     image_url: str
 
 @app.post("/api/vision/detect-brands")
-async def detect_brands(request: ImageRequest, token: str = Depends(oauth2_scheme)):
+async def detect_brands(request: ImageRequest, user: Principal = Depends(get_current_user)):
     """Detect brands and logos in an image using local analysis"""
     result = local_detect_brands(request.image_url)
 
@@ -704,17 +852,34 @@ async def detect_brands(request: ImageRequest, token: str = Depends(oauth2_schem
 
 
 @app.post("/api/vision/analyze")
-async def analyze_image(request: ImageRequest, token: str = Depends(oauth2_scheme)):
+async def analyze_image(request: ImageRequest, user: Principal = Depends(get_current_user)):
     """Comprehensive image analysis using local processing"""
     result = analyze_image_content(request.image_url)
     return result
 
+MAX_VISION_BATCH = int(os.getenv("MAX_VISION_BATCH", "200"))
+
+class ImageBatchRequest(BaseModel):
+    image_urls: List[str]
+
+@app.post("/api/vision/analyze/batch")
+def analyze_image_batch(request: ImageBatchRequest, user: Principal = Depends(get_current_user)):
+    """Analyze a set of images (e.g. an ad creative library) in one call"""
+    if not request.image_urls:
+        raise HTTPException(status_code=400, detail="No image URLs provided")
+    if len(request.image_urls) > MAX_VISION_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_VISION_BATCH} images per batch")
+
+    # Sync endpoint: downloads and decoding run in the threadpool, off the event loop
+    return analyze_images_batch(request.image_urls)
+
 class SentimentRequest(BaseModel):
     text: str
 
 @app.post("/api/language/sentiment")
-async def sentiment_analysis(request: SentimentRequest, token: str = Depends(oauth2_scheme)):
+def sentiment_analysis(request: SentimentRequest, user: Principal = Depends(get_current_user)):
     """Analyze text sentiment using local NLP (TextBlob)"""
+    # Sync endpoint: waiting for an inference slot and the forward pass stay off the event loop
     result = local_sentiment(request.text)
 
     if result.get("success"):
@@ -729,27 +894,79 @@ async def sentiment_analysis(request: SentimentRequest, token: str = Depends(oau
             "error": result.get("error", "Sentiment analysis failed")
         }
 
-def verify_admin(token: str, db: Session):
+MAX_SENTIMENT_BATCH = int(os.getenv("MAX_SENTIMENT_BATCH", "1000"))
+
+class SentimentBatchRequest(BaseModel):
+    texts: List[str]
+
+@app.post("/api/language/sentiment/batch")
+def sentiment_batch_analysis(request: SentimentBatchRequest, user: Principal = Depends(get_current_user)):
+    """Analyze many texts in one call: per-item results plus aggregate stats"""
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="No texts provided")
+    if len(request.texts) > MAX_SENTIMENT_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_SENTIMENT_BATCH} texts per batch")
+
+    # Sync endpoint: model inference runs in the threadpool, off the event loop
+    return local_sentiment_batch(request.texts)
+
+@app.get("/api/search")
+def search_pages(q: str, domain: Optional[str] = None, limit: int = 20, offset: int = 0, user: Principal = Depends(get_current_user)):
+    """Ranked full-text search over every page this account has crawled"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty search query")
+    return {"success": True, **search_index.search(user.id, q, domain=domain, limit=limit, offset=offset)}
+
+@app.get("/api/search/domains")
+def search_domains(user: Principal = Depends(get_current_user)):
+    """Domains available to search, with indexed page counts"""
+    return {"success": True, "domains": search_index.domains(user.id)}
+
+@app.post("/api/admin/profile")
+async def profile_worker(seconds: float = 10, interval_ms: float = 5, mode: str = "cpu", format: str = "json",
+                         admin: Principal = Depends(get_current_admin)):
+    """Sample every thread of this worker for `seconds`; format=collapsed returns flamegraph input"""
+    if mode not in PROFILE_MODES:
+        raise HTTPException(400, f"mode must be one of: {', '.join(PROFILE_MODES)}")
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        user = db.query(User).filter(User.email == payload.get("sub")).first()
-        if not user or user.role != "admin":
-            raise HTTPException(403, "Admin access required")
-        return user
-    except JWTError:
-        raise HTTPException(401, "Invalid token")
+        profiler = start_profile(interval_ms / 1000, mode, seconds)
+    except ProfilerBusy:
+        raise HTTPException(409, "A profile is already running in this worker")
+    try:
+        # Sleep on the event loop so the worker keeps serving the traffic being profiled
+        await asyncio.sleep(seconds)
+    finally:
+        result = finish_profile(profiler)
+    result["id"] = profile_store.save(result)
+    logger.info(f"Admin {admin.email} profiled worker for {seconds}s ({result['samples']} samples)")
+    if format == "collapsed":
+        return PlainTextResponse(result["collapsed"])
+    return result
+
+@app.get("/api/admin/profiles/{profile_id}")
+def get_profile(profile_id: str, format: str = "json", admin: Principal = Depends(get_current_admin)):
+    """A stored profile, e.g. from a request sent with X-Profile: 1"""
+    result = profile_store.load(profile_id)
+    if result is None:
+        raise HTTPException(404, "Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(result["collapsed"])
+    return result
 
 @app.get("/api/admin/stats")
-def get_admin_stats(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    verify_admin(token, db)
-    total_users = db.query(User).count()
+def get_admin_stats(admin: Principal = Depends(get_current_admin), db: Session = Depends(get_db)):
+    # One pass over users, and O(days) rollup rows instead of COUNT(*) on reports
     thirty_min_ago = datetime.utcnow() - timedelta(minutes=30)
-    online_users = db.query(User).filter(User.last_login >= thirty_min_ago).count()
-    total_reports = db.query(AnalysisReport).count()
+    total_users, online_users = db.query(
+        func.count(User.id),
+        func.coalesce(func.sum(case((User.last_login >= thirty_min_ago, 1), else_=0)), 0)
+    ).one()
     today = datetime.utcnow().date()
-    reports_today = db.query(AnalysisReport).filter(
-        AnalysisReport.created_at >= datetime.combine(today, datetime.min.time())
-    ).count()
+    total_reports, reports_today = db.query(
+        func.coalesce(func.sum(ReportDailyRollup.count), 0),
+        func.coalesce(func.sum(case((ReportDailyRollup.day == today, ReportDailyRollup.count), else_=0)), 0)
+    ).one()
     return {
         "total_users": total_users,
         "online_users": online_users,
@@ -758,8 +975,7 @@ def get_admin_stats(token: str = Depends(oauth2_scheme), db: Session = Depends(g
     }
 
 @app.get("/api/admin/users")
-def get_all_users(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    verify_admin(token, db)
+def get_all_users(admin: Principal = Depends(get_current_admin), db: Session = Depends(get_db)):
     users = db.query(User).all()
     return {
         "users": [
@@ -784,14 +1000,13 @@ class CreateUserRequest(BaseModel):
     quota: int = 15
 
 @app.post("/api/admin/users/create")
-def create_user(request: CreateUserRequest, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    verify_admin(token, db)
+def create_user(request: CreateUserRequest, admin: Principal = Depends(get_current_admin), db: Session = Depends(get_db)):
     existing = db.query(User).filter(User.email == request.email).first()
     if existing:
         raise HTTPException(400, "User already exists")
     new_user = User(
         email=request.email,
-        hashed_password=get_password_hash(request.password),
+        hashed_password=hash_or_503(password_pool.hash, request.password),
         quota=request.quota
     )
     db.add(new_user)
@@ -804,8 +1019,7 @@ class UpdateUserRequest(BaseModel):
     password: Optional[str] = None
 
 @app.put("/api/admin/users/{user_id}")
-def update_user(user_id: int, request: UpdateUserRequest, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    verify_admin(token, db)
+def update_user(user_id: int, request: UpdateUserRequest, admin: Principal = Depends(get_current_admin), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(404, "User not found")
@@ -814,23 +1028,24 @@ def update_user(user_id: int, request: UpdateUserRequest, token: str = Depends(o
     if request.is_active is not None:
         user.is_active = request.is_active
     if request.password:
-        user.hashed_password = get_password_hash(request.password)
+        user.hashed_password = hash_or_503(password_pool.hash, request.password)
     db.commit()
+    user_cache.invalidate(user.email)
     return {"success": True, "message": "User updated"}
 
 @app.delete("/api/admin/users/{user_id}")
-def delete_user(user_id: int, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    verify_admin(token, db)
+def delete_user(user_id: int, admin: Principal = Depends(get_current_admin), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(404, "User not found")
     db.delete(user)
     db.commit()
+    user_cache.invalidate(user.email)
+    search_index.delete_workspace(user_id)
     return {"success": True, "message": "User deleted"}
 
 @app.get("/api/admin/activity")
-def get_activity_logs(limit: int = 50, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    verify_admin(token, db)
+def get_activity_logs(limit: int = 50, admin: Principal = Depends(get_current_admin), db: Session = Depends(get_db)):
     logs = db.query(ActivityLog).order_by(ActivityLog.created_at.desc()).limit(limit).all()
     return {
         "logs": [
@@ -848,8 +1063,7 @@ def get_activity_logs(limit: int = 50, token: str = Depends(oauth2_scheme), db:
     }
 
 @app.get("/api/admin/reports/{user_id}")
-def get_user_reports(user_id: int, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    verify_admin(token, db)
+def get_user_reports(user_id: int, admin: Principal = Depends(get_current_admin), db: Session = Depends(get_db)):
     reports = db.query(AnalysisReport).filter(AnalysisReport.user_id == user_id).order_by(AnalysisReport.created_at.desc()).all()
     return {
         "reports": [
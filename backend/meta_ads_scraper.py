@@ -1,22 +1,45 @@
 """
 Based on Facebook's official open source repo
 https://github.com/facebookresearch/Ad-Library-API-Script-Repository
+
+Results are paged: iter_pages() follows the paging.next cursor one page at
+a time; iter_ads() and search_ads() stop at max_ads or the deadline,
+whichever comes first. search_ads() marks a result cut short by the
+deadline or a failed page as truncated.
 """
 
+import os
+import time
 import requests
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
+
+META_ADS_ARCHIVE_URL = os.getenv("META_ADS_ARCHIVE_URL", "https://graph.facebook.com/v21.0/ads_archive")
+META_MAX_ADS = int(os.getenv("META_MAX_ADS", "100"))
+META_TIMEOUT = float(os.getenv("META_TIMEOUT", "20"))
+
+
+class MetaAdsError(Exception):
+    """Ad Library request failed before any ads were read"""
+
 
 class MetaAdsLibraryScraper:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, session: Optional[requests.Session] = None):
         self.access_token = access_token
-        self.base_url = "https://graph.facebook.com/v21.0/ads_archive"
-    
-    def search_ads(self, search_terms: str, countries: List[str] = None, limit: int = 20) -> Dict:
-        """Search Meta Ad Library"""
-        
+        self.base_url = META_ADS_ARCHIVE_URL
+        self.session = session or requests.Session()
+
+    def iter_pages(self, search_terms: str, countries: List[str] = None, limit: int = 20,
+                   deadline: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Yield result pages ({'data': [...], 'next': url or None}), following
+        the paging cursor, until the last page or deadline (a time.monotonic()
+        value). Raises MetaAdsError if the first page fails; a later failure
+        ends the stream.
+        """
         if countries is None:
             countries = ['US', 'AE', 'SA']
-        
+
+        url = self.base_url
         params = {
             'access_token': self.access_token,
             'search_terms': search_terms,
@@ -25,13 +48,61 @@ class MetaAdsLibraryScraper:
             'fields': 'id,ad_creative_link_captions,ad_delivery_start_time,ad_snapshot_url,page_name,spend,impressions',
             'limit': limit
         }
-        
+        first = True
+        while url:
+            timeout = META_TIMEOUT
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    return
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+                page = response.json()
+            except Exception as e:
+                if first:
+                    raise MetaAdsError(str(e))
+                return
+            if response.status_code != 200:
+                if first:
+                    raise MetaAdsError(page)
+                return
+
+            # The next link already carries every query parameter and the cursor
+            url = page.get('paging', {}).get('next')
+            params = None
+            first = False
+            yield {'data': page.get('data', []), 'next': url}
+
+    def iter_ads(self, search_terms: str, countries: List[str] = None, limit: int = 20,
+                 max_ads: int = META_MAX_ADS, deadline: Optional[float] = None) -> Iterator[Dict]:
+        """Yield ads from iter_pages() until max_ads ads, the last page, or deadline"""
+        yielded = 0
+        for page in self.iter_pages(search_terms, countries, min(limit, max_ads), deadline):
+            for ad in page['data'][:max_ads - yielded]:
+                yielded += 1
+                yield ad
+            if yielded >= max_ads:
+                return
+
+    def search_ads(self, search_terms: str, countries: List[str] = None, limit: int = 20,
+                   max_ads: int = None, deadline: Optional[float] = None) -> Dict:
+        """
+        Search Meta Ad Library (one page of limit ads unless max_ads is given).
+        If the deadline or a failed page stops pagination short of max_ads
+        while more pages remain, the result has 'truncated': True and the
+        'next' cursor URL where reading stopped.
+        """
+        max_ads = max_ads or limit
+        ads = []
+        next_url = None
         try:
-            response = requests.get(self.base_url, params=params, timeout=20)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {'error': response.json()}
-        except Exception as e:
-            return {'error': str(e)}
+            for page in self.iter_pages(search_terms, countries, min(limit, max_ads), deadline):
+                ads.extend(page['data'][:max_ads - len(ads)])
+                next_url = page['next']
+                if len(ads) >= max_ads:
+                    break
+        except MetaAdsError as e:
+            return {'error': e.args[0]}
+        if next_url and len(ads) < max_ads:
+            return {'data': ads, 'truncated': True, 'next': next_url}
+        return {'data': ads}
@@ -0,0 +1,513 @@
+"""
+Prometheus-style metrics without extra dependencies
+
+Counters, gauges and histograms live in plain dicts behind one lock per
+metric; recording a sample is a bisect and two additions, cheap enough for
+every request, page and DB query. render() produces the Prometheus text
+exposition format for GET /metrics (which requires the METRICS_TOKEN bearer
+token).
+
+- MetricsMiddleware (pure ASGI) records latency and status per route
+  template, so /api/search?q=x and /api/search?q=y share a series
+- instrument_engine() times every SQLAlchemy statement by operation
+- instrumented_session() returns a requests.Session whose connections
+  report DNS and connect (TCP + TLS) time; the crawler adds TTFB,
+  download, parse and analyze per page
+- multiple workers: set METRICS_DIR (or PROMETHEUS_MULTIPROC_DIR) and each
+  process writes its snapshot to <dir>/metrics-<pid>.json every
+  METRICS_FLUSH_SECONDS. A scrape of any worker merges every snapshot:
+  counters and histograms are summed over all files, including exited
+  workers, so totals never go backwards; gauges only over live processes.
+  Empty the directory before starting the server.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+
+logger = logging.getLogger("ai-grinners.metrics")
+
+METRICS_DIR = os.getenv("METRICS_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# Seconds; spans sub-millisecond cache lookups to multi-minute crawls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+PROCESS_START = time.time()
+
+
+def uptime_seconds() -> float:
+    return round(time.time() - PROCESS_START, 1)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """A named family of samples keyed by label values"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple(str(labels[n]) for n in self.labelnames)
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+
+    def samples(self) -> List:
+        """[[label values, value]] for snapshots"""
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down; set_function() computes it at collection"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]):
+        self._function = function
+
+    def samples(self) -> List:
+        if self._function is not None:
+            try:
+                return [[[], float(self._function())]]
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} callback failed: {e}")
+                return []
+        return super().samples()
+
+
+class Histogram(Metric):
+    """Bucketed distribution with sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, the last one being +Inf; sum; count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List:
+        with self._lock:
+            return [[list(k), [list(v[0]), v[1], v[2]]] for k, v in self._values.items()]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """All metrics of this process, plus merging with other workers' snapshots"""
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = METRICS_FLUSH_SECONDS,
+                 pid: Optional[int] = None):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._pid = pid
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def pid(self) -> int:
+        # Looked up each time so workers forked after import get their own file
+        return self._pid or os.getpid()
+
+    def _register(self, cls, name: str, *args, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict:
+        """JSON-safe state of this process"""
+        metrics = {}
+        for name, metric in list(self._metrics.items()):
+            entry = {
+                "kind": metric.kind,
+                "help": metric.documentation,
+                "labels": list(metric.labelnames),
+                "samples": metric.samples()
+            }
+            if isinstance(metric, Histogram):
+                entry["buckets"] = list(metric.buckets)
+            metrics[name] = entry
+        return {"pid": self.pid, "written": time.time(), "metrics": metrics}
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def flush(self):
+        """Write this process's snapshot for other workers to merge (atomic rename)"""
+        if not self.directory:
+            return
+        path = self._path(self.pid)
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.snapshot(), f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Metrics flush failed: {e}")
+
+    def start_flusher(self):
+        """Flush every flush_interval seconds from a daemon thread (multi-worker mode only)"""
+        if not self.directory or self._flusher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def _snapshots(self) -> List[Dict]:
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for filename in sorted(os.listdir(self.directory)):
+            if not (filename.startswith("metrics-") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.debug(f"Skipping unreadable metrics snapshot {filename}: {e}")
+        return snapshots
+
+    def collect(self) -> Dict:
+        """Snapshot merged across every worker writing to the metrics directory"""
+        merged: Dict[str, Dict] = {}
+        for snapshot in self._snapshots():
+            alive = snapshot["pid"] == self.pid or _pid_alive(snapshot["pid"])
+            for name, entry in snapshot["metrics"].items():
+                if entry["kind"] == "gauge" and not alive:
+                    continue
+                target = merged.setdefault(name, dict(entry, samples={}))
+                samples = target["samples"]
+                for labels, value in entry["samples"]:
+                    key = tuple(labels)
+                    if entry["kind"] == "histogram":
+                        if key not in samples:
+                            samples[key] = [list(value[0]), value[1], value[2]]
+                        elif len(samples[key][0]) == len(value[0]):
+                            current = samples[key]
+                            current[0] = [a + b for a, b in zip(current[0], value[0])]
+                            current[1] += value[1]
+                            current[2] += value[2]
+                    else:
+                        samples[key] = samples.get(key, 0) + value
+        return merged
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, entry in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {entry['help']}")
+            lines.append(f"# TYPE {name} {entry['kind']}")
+            labelnames = entry["labels"]
+            for key, value in sorted(entry["samples"].items()):
+                if entry["kind"] == "histogram":
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket in zip(list(entry["buckets"]) + [float("inf")], counts):
+                        cumulative += bucket
+                        le = f'le="{_format_value(bound)}"'
+                        lines.append(f"{name}_bucket{_labels(labelnames, key, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labelnames, key)} {_format_value(round(total, 6))}")
+                    lines.append(f"{name}_count{_labels(labelnames, key)} {count}")
+                else:
+                    lines.append(f"{name}{_labels(labelnames, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Reset every sample in this process (tests)"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+# Global metrics registry
+metrics = MetricsRegistry(directory=METRICS_DIR)
+
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = metrics.histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+HTTP_IN_PROGRESS = metrics.gauge("http_requests_in_progress", "HTTP requests currently being served")
+CRAWL_STAGE = metrics.histogram("crawl_stage_seconds", "Time per crawled page by stage (dns, connect, ttfb, download, parse, analyze)", ("stage",))
+CRAWL_PAGES = metrics.counter("crawl_pages_total", "Crawled pages by outcome", ("status",))
+CACHE_LOOKUPS = metrics.counter("cache_lookups_total", "Cache lookups by cache and result", ("cache", "result"))
+DB_QUERY = metrics.histogram("db_query_duration_seconds", "SQLAlchemy statement time by operation", ("operation",))
+DB_ERRORS = metrics.counter("db_query_errors_total", "Failed SQLAlchemy statements", ("operation",))
+JOB_QUEUE_DEPTH = metrics.gauge("job_queue_depth", "Jobs waiting in the background queue")
+JOB_WAIT = metrics.histogram("job_queue_wait_seconds", "Time jobs spend queued before a worker picks them up", ("type",))
+JOB_DURATION = metrics.histogram("job_duration_seconds", "Background job run time", ("type", "status"))
+INFERENCE_WAIT = metrics.histogram("model_inference_wait_seconds", "Time waiting for an inference slot", ("model",))
+INFERENCE = metrics.histogram("model_inference_seconds", "Model forward pass time", ("model",))
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# ==================== ASGI middleware ====================
+
+class MetricsMiddleware:
+    """Per-route latency and status counts (route template, not raw path)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec()
+            route = scope.get("route")
+            # Unmatched paths share one series so scanners can't explode cardinality
+            route = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code[0])
+
+
+# ==================== SQLAlchemy ====================
+
+def instrument_engine(engine):
+    """Time every statement executed through engine (idempotent)"""
+    from sqlalchemy import event
+
+    if getattr(engine, "_metrics_instrumented", False):
+        return
+
+    def operation(statement: str) -> str:
+        word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_start")
+        if starts:
+            DB_QUERY.observe(time.perf_counter() - starts.pop(), operation=operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def error(context):
+        starts = context.connection.info.get("metrics_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        DB_ERRORS.inc(operation=operation(context.statement or ""))
+
+    engine._metrics_instrumented = True
+
+
+# ==================== HTTP client ====================
+
+_connection_timings = threading.local()
+
+
+def reset_connection_timings() -> Dict[str, float]:
+    """Start collecting DNS/connect time for requests made by this thread"""
+    timings = {"dns": 0.0, "connect": 0.0}
+    _connection_timings.current = timings
+    return timings
+
+
+class _TimedConnectionMixin:
+    """Times name resolution and connection setup of new pooled connections"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)))
+        except OSError:
+            # Let urllib3 resolve again and raise its own NameResolutionError
+            addresses = [host]
+        self._dns_seconds = time.perf_counter() - start
+
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError:
+                    # Same fallback as urllib3: try the next resolved address
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        self._dns_seconds = 0.0
+        start = time.perf_counter()
+        super().connect()
+        dns = self._dns_seconds
+        connect = time.perf_counter() - start - dns
+        CRAWL_STAGE.observe(dns, stage="dns")
+        CRAWL_STAGE.observe(connect, stage="connect")
+        timings = getattr(_connection_timings, "current", None)
+        if timings is not None:
+            timings["dns"] += dns
+            timings["connect"] += connect
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool
+        }
+
+
+def instrumented_session(pool_size: int = 10) -> Session:
+    """requests.Session whose new connections record dns/connect crawl stages"""
+    session = Session()
+    adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,181 @@
+"""
+Model registry for local NLP models
+
+Transformer analyzers take seconds to build and hundreds of MB of memory.
+The registry makes sure each model is built exactly once, optionally before
+the first request arrives, and bounds how many requests run inference at
+the same time:
+
+- register(name, loader) declares a model; nothing is loaded yet
+- get(name) loads on first use under a per-model lock (double-checked)
+- preload(names, background) warms models at startup; `ready` gates /health
+- inference(name) is a semaphore around forward passes, timed per model
+- stats() reports status, load time and RSS growth per model
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from metrics import INFERENCE, INFERENCE_WAIT
+
+logger = logging.getLogger("ai-grinners.model_registry")
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is missing)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if RESOURCE_AVAILABLE:
+        # ru_maxrss is KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return 0
+
+
+class ModelEntry:
+    """Load state of one registered model"""
+    __slots__ = ("name", "loader", "model", "lock", "status", "error",
+                 "load_seconds", "memory_bytes", "loaded_at", "failed_at")
+
+    def __init__(self, name: str, loader: Callable):
+        self.name = name
+        self.loader = loader
+        self.model = None
+        self.lock = threading.Lock()
+        self.status = "registered"
+        self.error = None
+        self.load_seconds = None
+        self.memory_bytes = None
+        self.loaded_at = None
+        self.failed_at = None
+
+
+class ModelRegistry:
+    """Thread-safe, load-once registry of named models"""
+
+    def __init__(self, max_concurrent_inference: int = 2, retry_after: float = 60):
+        self._entries: Dict[str, ModelEntry] = {}
+        self._inference = threading.BoundedSemaphore(max(1, max_concurrent_inference))
+        self.max_concurrent_inference = max(1, max_concurrent_inference)
+        self.retry_after = retry_after
+        self._preloading: List[str] = []
+
+    def register(self, name: str, loader: Callable):
+        """Declare a model; loader() builds it on first get() or preload()"""
+        self._entries[name] = ModelEntry(name, loader)
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._entries
+
+    def get(self, name: str):
+        """Return the model, loading it once. None if unknown or loading failed"""
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        if entry.model is not None:
+            return entry.model
+
+        with entry.lock:
+            # Another thread may have finished loading while we waited
+            if entry.model is not None:
+                return entry.model
+            if entry.status == "failed" and time.time() - entry.failed_at < self.retry_after:
+                return None
+            self._load(entry)
+        return entry.model
+
+    def _load(self, entry: ModelEntry):
+        entry.status = "loading"
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        try:
+            model = entry.loader()
+        except Exception as e:
+            entry.status = "failed"
+            entry.error = str(e)
+            entry.failed_at = time.time()
+            logger.error(f"Failed to load model '{entry.name}': {e}")
+            return
+
+        entry.load_seconds = round(time.perf_counter() - start, 3)
+        entry.memory_bytes = max(0, rss_bytes() - rss_before)
+        entry.loaded_at = time.time()
+        entry.error = None
+        entry.model = model
+        entry.status = "loaded"
+        logger.info(f"Loaded model '{entry.name}' in {entry.load_seconds}s "
+                    f"(+{entry.memory_bytes / 1024 / 1024:.1f} MB RSS)")
+
+    def preload(self, names: List[str], background: bool = False):
+        """Load the named models now, or in a daemon thread when background=True"""
+        names = [n for n in names if n]
+        unknown = [n for n in names if n not in self._entries]
+        if unknown:
+            logger.warning(f"Not preloading unregistered models: {', '.join(unknown)}")
+        self._preloading = [n for n in names if n in self._entries]
+        if not self._preloading:
+            return
+
+        def run():
+            for name in self._preloading:
+                self.get(name)
+
+        if background:
+            threading.Thread(target=run, name="model-preload", daemon=True).start()
+        else:
+            run()
+
+    @property
+    def ready(self) -> bool:
+        """True once every preloaded model has finished loading (or failed)"""
+        return all(self._entries[n].status in ("loaded", "failed") for n in self._preloading)
+
+    @contextmanager
+    def inference(self, name: str = "default"):
+        """Bound concurrent forward passes so parallel requests don't thrash CPU/memory"""
+        start = time.perf_counter()
+        self._inference.acquire()
+        acquired = time.perf_counter()
+        INFERENCE_WAIT.observe(acquired - start, model=name)
+        try:
+            yield
+        finally:
+            self._inference.release()
+            INFERENCE.observe(time.perf_counter() - acquired, model=name)
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "max_concurrent_inference": self.max_concurrent_inference,
+            "models": {
+                name: {
+                    "status": entry.status,
+                    "load_seconds": entry.load_seconds,
+                    "memory_mb": round(entry.memory_bytes / 1024 / 1024, 1) if entry.memory_bytes is not None else None,
+                    "loaded_at": entry.loaded_at,
+                    "error": entry.error
+                }
+                for name, entry in self._entries.items()
+            }
+        }
+
+
+# Global registry instance
+model_registry = ModelRegistry(
+    max_concurrent_inference=int(os.getenv("NLP_MAX_CONCURRENT_INFERENCE", "2")),
+    retry_after=float(os.getenv("NLP_MODEL_RETRY_SECONDS", "60"))
+)
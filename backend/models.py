@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Text, Float, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
@@ -50,3 +50,23 @@ class AnalysisReport(Base):
     competitors = Column(Text, nullable=True)
     results = Column(Text)  # JSON string
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class AnalysisTrace(Base):
+    __tablename__ = "analysis_traces"
+
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(Integer, index=True)
+    trace_id = Column(String)
+    total_ms = Column(Float)
+    timeline = Column(Text)  # JSON string (tracing.Trace.timeline())
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ReportDailyRollup(Base):
+    __tablename__ = "report_daily_rollups"
+    __table_args__ = (UniqueConstraint("day", "report_type", "user_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, index=True)
+    report_type = Column(String)
+    user_id = Column(Integer, default=0)  # 0 when the report has no owner
+    count = Column(Integer, default=0)
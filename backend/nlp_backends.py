@@ -0,0 +1,150 @@
+"""
+CPU inference backends for pysentimiento analyzers
+
+Selected with NLP_INFERENCE_BACKEND:
+
+- torch      full-precision PyTorch model (default, unchanged behaviour)
+- quantized  torch dynamic int8 quantization of the Linear layers; no extra
+             dependencies, roughly half the weights' memory
+- onnx       model exported once to NLP_ONNX_DIR and run with onnxruntime
+             (pip install onnx onnxruntime); NLP_ONNX_QUANTIZE=true also
+             applies onnxruntime's dynamic int8 quantization
+
+A backend swaps `analyzer.model` for something with the same call contract
+(`model(input_ids, attention_mask=...)` -> object with `.logits`), so both
+pysentimiento's single-text predict and nlp_inference.predict_batch use it
+transparently. If a backend can't be applied the analyzer is left on torch.
+"""
+
+import gc
+import logging
+import os
+import re
+from types import SimpleNamespace
+
+logger = logging.getLogger("ai-grinners.nlp_backends")
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+NLP_INFERENCE_BACKEND = os.getenv("NLP_INFERENCE_BACKEND", "torch").lower()
+NLP_ONNX_DIR = os.getenv("NLP_ONNX_DIR", "/tmp/nlp_onnx")
+NLP_ONNX_QUANTIZE = os.getenv("NLP_ONNX_QUANTIZE", "false").lower() == "true"
+NLP_ONNX_THREADS = int(os.getenv("NLP_ONNX_THREADS", "0"))
+
+BACKENDS = ("torch", "quantized", "onnx")
+
+
+class OnnxSequenceClassifier:
+    """onnxruntime session with the HuggingFace sequence-classification call contract"""
+
+    def __init__(self, path: str, config, threads: int = 0):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.config = config
+        self.path = path
+
+    def __call__(self, input_ids=None, attention_mask=None, **_):
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        logits = self.session.run(["logits"], {
+            "input_ids": input_ids.cpu().numpy(),
+            "attention_mask": attention_mask.cpu().numpy()
+        })[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def _onnx_path(model, quantized: bool) -> str:
+    name = re.sub(r"[^\w.-]+", "__", getattr(model.config, "_name_or_path", "") or type(model).__name__)
+    return os.path.join(NLP_ONNX_DIR, f"{name}{'.int8' if quantized else ''}.onnx")
+
+
+def export_onnx(model, tokenizer, path: str):
+    """Export a sequence-classification model with dynamic batch and sequence axes"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    model.eval()
+    tmp_path = f"{path}.tmp"
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            tmp_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"}
+            },
+            opset_version=14
+        )
+    # Rename last so a crashed export never leaves a half-written model behind
+    os.replace(tmp_path, path)
+
+
+def _ensure_onnx(model, tokenizer, quantize: bool) -> str:
+    path = _onnx_path(model, quantize)
+    if os.path.exists(path):
+        return path
+
+    fp32_path = _onnx_path(model, False)
+    if not os.path.exists(fp32_path):
+        logger.info(f"Exporting {fp32_path}")
+        export_onnx(model, tokenizer, fp32_path)
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+    return path
+
+
+def _replace_model(analyzer, model):
+    """Point the analyzer (and its Trainer) at the new model so the fp32 weights can be freed"""
+    analyzer.model = model
+    trainer = getattr(analyzer, "eval_trainer", None)
+    if trainer is not None:
+        is_module = isinstance(model, torch.nn.Module)
+        # Trainer-based list predict() only works with nn.Modules; predict_batch doesn't need it
+        trainer.model = model if is_module else None
+        trainer.model_wrapped = model if is_module else None
+    gc.collect()
+
+
+def apply_inference_backend(analyzer, backend: str = NLP_INFERENCE_BACKEND):
+    """Switch a pysentimiento analyzer to the configured backend. Returns the analyzer"""
+    if analyzer is None or backend == "torch":
+        return analyzer
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown NLP_INFERENCE_BACKEND '{backend}', using torch")
+        return analyzer
+    if not TORCH_AVAILABLE:
+        return analyzer
+
+    try:
+        if backend == "quantized":
+            model = torch.quantization.quantize_dynamic(analyzer.model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            if not ONNXRUNTIME_AVAILABLE:
+                raise RuntimeError("onnxruntime not installed")
+            path = _ensure_onnx(analyzer.model, analyzer.tokenizer, NLP_ONNX_QUANTIZE)
+            model = OnnxSequenceClassifier(path, analyzer.model.config, NLP_ONNX_THREADS)
+    except Exception as e:
+        logger.warning(f"Could not apply '{backend}' inference backend, using torch: {e}")
+        return analyzer
+
+    _replace_model(analyzer, model)
+    analyzer.inference_backend = backend
+    logger.info(f"Using '{backend}' inference backend for {analyzer.task}")
+    return analyzer
@@ -0,0 +1,113 @@
+"""
+Batched transformer inference for pysentimiento analyzers
+
+pysentimiento's list `predict` goes through a HuggingFace Trainer and a
+datasets.Dataset, and the single-text path runs one forward pass per call.
+This module runs the underlying model directly on padded mini-batches:
+
+- texts are sorted by length before batching so padding stays small
+- sentiment and emotion share one tokenization when their tokenizers and
+  preprocessing agree (true for the English BERTweet models)
+- results come back as plain {label: probability} dicts in input order
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger("ai-grinners.nlp_inference")
+
+try:
+    import torch
+    from pysentimiento.preprocessing import preprocess_tweet
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+MAX_LENGTH = 128
+
+_shared_tokenizer_cache: Dict[tuple, bool] = {}
+
+
+def can_share_tokenization(first, second) -> bool:
+    """True if two analyzers would produce identical input ids for any text"""
+    if first is None or second is None:
+        return False
+    key = (id(first), id(second))
+    if key not in _shared_tokenizer_cache:
+        a, b = first.tokenizer, second.tokenizer
+        probe = "@user Loving the new release!!! 😍 https://t.co/x #launch"
+        _shared_tokenizer_cache[key] = (
+            type(a) is type(b)
+            and a.vocab_size == b.vocab_size
+            and first.preprocessing_args == second.preprocessing_args
+            and a.encode(probe) == b.encode(probe)
+        )
+    return _shared_tokenizer_cache[key]
+
+
+def _probabilities(analyzer, logits) -> List[Dict[str, float]]:
+    if analyzer.problem_type == "multi_label_classification":
+        probs = torch.sigmoid(logits)
+    else:
+        probs = torch.softmax(logits, dim=-1)
+    labels = [analyzer.id2label[i] for i in range(probs.shape[-1])]
+    return [dict(zip(labels, row)) for row in probs.tolist()]
+
+
+def _run_model(analyzer, encoded) -> List[Dict[str, float]]:
+    with torch.inference_mode():
+        logits = analyzer.model(**encoded).logits
+    return _probabilities(analyzer, logits)
+
+
+def predict_batch(
+    sentiment_analyzer,
+    texts: Sequence[str],
+    emotion_analyzer=None,
+    batch_size: int = 32
+) -> Dict[str, List[Optional[Dict[str, float]]]]:
+    """
+    Score texts with the sentiment (and optionally emotion) model.
+    Returns {"sentiment": [...], "emotion": [...]} aligned with texts.
+    """
+    if not TORCH_AVAILABLE:
+        raise RuntimeError("torch/pysentimiento not installed")
+
+    count = len(texts)
+    sentiment: List[Optional[Dict[str, float]]] = [None] * count
+    emotion: List[Optional[Dict[str, float]]] = [None] * count
+    share = can_share_tokenization(sentiment_analyzer, emotion_analyzer)
+
+    processed = [preprocess_tweet(t, **sentiment_analyzer.preprocessing_args) for t in texts]
+    if emotion_analyzer is not None and not share:
+        emotion_processed = [preprocess_tweet(t, **emotion_analyzer.preprocessing_args) for t in texts]
+
+    # Length-sorted batches keep padding (and wasted FLOPs) low
+    order = sorted(range(count), key=lambda i: len(processed[i]))
+
+    for start in range(0, count, batch_size):
+        idx = order[start:start + batch_size]
+        encoded = sentiment_analyzer.tokenizer(
+            [processed[i] for i in idx],
+            padding=True,
+            truncation=True,
+            max_length=MAX_LENGTH,
+            return_tensors="pt"
+        )
+        for i, probas in zip(idx, _run_model(sentiment_analyzer, encoded)):
+            sentiment[i] = probas
+
+        if emotion_analyzer is None:
+            continue
+        if not share:
+            encoded = emotion_analyzer.tokenizer(
+                [emotion_processed[i] for i in idx],
+                padding=True,
+                truncation=True,
+                max_length=MAX_LENGTH,
+                return_tensors="pt"
+            )
+        for i, probas in zip(idx, _run_model(emotion_analyzer, encoded)):
+            emotion[i] = probas
+
+    return {"sentiment": sentiment, "emotion": emotion}
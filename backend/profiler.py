@@ -0,0 +1,313 @@
+"""
+On-demand sampling profiler for live workers
+
+A daemon thread wakes every `interval` seconds, reads every thread's
+current Python stack with sys._current_frames() and counts it. Nothing is
+hooked into the interpreter, so the profiled code runs at full speed; the
+cost is one stack walk per thread per sample (about 1% at the default 5 ms
+interval). Signal-based samplers only see the main thread, which misses
+sync endpoints running in the threadpool; this one sees them all.
+
+- mode "cpu" (default) counts a thread only if it used CPU since the
+  previous sample (per-thread CPU clocks), so idle pools and threads
+  blocked on sockets drop out and hot functions stand out
+- mode "wall" counts every thread regardless, to see where time goes
+  while waiting on slow hosts, locks or the database
+- output is collapsed stacks ("root;caller;callee count" per line), the
+  input format of flamegraph.pl and speedscope, plus a self-time summary
+- runs are bounded by PROFILE_MAX_SECONDS and one runs at a time per worker
+- ProfileMiddleware profiles single requests sent with `X-Profile: 1`
+  (when authorize() accepts them) and returns an X-Profile-Id; results
+  are kept as files in PROFILE_DIR so any worker on the host can serve them
+- every result has scope "worker": a request's work can't be told apart
+  from other requests sharing the event loop and threadpool, so a
+  per-request profile also holds whatever else the worker ran meanwhile;
+  its concurrent_requests (peak other requests in flight) says how much
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("ai-grinners.profiler")
+
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_DEFAULT_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "ai-grinners-profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+MAX_STACK_DEPTH = 128
+
+MODES = ("cpu", "wall")
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already running in this worker"""
+
+
+def frame_label(frame) -> str:
+    """module:Qualified.name for one frame"""
+    code = frame.f_code
+    module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame, limit: int = MAX_STACK_DEPTH) -> str:
+    """Root-first, ';'-joined stack of frame and its callers"""
+    labels = []
+    while frame is not None and len(labels) < limit:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _thread_cpu_clock(ident: int) -> Optional[float]:
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError, OverflowError):
+        return None
+
+
+class SamplingProfiler:
+    """Counts the stacks of every thread in this process at a fixed interval"""
+
+    def __init__(self, interval: float = PROFILE_DEFAULT_INTERVAL, mode: str = "cpu",
+                 max_seconds: float = PROFILE_MAX_SECONDS):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.interval = max(0.001, interval)
+        self.mode = mode
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._start = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._cpu: Dict[int, float] = {}
+
+    def _sample(self, own_ident: int):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if self.mode == "cpu":
+                clock = _thread_cpu_clock(ident)
+                if clock is not None:
+                    previous = self._cpu.get(ident)
+                    self._cpu[ident] = clock
+                    if previous is None or clock <= previous:
+                        continue
+            thread = names.get(ident, "thread")
+            self.stacks[f"{thread};{collapse(frame)}"] += 1
+        self.samples += 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        deadline = time.perf_counter() + self.max_seconds
+        next_sample = time.perf_counter()
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            self._sample(own_ident)
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind (slow walk or busy CPU): skip missed ticks rather than burst
+                next_sample = time.perf_counter()
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._start
+        return self.result()
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope input, heaviest stacks first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 25) -> List[Dict]:
+        """Functions by self samples (leaf frame) and total samples (anywhere on the stack)"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                total_counts[label] += count
+        stacked = sum(self.stacks.values()) or 1
+        return [
+            {
+                "function": label,
+                "self": count,
+                "self_pct": round(count / stacked * 100, 1),
+                "total": total_counts[label],
+                "total_pct": round(total_counts[label] / stacked * 100, 1)
+            }
+            for label, count in self_counts.most_common(limit)
+        ]
+
+    def result(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "scope": "worker",
+            "interval_ms": round(self.interval * 1000, 2),
+            "started_at": self.started_at,
+            "duration_seconds": round(self.duration, 3),
+            "samples": self.samples,
+            "stacks": sum(self.stacks.values()),
+            "top": self.top(),
+            "collapsed": self.collapsed()
+        }
+
+
+_active_lock = threading.Lock()
+
+
+def start_profile(interval: float = PROFILE_DEFAULT_INTERVAL, mode: str = "cpu",
+                  max_seconds: float = PROFILE_MAX_SECONDS) -> SamplingProfiler:
+    """Start the worker's single profiler or raise ProfilerBusy; call finish_profile() after"""
+    if not _active_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        return SamplingProfiler(interval, mode, min(max_seconds, PROFILE_MAX_SECONDS)).start()
+    except Exception:
+        _active_lock.release()
+        raise
+
+
+def finish_profile(profiler: SamplingProfiler) -> Dict:
+    try:
+        return profiler.stop()
+    finally:
+        _active_lock.release()
+
+
+class ProfileStore:
+    """Recent profile results as JSON files shared by the workers on a host"""
+
+    def __init__(self, directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def save(self, result: Dict) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = uuid.uuid4().hex[:12]
+        tmp = self._path(profile_id) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(dict(result, id=profile_id), f)
+        os.replace(tmp, self._path(profile_id))
+        self._prune()
+        return profile_id
+
+    def load(self, profile_id: str) -> Optional[Dict]:
+        if not profile_id.isalnum():
+            return None
+        try:
+            with open(self._path(profile_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _prune(self):
+        try:
+            files = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(".json")]
+            files.sort(key=os.path.getmtime, reverse=True)
+            for path in files[self.keep:]:
+                os.remove(path)
+        except OSError as e:
+            logger.debug(f"Profile prune failed: {e}")
+
+
+class ProfileMiddleware:
+    """
+    Profile one request when it carries `X-Profile: 1` (or cpu/wall) and
+    authorize(headers) allows it. The samples cover the whole worker for the
+    request's duration; concurrent_requests in the result is the peak number
+    of other requests in flight, 0 meaning the profile is the request's alone.
+    """
+
+    def __init__(self, app, authorize: Callable[[Dict[str, str]], bool], store: Optional[ProfileStore] = None):
+        self.app = app
+        self.authorize = authorize
+        self.store = store or profile_store
+        self.in_flight = 0
+        self._peak = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.in_flight += 1
+        self._peak = max(self._peak, self.in_flight)
+        try:
+            await self._handle(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def _handle(self, scope, receive, send):
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        requested = headers.get("x-profile", "").lower()
+        # authorize() may hit the database and saving writes a file: both run off the event loop
+        if requested not in ("1", "true", "cpu", "wall") or not await asyncio.to_thread(self.authorize, headers):
+            return await self.app(scope, receive, send)
+
+        try:
+            profiler = start_profile(mode="wall" if requested == "wall" else "cpu")
+        except ProfilerBusy:
+            return await self.app(scope, receive, self._with_header(send, b"x-profile", b"busy"))
+
+        # One profile runs at a time, so a single peak counter is enough
+        self._peak = self.in_flight
+        finished = False
+
+        async def send_wrapper(message):
+            nonlocal finished
+            if message["type"] == "http.response.start" and not finished:
+                # Stop at the response head: the profile covers the handler, not the client's read
+                finished = True
+                result = finish_profile(profiler)
+                result["path"] = scope.get("path")
+                result["concurrent_requests"] = self._peak - 1
+                profile_id = await asyncio.to_thread(self.store.save, result)
+                logger.info(f"Profiled {scope.get('method')} {scope.get('path')}: {result['samples']} samples, id {profile_id}")
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                finish_profile(profiler)
+
+    @staticmethod
+    def _with_header(send, name: bytes, value: bytes):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [(name, value)])
+            await send(message)
+        return send_wrapper
+
+
+# Global profile store
+profile_store = ProfileStore()
@@ -0,0 +1,91 @@
+"""
+Atomic analysis quota accounting
+
+Quota is reserved with a single conditional UPDATE (quota > 0) before any
+work starts and refunded if the work fails or turns out to be unnecessary
+(e.g. a cache hit). No ORM object is held across the crawl, so concurrent
+analyses by the same user can never overdraw it and no DB session stays
+checked out while a site is being fetched.
+"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy import update
+
+from models import SessionLocal, User, engine
+from user_cache import user_cache
+
+logger = logging.getLogger("ai-grinners.quota")
+
+
+class QuotaExceeded(Exception):
+    """Raised when a user has no quota left"""
+
+
+def _apply(user_id: int, delta: int, require_positive: bool) -> Optional[int]:
+    """Add delta to a user's quota in one statement. Returns new quota or None if no row matched"""
+    stmt = update(User).where(User.id == user_id)
+    if require_positive:
+        stmt = stmt.where(User.quota > 0)
+    stmt = stmt.values(quota=User.quota + delta)
+
+    db = SessionLocal()
+    try:
+        if engine.dialect.update_returning:
+            remaining = db.execute(stmt.returning(User.quota)).scalar()
+            db.commit()
+        else:
+            result = db.execute(stmt)
+            db.commit()
+            if result.rowcount == 0:
+                return None
+            remaining = db.query(User.quota).filter(User.id == user_id).scalar()
+    finally:
+        db.close()
+
+    user_cache.invalidate(user_id=user_id)
+    return remaining
+
+
+def reserve_quota(user_id: int) -> int:
+    """Take one unit of quota or raise QuotaExceeded. Returns remaining quota"""
+    remaining = _apply(user_id, -1, require_positive=True)
+    if remaining is None:
+        raise QuotaExceeded()
+    return remaining
+
+
+def refund_quota(user_id: int) -> Optional[int]:
+    """Give back one unit of quota"""
+    return _apply(user_id, 1, require_positive=False)
+
+
+class QuotaReservation:
+    """
+    Reserve one unit on enter; refund on exit unless commit() was called.
+
+        with QuotaReservation(user.id) as reservation:
+            ...
+            reservation.commit()
+    """
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.remaining: Optional[int] = None
+        self.committed = False
+
+    def __enter__(self) -> "QuotaReservation":
+        self.remaining = reserve_quota(self.user_id)
+        return self
+
+    def commit(self):
+        self.committed = True
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.committed:
+            try:
+                self.remaining = refund_quota(self.user_id)
+            except Exception as e:
+                logger.error(f"Quota refund failed for user {self.user_id}: {e}")
+        return False
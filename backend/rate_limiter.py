@@ -0,0 +1,196 @@
+"""
+Rate limiting with O(1) GCRA (token bucket) state per key
+
+Each key stores a single "theoretical arrival time" (TAT) instead of a list
+of request timestamps, so checks are constant time and memory is one float
+per active key. Idle keys are evicted once their bucket has fully refilled.
+
+Backends:
+- memory (default): per-process, thread-safe
+- sqlite: shared file, limits hold across all workers on the same host
+
+Configure with RATE_LIMIT_BACKEND=sqlite and RATE_LIMIT_DB=/path/to/file.db
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("ai-grinners.rate_limiter")
+
+DEFAULT_LIMITS = {
+    "default": (60, 60),      # 60 requests per 60 seconds
+    "analyze": (10, 60),       # 10 analysis requests per minute
+    "login": (5, 60),          # 5 login attempts per minute
+}
+
+
+class MemoryBackend:
+    """In-process TAT store with idle-key eviction"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.state: "OrderedDict[str, float]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def update(self, key: str, interval: float, window: float, now: float) -> Tuple[bool, float]:
+        """Apply one GCRA step. Returns (allowed, seconds until next allowed)"""
+        with self.lock:
+            tat = max(self.state.get(key, now), now)
+            new_tat = tat + interval
+            allow_at = new_tat - window
+
+            if now < allow_at:
+                return False, allow_at - now
+
+            self.state[key] = new_tat
+            self.state.move_to_end(key)
+            self._evict(now)
+            return True, 0.0
+
+    def peek(self, key: str, interval: float, window: float, now: float) -> float:
+        """Seconds until the next request for key would be allowed"""
+        with self.lock:
+            tat = self.state.get(key)
+        if tat is None:
+            return 0.0
+        return max(0.0, tat + interval - window - now)
+
+    def reset(self, key: str):
+        with self.lock:
+            self.state.pop(key, None)
+
+    def _evict(self, now: float):
+        # Keys are ordered by last update, so stale entries sit at the front.
+        # Stopping at the first live key keeps eviction amortized O(1).
+        while self.state:
+            key, tat = next(iter(self.state.items()))
+            if tat > now and len(self.state) <= self.max_keys:
+                break
+            del self.state[key]
+
+    def clear(self):
+        with self.lock:
+            self.state.clear()
+
+    def __len__(self):
+        return len(self.state)
+
+
+class SQLiteBackend:
+    """TAT store in a shared SQLite file so all workers see the same buckets"""
+
+    def __init__(self, path: str, evict_every: int = 1000):
+        self.path = path
+        self.evict_every = evict_every
+        self.local = threading.local()
+        self.calls = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def update(self, key: str, interval: float, window: float, now: float) -> Tuple[bool, float]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0] if row else now, now)
+            new_tat = tat + interval
+            allow_at = new_tat - window
+
+            if now < allow_at:
+                conn.execute("COMMIT")
+                return False, allow_at - now
+
+            conn.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, new_tat)
+            )
+            self.calls += 1
+            if self.calls % self.evict_every == 0:
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+            conn.execute("COMMIT")
+            return True, 0.0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def peek(self, key: str, interval: float, window: float, now: float) -> float:
+        row = self._conn().execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return 0.0
+        return max(0.0, row[0] + interval - window - now)
+
+    def reset(self, key: str):
+        self._conn().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM rate_limits")
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RateLimiter:
+    """GCRA rate limiter: `max_requests` burst, refilled evenly over `window` seconds"""
+
+    def __init__(self, backend=None, limits: Optional[Dict[str, Tuple[int, int]]] = None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.limits = dict(limits or DEFAULT_LIMITS)
+
+    def _params(self, limit_type: str) -> Tuple[float, float]:
+        max_requests, window = self.limits.get(limit_type, self.limits["default"])
+        return window / max_requests, float(window)
+
+    def check(self, key: str, limit_type: str = "default") -> Tuple[bool, int]:
+        """Consume one request for key. Returns (allowed, retry_after seconds)"""
+        interval, window = self._params(limit_type)
+        allowed, wait = self.backend.update(key, interval, window, time.time())
+        return allowed, int(math.ceil(wait))
+
+    def is_allowed(self, key: str, limit_type: str = "default") -> bool:
+        """Check if request is allowed"""
+        return self.check(key, limit_type)[0]
+
+    def get_retry_after(self, key: str, limit_type: str = "default") -> int:
+        """Get seconds until the next request for key is allowed"""
+        interval, window = self._params(limit_type)
+        return int(math.ceil(self.backend.peek(key, interval, window, time.time())))
+
+    def reset(self, key: str):
+        """Refill key's bucket"""
+        self.backend.reset(key)
+
+    def clear(self):
+        """Forget all buckets"""
+        self.backend.clear()
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the limiter configured by RATE_LIMIT_BACKEND / RATE_LIMIT_DB"""
+    backend_name = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend_name == "sqlite":
+        path = os.getenv("RATE_LIMIT_DB", "/tmp/ai-grinners-ratelimit.db")
+        try:
+            logger.info(f"Using shared SQLite rate limiter at {path}")
+            return RateLimiter(SQLiteBackend(path))
+        except Exception as e:
+            logger.error(f"SQLite rate limiter unavailable ({e}), falling back to memory")
+    return RateLimiter(MemoryBackend())
@@ -0,0 +1,140 @@
+"""
+Materialized daily rollups for report and analytics counters
+
+Counters are bumped in the same transaction that writes the underlying row,
+so dashboards read O(days x types) rollup rows instead of scanning history.
+Existing data is loaded automatically at startup (ensure_rollups() backfills
+any rollup table that is still empty while its source has rows), or by hand
+with the backfill command, which always rebuilds:
+
+    python rollups.py backfill            # both report and analytics rollups
+    python rollups.py backfill --reports  # analysis_reports only
+"""
+
+import argparse
+import logging
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger("ai-grinners.rollups")
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def increment(session, rollup_model, day: date, report_type: Optional[str], user_id: Optional[int], amount: int = 1):
+    """Add amount to one (day, type, user) counter inside the caller's transaction"""
+    report_type = report_type or "unknown"
+    user_id = user_id or 0
+    match = session.query(rollup_model).filter(
+        rollup_model.day == day,
+        rollup_model.report_type == report_type,
+        rollup_model.user_id == user_id
+    )
+
+    if match.update({rollup_model.count: rollup_model.count + amount}, synchronize_session=False):
+        return
+
+    try:
+        with session.begin_nested():
+            session.add(rollup_model(day=day, report_type=report_type, user_id=user_id, count=amount))
+    except IntegrityError:
+        # Another writer created the row first
+        match.update({rollup_model.count: rollup_model.count + amount}, synchronize_session=False)
+
+
+def backfill(session, rollup_model, source_model, timestamp_col, type_col, user_col) -> int:
+    """Rebuild rollup_model from source_model with one GROUP BY. Returns rows written"""
+    day_col = func.date(timestamp_col)
+    rows = session.query(
+        day_col,
+        func.coalesce(type_col, "unknown"),
+        func.coalesce(user_col, 0),
+        func.count()
+    ).group_by(day_col, func.coalesce(type_col, "unknown"), func.coalesce(user_col, 0)).all()
+
+    session.query(rollup_model).delete(synchronize_session=False)
+    session.bulk_save_objects([
+        rollup_model(day=_as_date(day), report_type=report_type, user_id=user_id, count=count)
+        for day, report_type, user_id, count in rows
+        if day is not None
+    ])
+    session.commit()
+    return len(rows)
+
+
+def backfill_if_empty(session, rollup_model, source_model, timestamp_col, type_col, user_col) -> int:
+    """backfill() only when rollup_model has no rows and source_model has some (idempotent)"""
+    if session.query(rollup_model).first() is not None or session.query(source_model).first() is None:
+        return 0
+    try:
+        return backfill(session, rollup_model, source_model, timestamp_col, type_col, user_col)
+    except IntegrityError:
+        # Another worker backfilled at the same time
+        session.rollback()
+        return 0
+
+
+def record_report(session, report_type: str, user_id: Optional[int], when: Optional[datetime] = None):
+    """Count one AnalysisReport in report_daily_rollups"""
+    from models import ReportDailyRollup
+    increment(session, ReportDailyRollup, _as_date(when or datetime.utcnow()), report_type, user_id)
+
+
+def backfill_reports(only_if_empty: bool = False) -> int:
+    from models import Base, engine, SessionLocal, AnalysisReport, ReportDailyRollup
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        return (backfill_if_empty if only_if_empty else backfill)(
+            session, ReportDailyRollup, AnalysisReport,
+            AnalysisReport.created_at, AnalysisReport.report_type, AnalysisReport.user_id)
+    finally:
+        session.close()
+
+
+def backfill_analytics(only_if_empty: bool = False) -> int:
+    from local_services import get_db_session, AnalysisHistory, AnalyticsDailyRollup
+    session = get_db_session()
+    if session is None:
+        return 0
+    try:
+        return (backfill_if_empty if only_if_empty else backfill)(
+            session, AnalyticsDailyRollup, AnalysisHistory,
+            AnalysisHistory.timestamp, AnalysisHistory.analysis_type, AnalysisHistory.user_id)
+    finally:
+        session.close()
+
+
+def ensure_rollups():
+    """Startup hook: load history into rollup tables that are still empty"""
+    for name, load in (("report_daily_rollups", backfill_reports), ("analytics_daily_rollups", backfill_analytics)):
+        try:
+            rows = load(only_if_empty=True)
+            if rows:
+                logger.info(f"Backfilled {name}: {rows} rows")
+        except Exception as e:
+            logger.warning(f"Could not backfill {name}: {e}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Maintain daily rollup tables")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--reports", action="store_true", help="Only rebuild report_daily_rollups")
+    parser.add_argument("--analytics", action="store_true", help="Only rebuild analytics_daily_rollups")
+    args = parser.parse_args()
+
+    both = not args.reports and not args.analytics
+    if args.reports or both:
+        logger.info(f"report_daily_rollups: {backfill_reports()} rows")
+    if args.analytics or both:
+        logger.info(f"analytics_daily_rollups: {backfill_analytics()} rows")
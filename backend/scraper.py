@@ -1,12 +1,18 @@
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
+from http.cookiejar import DefaultCookiePolicy
 import time
-from typing import Dict, List, Set, Optional
+from typing import Callable, Dict, List, Set, Optional
 import re
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import random
+import os
+
+from keyword_engine import extract_keywords, extract_keywords_from_pages
+from metrics import CRAWL_PAGES, CRAWL_STAGE, instrumented_session, reset_connection_timings
+from tracing import annotate, traced
 
 # Setup logging
 logger = logging.getLogger("ai-grinners.scraper")
@@ -25,6 +31,16 @@ def get_random_user_agent() -> str:
 # For backward compatibility
 USER_AGENT = USER_AGENTS[0]
 
+# Body text kept per page when a crawl feeds the search index
+PAGE_TEXT_LIMIT = int(os.getenv("PAGE_TEXT_LIMIT", "20000"))
+
+# Keep-alive session whose connections report DNS/connect time to /metrics.
+# It is shared by every crawl for every user, so it must not keep cookies:
+# one crawl's consent, A/B or login cookies would otherwise be sent on later
+# crawls of that site by other users.
+session = instrumented_session()
+session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
 def analyze_page_technical_seo(soup, url: str) -> Dict:
     """Deep technical SEO analysis"""
     try:
@@ -76,7 +92,7 @@ def analyze_page_technical_seo(soup, url: str) -> Dict:
         return {
             'title': {'text': title_text, 'length': len(title_text), 'score': title_score},
             'meta_description': {'text': desc_text, 'length': len(desc_text), 'score': desc_score},
-            'headers': {'h1_count': len(h1_tags), 'h2_count': len(h2_tags), 'h3_count': len(h3_tags), 'score': headers_score, 'h1_texts': [h1.text.strip() for h1 in h1_tags][:3]},
+            'headers': {'h1_count': len(h1_tags), 'h2_count': len(h2_tags), 'h3_count': len(h3_tags), 'score': headers_score, 'h1_texts': [h1.text.strip() for h1 in h1_tags][:3], 'h2_texts': [h2.text.strip() for h2 in h2_tags][:5]},
             'images': {'total': len(images), 'with_alt': len(images_with_alt), 'alt_coverage': alt_coverage},
             'links': {'internal': len(set(internal_links))},
             'content': {'word_count': word_count},
@@ -87,7 +103,7 @@ def analyze_page_technical_seo(soup, url: str) -> Dict:
         return {
             'title': {'text': '', 'length': 0, 'score': 0},
             'meta_description': {'text': '', 'length': 0, 'score': 0},
-            'headers': {'h1_count': 0, 'h2_count': 0, 'h3_count': 0, 'score': 0, 'h1_texts': []},
+            'headers': {'h1_count': 0, 'h2_count': 0, 'h3_count': 0, 'score': 0, 'h1_texts': [], 'h2_texts': []},
             'images': {'total': 0, 'with_alt': 0, 'alt_coverage': 0},
             'links': {'internal': 0},
             'content': {'word_count': 0},
@@ -95,12 +111,21 @@ def analyze_page_technical_seo(soup, url: str) -> Dict:
             'overall_score': 0
         }
 
-def get_page_content(url: str, timeout: int = 20, retries: int = 2) -> Dict:
-    """Enhanced page content extraction with retries"""
+def page_body_text(soup, limit: int = PAGE_TEXT_LIMIT) -> str:
+    """Visible text of a page (scripts and styles removed), capped at limit chars"""
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    return soup.get_text(separator=' ', strip=True)[:limit]
+
+@traced("fetch_page")
+def get_page_content(url: str, timeout: int = 20, retries: int = 2, keep_text: bool = False) -> Dict:
+    """Enhanced page content extraction with retries (keep_text adds the body text as 'text')"""
     if not url.startswith('http'):
         url = 'https://' + url
+    annotate(url=url)
 
     for attempt in range(retries + 1):
+        annotate(attempts=attempt + 1)
         try:
             headers = {
                 'User-Agent': get_random_user_agent(),
@@ -110,35 +135,59 @@ def get_page_content(url: str, timeout: int = 20, retries: int = 2) -> Dict:
                 'Connection': 'keep-alive',
             }
 
-            response = requests.get(
+            timings = reset_connection_timings()
+            response = session.get(
                 url,
                 headers=headers,
                 timeout=timeout,
                 allow_redirects=True,
-                verify=True
+                verify=True,
+                stream=True
             )
 
             if response.status_code == 429:  # Rate limited
+                response.close()
+                annotate(rate_limited=True)
                 wait_time = 2 ** attempt
                 logger.warning(f"Rate limited on {url}, waiting {wait_time}s")
                 time.sleep(wait_time)
                 continue
 
             if response.status_code != 200:
+                response.close()
+                annotate(status=response.status_code)
+                CRAWL_PAGES.inc(status="error")
                 return {'url': url, 'status': 'error', 'error': f'HTTP {response.status_code}'}
 
+            # elapsed runs until the headers arrive, including any new connection
+            ttfb = max(0.0, response.elapsed.total_seconds() - timings["dns"] - timings["connect"])
+            stage_start = time.perf_counter()
+            content = response.content
+            download = time.perf_counter() - stage_start
+
             # Use html.parser (built-in, no dependencies)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            stage_start = time.perf_counter()
+            soup = BeautifulSoup(content, 'html.parser')
+            parse = time.perf_counter() - stage_start
 
             # Detect tracking pixels
-            html_content = str(response.content)
+            stage_start = time.perf_counter()
+            html_content = str(content)
             trackers = detect_tracking_pixels(soup, html_content)
             analysis = analyze_page_technical_seo(soup, url)
 
             # Extract internal links more thoroughly
             links = extract_internal_links(soup, url)
+            analyze = time.perf_counter() - stage_start
 
-            return {
+            stages = {"dns": timings["dns"], "connect": timings["connect"], "ttfb": ttfb,
+                      "download": download, "parse": parse, "analyze": analyze}
+            for stage in ("ttfb", "download", "parse", "analyze"):
+                CRAWL_STAGE.observe(stages[stage], stage=stage)
+            CRAWL_PAGES.inc(status="success")
+            annotate(status=200, bytes=len(content), **{f"{k}_ms": round(v * 1000, 1) for k, v in stages.items()})
+
+            page = {
                 'url': url,
                 'status': 'success',
                 'analysis': analysis,
@@ -146,36 +195,48 @@ def get_page_content(url: str, timeout: int = 20, retries: int = 2) -> Dict:
                 'internal_links': links,
                 'response_time': response.elapsed.total_seconds()
             }
+            if keep_text:
+                page['text'] = page_body_text(soup)
+            return page
 
         except requests.exceptions.Timeout:
             logger.warning(f"Timeout on {url} (attempt {attempt + 1}/{retries + 1})")
+            annotate(timeouts=attempt + 1)
             if attempt < retries:
                 time.sleep(1)
                 continue
+            CRAWL_PAGES.inc(status="timeout")
             return {'url': url, 'status': 'error', 'error': 'Request timeout'}
 
         except requests.exceptions.SSLError:
             logger.warning(f"SSL error on {url}, trying without verify")
+            annotate(ssl_fallback=True)
             try:
                 response = requests.get(url, headers=headers, timeout=timeout, verify=False)
                 soup = BeautifulSoup(response.content, 'html.parser')
-                return {
+                page = {
                     'url': url,
                     'status': 'success',
                     'analysis': analyze_page_technical_seo(soup, url),
                     'trackers': detect_tracking_pixels(soup, str(response.content)),
                     'internal_links': extract_internal_links(soup, url)
                 }
+                if keep_text:
+                    page['text'] = page_body_text(soup)
+                return page
             except Exception as e:
                 return {'url': url, 'status': 'error', 'error': f'SSL Error: {str(e)}'}
 
         except Exception as e:
             logger.error(f"Error crawling {url}: {str(e)}")
+            annotate(last_error=str(e)[:200])
             if attempt < retries:
                 time.sleep(1)
                 continue
+            CRAWL_PAGES.inc(status="error")
             return {'url': url, 'status': 'error', 'error': str(e)}
 
+    CRAWL_PAGES.inc(status="error")
     return {'url': url, 'status': 'error', 'error': 'Max retries exceeded'}
 
 
@@ -220,10 +281,14 @@ def extract_internal_links(soup, base_url: str) -> List[str]:
 
     return list(links)[:50]  # Return up to 50 internal links
 
-def crawl_site(domain: str, max_pages: int = 50) -> Dict:
+@traced("crawl_site")
+def crawl_site(domain: str, max_pages: int = 50, page_sink: Optional[Callable[[Dict], None]] = None) -> Dict:
     """
     Enhanced crawler that reliably crawls up to max_pages.
     Uses BFS with priority queue and parallel fetching.
+
+    page_sink, if given, receives each successful page (with its body text
+    as 'text') as soon as it is fetched; the text is not kept in the result.
     """
     if not domain.startswith('http'):
         base_url = 'https://' + domain
@@ -241,6 +306,7 @@ def crawl_site(domain: str, max_pages: int = 50) -> Dict:
     all_trackers: Dict = {}
 
     logger.info(f"🔍 Starting crawl of {domain} - Target: {max_pages} pages")
+    annotate(domain=domain, max_pages=max_pages)
     start_time = time.time()
 
     # Phase 1: BFS crawl with link discovery
@@ -266,9 +332,15 @@ def crawl_site(domain: str, max_pages: int = 50) -> Dict:
                 break
 
             logger.debug(f"  📄 Crawling page {len(pages_data)+1}/{max_pages}: {url[:60]}...")
-            page_data = get_page_content(url)
+            page_data = get_page_content(url, keep_text=page_sink is not None)
 
             if page_data['status'] == 'success':
+                if page_sink is not None:
+                    try:
+                        page_sink(page_data)
+                    except Exception as e:
+                        logger.warning(f"Page sink failed for {url}: {e}")
+                    page_data.pop('text', None)
                 pages_data.append(page_data)
 
                 # Merge trackers
@@ -288,6 +360,7 @@ def crawl_site(domain: str, max_pages: int = 50) -> Dict:
             time.sleep(0.15)
 
     elapsed = round(time.time() - start_time, 1)
+    annotate(pages=len(pages_data), failed=len(failed_urls))
     logger.info(f"✅ Crawled {len(pages_data)} pages from {domain} in {elapsed}s")
 
     if pages_data:
@@ -428,42 +501,56 @@ def find_social_accounts(domain: str) -> Dict:
     except:
         return {'facebook': None, 'tiktok': None, 'instagram': None}
 
+def _format_keyword(kw: Dict) -> Dict:
+    score = kw["score"]
+    result = {
+        "term": kw["term"],
+        "volume": "Analyzing...",
+        "difficulty": "Medium" if score > 0.5 else "Low",
+        "priority": "high" if score < 0.3 else "medium",
+        "current_rank": "Not ranking",
+        "cpc": "N/A"
+    }
+    if "pages" in kw:
+        result["pages"] = kw["pages"]
+    return result
+
+
 def extract_keywords_with_yake(text: str, top_n: int = 20) -> List[Dict]:
     """Extract keywords from text using YAKE"""
     try:
-        import yake
-        
-        # Configure YAKE
-        kw_extractor = yake.KeywordExtractor(
-            lan="en",
-            n=3,  # max 3-word phrases
-            dedupLim=0.9,
-            dedupFunc='seqm',
-            windowsSize=1,
-            top=70
-        )
-        
-        # Extract keywords
-        keywords = kw_extractor.extract_keywords(text)
-        
-        # Format results
-        results = []
-        for kw, score in keywords:
-            results.append({
-                "term": kw,
-                "volume": "Analyzing...",
-                "difficulty": "Medium" if score > 0.5 else "Low",
-                "priority": "high" if score < 0.3 else "medium",
-                "current_rank": "Not ranking",
-                "cpc": "N/A"
-            })
-        
-        return results
+        return [_format_keyword(kw) for kw in extract_keywords(text, top_n)]
     except Exception as e:
         print(f"Error extracting keywords: {str(e)}")
         return []
 
 
+def extract_site_keywords(page_texts: List[str], top_n: int = 20) -> List[Dict]:
+    """YAKE keywords per crawled page, merged across the site"""
+    try:
+        return [_format_keyword(kw) for kw in extract_keywords_from_pages(page_texts, top_n)]
+    except Exception as e:
+        print(f"Error extracting keywords: {str(e)}")
+        return []
+
+
+def crawl_page_texts(site_data: Dict) -> List[str]:
+    """page_keyword_text() of every analyzed page in a crawl_site() result"""
+    return [page_keyword_text(page['analysis']) for page in site_data.get('pages', []) if 'analysis' in page]
+
+
+def page_keyword_text(analysis: Dict) -> str:
+    """Title, meta description and headings of one analyze_page_technical_seo() result"""
+    headers = analysis.get('headers', {})
+    parts = [
+        analysis.get('title', {}).get('text', ''),
+        analysis.get('meta_description', {}).get('text', ''),
+        *headers.get('h1_texts', []),
+        *headers.get('h2_texts', [])
+    ]
+    return ". ".join(p for p in parts if p)
+
+
 def detect_tracking_pixels(soup, html_content: str) -> Dict:
     """Detect tracking pixels and analytics"""
     trackers = {
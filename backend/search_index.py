@@ -0,0 +1,309 @@
+"""
+Full-text search over every page a workspace has crawled
+
+Pages are written to a SQLite FTS5 index as crawls run (crawl_site's
+page_sink), so analysed sites stay searchable without re-crawling:
+
+- one row per (workspace, url); re-crawls upsert, unchanged pages are
+  skipped by content digest so the index doesn't churn
+- the workspace is an indexed token, so a query only intersects posting
+  lists inside that workspace even when the index holds millions of pages
+- BM25 ranking weighted title > headings > description > body, with
+  HTML-escaped snippets around the matched terms
+
+    with search_index.sink(user.id, "example.com") as sink:
+        crawl_site("example.com", 15, page_sink=sink)
+    search_index.search(user.id, "running shoes", domain="example.com")
+"""
+
+import hashlib
+import html
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from tracing import span
+
+logger = logging.getLogger("ai-grinners.search_index")
+
+SEARCH_INDEX_BATCH = int(os.getenv("SEARCH_INDEX_BATCH", "25"))
+MAX_SEARCH_RESULTS = 100
+
+# Column weights for bm25(): workspace, title, headings, description, body
+RANK_WEIGHTS = (0.0, 8.0, 4.0, 2.0, 1.0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    workspace TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    headings TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    body TEXT NOT NULL DEFAULT '',
+    digest TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    UNIQUE (workspace, url)
+);
+CREATE INDEX IF NOT EXISTS pages_workspace_domain ON pages (workspace, domain);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    workspace, title, headings, description, body,
+    content='pages', content_rowid='id', tokenize='porter unicode61', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts (rowid, workspace, title, headings, description, body)
+    VALUES (new.id, new.workspace, new.title, new.headings, new.description, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, workspace, title, headings, description, body)
+    VALUES ('delete', old.id, old.workspace, old.title, old.headings, old.description, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, workspace, title, headings, description, body)
+    VALUES ('delete', old.id, old.workspace, old.title, old.headings, old.description, old.body);
+    INSERT INTO pages_fts (rowid, workspace, title, headings, description, body)
+    VALUES (new.id, new.workspace, new.title, new.headings, new.description, new.body);
+END;
+"""
+
+# Private-use sentinels around snippet matches, swapped for <mark> after escaping
+_MARK_OPEN, _MARK_CLOSE = "\ue000", "\ue001"
+_query_token = re.compile(r'"([^"]*)"|(\S+)')
+_word = re.compile(r"\w+")
+
+
+def workspace_token(workspace) -> str:
+    """Indexed token for a workspace (user id)"""
+    return f"ws{workspace}"
+
+
+def normalize_domain(domain: str) -> str:
+    """example.com for https://www.Example.com/path"""
+    domain = domain.strip().lower()
+    if "//" not in domain:
+        domain = "//" + domain
+    host = urlparse(domain).netloc or domain.strip("/")
+    return host[4:] if host.startswith("www.") else host
+
+
+def build_match(query: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 expression: every word must match,
+    "quoted phrases" match in order, a trailing * matches a prefix.
+    """
+    parts = []
+    for phrase, word in _query_token.findall(query):
+        if phrase:
+            words = _word.findall(phrase)
+            if words:
+                parts.append('"' + " ".join(words) + '"')
+        else:
+            words = _word.findall(word)
+            parts.extend(f'"{w}"' for w in words)
+            if words and word.endswith("*"):
+                parts[-1] += "*"
+    return " ".join(parts) or None
+
+
+def page_document(page: Dict) -> Optional[Dict]:
+    """Searchable fields of one successful get_page_content() result"""
+    analysis = page.get("analysis")
+    if not analysis or not page.get("url"):
+        return None
+    headers = analysis.get("headers", {})
+    return {
+        "url": page["url"].rstrip("/"),
+        "title": analysis.get("title", {}).get("text", ""),
+        "headings": " ".join(headers.get("h1_texts", []) + headers.get("h2_texts", [])),
+        "description": analysis.get("meta_description", {}).get("text", ""),
+        "body": page.get("text", "")
+    }
+
+
+class SearchIndex:
+    """SQLite FTS5 page index partitioned by workspace"""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """The connection, opened (and the schema created) on first use"""
+        if self._conn is None:
+            with self._open_lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        if self.db_path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        db.execute(
+            "INSERT INTO pages_fts (pages_fts, rank) VALUES ('rank', ?)",
+            (f"bm25({', '.join(str(w) for w in RANK_WEIGHTS)})",)
+        )
+        return db
+
+    def add_pages(self, workspace, domain: str, documents: Iterable[Dict]) -> int:
+        """Upsert page documents (see page_document); returns rows written"""
+        ws = workspace_token(workspace)
+        domain = normalize_domain(domain)
+        now = time.time()
+        rows = []
+        for doc in documents:
+            fields = [doc.get(k) or "" for k in ("title", "headings", "description", "body")]
+            digest = hashlib.sha1("\0".join(fields).encode("utf-8", "surrogatepass")).hexdigest()
+            rows.append((ws, domain, doc["url"], *fields, digest, now))
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                cursor = self._db.executemany(
+                    "INSERT INTO pages (workspace, domain, url, title, headings, description, body, digest, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (workspace, url) DO UPDATE SET "
+                    "domain = excluded.domain, title = excluded.title, headings = excluded.headings, "
+                    "description = excluded.description, body = excluded.body, "
+                    "digest = excluded.digest, indexed_at = excluded.indexed_at "
+                    "WHERE pages.digest != excluded.digest",
+                    rows
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            # Unchanged pages don't match the upsert's WHERE and aren't counted
+            return cursor.rowcount
+
+    def search(self, workspace, query: str, domain: Optional[str] = None, limit: int = 20, offset: int = 0) -> Dict:
+        """Ranked pages matching every query term, best first"""
+        start = time.perf_counter()
+        match = build_match(query)
+        results: List[Dict] = []
+        if match:
+            sql = (
+                "SELECT p.url, p.domain, p.title, p.description, p.indexed_at, "
+                "snippet(pages_fts, 4, ?, ?, '…', 24), rank "
+                "FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+                "WHERE pages_fts MATCH ?"
+            )
+            params: list = [_MARK_OPEN, _MARK_CLOSE, f"workspace : {workspace_token(workspace)} AND ({match})"]
+            if domain:
+                sql += " AND p.domain = ?"
+                params.append(normalize_domain(domain))
+            sql += " ORDER BY rank LIMIT ? OFFSET ?"
+            params += [min(max(limit, 1), MAX_SEARCH_RESULTS), max(offset, 0)]
+
+            with self._lock:
+                rows = self._db.execute(sql, params).fetchall()
+            for url, page_domain, title, description, indexed_at, snippet, rank in rows:
+                results.append({
+                    "url": url,
+                    "domain": page_domain,
+                    "title": title,
+                    "snippet": _highlight(snippet) or html.escape(description),
+                    "score": round(-rank, 4),
+                    "indexed_at": indexed_at
+                })
+
+        return {
+            "query": query,
+            "domain": normalize_domain(domain) if domain else None,
+            "results": results,
+            "count": len(results),
+            "took_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+
+    def domains(self, workspace) -> List[Dict]:
+        """Indexed domains of a workspace with page counts"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT domain, COUNT(*), MAX(indexed_at) FROM pages WHERE workspace = ? "
+                "GROUP BY domain ORDER BY domain",
+                (workspace_token(workspace),)
+            ).fetchall()
+        return [{"domain": d, "pages": n, "last_indexed": last} for d, n, last in rows]
+
+    def delete_workspace(self, workspace) -> int:
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM pages WHERE workspace = ?", (workspace_token(workspace),)
+            ).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.execute("INSERT INTO pages_fts (pages_fts) VALUES ('optimize')")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pages, workspaces = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT workspace) FROM pages"
+            ).fetchone()
+        return {"pages": pages, "workspaces": workspaces, "db_path": self.db_path}
+
+    def sink(self, workspace, domain: str) -> "PageSink":
+        """Buffered page_sink for crawl_site(); use as a context manager"""
+        return PageSink(self, workspace, domain)
+
+
+def _highlight(snippet: Optional[str]) -> str:
+    if not snippet:
+        return ""
+    return html.escape(snippet).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+class PageSink:
+    """Collects crawled pages and writes them to the index every SEARCH_INDEX_BATCH pages"""
+
+    def __init__(self, index: SearchIndex, workspace, domain: str, batch_size: int = SEARCH_INDEX_BATCH):
+        self.index = index
+        self.workspace = workspace
+        self.domain = domain
+        self.batch_size = batch_size
+        self.indexed = 0
+        self._pending: List[Dict] = []
+
+    def __call__(self, page: Dict):
+        doc = page_document(page)
+        if doc:
+            self._pending.append(doc)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            with span("search_index.write", pages=len(pending)):
+                self.index.add_pages(self.workspace, self.domain, pending)
+            self.indexed += len(pending)
+        except sqlite3.Error as e:
+            # Search is best-effort; never fail the crawl over it
+            logger.warning(f"Search indexing failed for {self.domain}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+        return False
+
+
+# Global search index instance (the database is opened on first use, not at import)
+search_index = SearchIndex(os.getenv("SEARCH_INDEX_DB", "./search_index.db"))
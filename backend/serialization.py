@@ -0,0 +1,68 @@
+"""
+JSON serialization for large API responses
+
+An analysis result is a big nested dict: every crawled page with its link
+list, for the site and each competitor. Encoding it once and passing the
+bytes around avoids both FastAPI's jsonable_encoder walk and the repeated
+json.dumps calls for the DB row and the cache:
+
+- dumps(obj) -> bytes: orjson when installed (UTF-8 out, several times
+  faster than json), stdlib json otherwise; loads() is the inverse
+- embed(envelope, data=raw): a JSON object from a small envelope dict plus
+  members that are already encoded, without decoding them again
+- RawJSONResponse sends bytes that are already JSON as they are
+- FastJSONResponse is JSONResponse rendered with dumps(); the app's
+  default response class, so plain dict endpoints benefit too
+"""
+
+import json
+import logging
+from typing import Any, Dict
+
+from fastapi.responses import JSONResponse, Response
+
+logger = logging.getLogger("ai-grinners.serialization")
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if ORJSON_AVAILABLE else 0
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def embed(envelope: Dict[str, Any], **raw: bytes) -> bytes:
+    """envelope as a JSON object with raw (already-encoded JSON) members appended"""
+    body = dumps(envelope)
+    if not raw:
+        return body
+    members = b",".join(dumps(key) + b":" + value for key, value in raw.items())
+    if body == b"{}":
+        return b"{" + members + b"}"
+    return body[:-1] + b"," + members + b"}"
+
+
+class RawJSONResponse(Response):
+    """Response for a body that is already JSON bytes"""
+    media_type = "application/json"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps()"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,7 @@
+"""
+Shared test setup: keep the global search index in memory so tests that
+import main never create or write ./search_index.db
+"""
+import os
+
+os.environ["SEARCH_INDEX_DB"] = ":memory:"
@@ -0,0 +1,218 @@
+"""
+Unit tests for unified_ads_analyzer and meta_ads_scraper
+Run with: pytest tests/test_ads_analyzer.py -v
+
+Runs against a local stand-in for the Meta Ad Library (cursor-paged) and
+the TikTok ads library, with configurable latency.
+"""
+import pytest
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meta_ads_scraper import MetaAdsLibraryScraper
+from unified_ads_analyzer import UnifiedAdsAnalyzer
+
+
+class AdsStandIn:
+    """Meta: total_ads ads, page_size per page, linked by an 'after' cursor; TikTok: an empty 200"""
+
+    def __init__(self, total_ads=50, page_size=20, meta_delay=0.0, tiktok_delay=0.0, meta_status=200):
+        self.total_ads = total_ads
+        self.page_size = page_size
+        self.meta_delay = meta_delay
+        self.tiktok_delay = tiktok_delay
+        self.meta_status = meta_status
+        self.meta_requests = []
+        self.tiktok_requests = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                if parsed.path == "/tiktok":
+                    stand_in.tiktok_requests += 1
+                    time.sleep(stand_in.tiktok_delay)
+                    return self.reply(200, b"<html></html>", "text/html")
+
+                stand_in.meta_requests.append(query)
+                time.sleep(stand_in.meta_delay)
+                if stand_in.meta_status != 200:
+                    return self.reply(stand_in.meta_status, json.dumps({"message": "rate limited"}).encode())
+                offset = int(query.get("after", ["0"])[0])
+                end = min(offset + stand_in.page_size, stand_in.total_ads)
+                page = {"data": [{"id": str(i), "page_name": "Brand"} for i in range(offset, end)]}
+                if end < stand_in.total_ads:
+                    page["paging"] = {"cursors": {"after": str(end)}, "next": f"{stand_in.url}/ads_archive?after={end}"}
+                self.reply(200, json.dumps(page).encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(**kwargs):
+        server = AdsStandIn(**kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def make_analyzer(server, **deadlines):
+    analyzer = UnifiedAdsAnalyzer()
+    analyzer.meta_scraper.base_url = f"{server.url}/ads_archive"
+    analyzer.tiktok_scraper.base_url = f"{server.url}/tiktok"
+    analyzer.deadlines.update(deadlines)
+    return analyzer
+
+
+class TestMetaPagination:
+    """Test cursor pagination in MetaAdsLibraryScraper"""
+
+    def test_follows_cursor_up_to_cap(self, stand_in):
+        """Test that pages are followed until max_ads"""
+        server = stand_in(total_ads=100, page_size=20)
+        scraper = MetaAdsLibraryScraper("token")
+        scraper.base_url = f"{server.url}/ads_archive"
+        result = scraper.search_ads("Brand", max_ads=50)
+        assert [ad["id"] for ad in result["data"]] == [str(i) for i in range(50)]
+        assert len(server.meta_requests) == 3
+
+    def test_single_page_by_default(self, stand_in):
+        """Test that without max_ads only the first page is read"""
+        server = stand_in(total_ads=100, page_size=20)
+        scraper = MetaAdsLibraryScraper("token")
+        scraper.base_url = f"{server.url}/ads_archive"
+        assert len(scraper.search_ads("Brand")["data"]) == 20
+        assert len(server.meta_requests) == 1
+
+    def test_stops_at_last_page_and_deadline(self, stand_in):
+        """Test the last page and a deadline both end the stream"""
+        server = stand_in(total_ads=30, page_size=20)
+        scraper = MetaAdsLibraryScraper("token")
+        scraper.base_url = f"{server.url}/ads_archive"
+        assert len(scraper.search_ads("Brand", max_ads=100)["data"]) == 30
+
+        server.meta_delay = 0.3
+        ads = list(scraper.iter_ads("Brand", max_ads=100, deadline=time.monotonic() + 0.4))
+        assert len(ads) == 20
+
+    def test_truncation_reported(self, stand_in):
+        """Test that a deadline before the cap marks the result truncated"""
+        server = stand_in(total_ads=100, page_size=20, meta_delay=0.3)
+        scraper = MetaAdsLibraryScraper("token")
+        scraper.base_url = f"{server.url}/ads_archive"
+        result = scraper.search_ads("Brand", max_ads=100, deadline=time.monotonic() + 0.8)
+        assert result["truncated"] is True
+        assert len(result["data"]) == 40
+        assert result["next"].endswith("after=40")
+
+        server.meta_delay = 0.0
+        assert "truncated" not in scraper.search_ads("Brand", max_ads=40)
+
+    def test_error(self, stand_in):
+        """Test that a failed first page is reported as an error"""
+        server = stand_in(meta_status=400)
+        scraper = MetaAdsLibraryScraper("token")
+        scraper.base_url = f"{server.url}/ads_archive"
+        assert scraper.search_ads("Brand") == {"error": {"message": "rate limited"}}
+
+
+class TestFanOut:
+    """Test concurrent platform fan-out, deadlines and caching"""
+
+    def test_concurrent_platforms(self, stand_in):
+        """Test that latency is the slowest platform, not the sum"""
+        server = stand_in(total_ads=10, meta_delay=0.4, tiktok_delay=0.4)
+        analyzer = make_analyzer(server)
+        start = time.perf_counter()
+        result = analyzer.analyze("brand.com")
+        assert time.perf_counter() - start < 0.75
+        assert result["platforms"]["meta"]["status"] == "success"
+        assert result["platforms"]["meta"]["total_ads"] == 10
+        assert result["platforms"]["tiktok"]["status"] == "manual_search_recommended"
+        assert "url" in result["platforms"]["google"]
+        assert "partial" not in result
+
+    def test_slow_platform_gives_partial_result(self, stand_in):
+        """Test that a platform past its deadline doesn't hold up the others"""
+        server = stand_in(total_ads=10, tiktok_delay=3.0)
+        analyzer = make_analyzer(server, tiktok=0.5)
+        start = time.perf_counter()
+        result = analyzer.analyze("brand.com")
+        assert time.perf_counter() - start < 1.0
+        assert result["partial"] is True
+        assert result["failed_platforms"] == ["tiktok"]
+        assert "error" in result["platforms"]["tiktok"]
+        assert result["platforms"]["meta"]["total_ads"] == 10
+        assert len(analyzer.cache) == 0
+
+    def test_meta_pagination_past_deadline_not_cached(self, stand_in):
+        """Test that Meta stopped mid-pagination is partial and not cached"""
+        server = stand_in(total_ads=100, page_size=20, meta_delay=0.3)
+        analyzer = make_analyzer(server, meta=1.0)
+        result = analyzer.analyze("brand.com")
+        assert result["platforms"]["meta"]["status"] == "partial"
+        assert 0 < result["platforms"]["meta"]["total_ads"] < 100
+        assert result["partial"] is True
+        assert result["failed_platforms"] == ["meta"]
+        assert len(analyzer.cache) == 0
+        assert "cached" not in analyzer.analyze("brand.com")
+
+    def test_platform_past_hard_deadline(self, stand_in, monkeypatch):
+        """Test that a platform that ignores its timeout is cut off"""
+        server = stand_in(total_ads=10)
+        analyzer = make_analyzer(server, google=0.3)
+        monkeypatch.setattr(analyzer.google_scraper, "search_ads", lambda domain: time.sleep(2) or {})
+        start = time.perf_counter()
+        result = analyzer.analyze("brand.com")
+        assert time.perf_counter() - start < 1.0
+        assert result["platforms"]["google"]["status"] == "timeout"
+        assert result["platforms"]["meta"]["status"] == "success"
+
+    def test_cached_per_brand_and_country(self, stand_in):
+        """Test that repeat calls are served from the cache"""
+        server = stand_in(total_ads=10)
+        analyzer = make_analyzer(server)
+        first = analyzer.analyze("brand.com", country="AE")
+        again = analyzer.analyze("brand.com", country="AE")
+        assert again["cached"] is True
+        assert again["platforms"] == first["platforms"]
+        assert len(server.meta_requests) == 1
+        assert server.meta_requests[0]["ad_reached_countries"] == ["AE"]
+
+        analyzer.analyze("brand.com", country="SA")
+        assert len(server.meta_requests) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
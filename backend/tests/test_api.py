@@ -11,7 +11,8 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from main import app, rate_limiter, analysis_cache
+from main import app, rate_limiter, analysis_cache, SECRET_KEY
+from user_cache import Principal, UserCache, user_cache
 
 
 @pytest.fixture
@@ -36,7 +37,7 @@ def auth_token(client):
 @pytest.fixture(autouse=True)
 def reset_rate_limiter():
     """Reset rate limiter before each test"""
-    rate_limiter.requests.clear()
+    rate_limiter.clear()
     yield
 
 
@@ -98,6 +99,96 @@ class TestAuthentication:
             else:
                 assert response.status_code == 429  # Rate limited
 
+    def test_account_limit_counts_failures_only(self, client, monkeypatch):
+        """Test that successful logins don't use up the account's bucket and reset it"""
+        import main
+        from credentials import get_password_hash
+        from models import Base, engine, SessionLocal, User
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        db.add(User(email="lockout-test@test.com", hashed_password=get_password_hash("pw"), quota=1))
+        db.commit()
+        monkeypatch.setattr(main, "get_geo_location", lambda ip: "Unknown")
+
+        def attempt(password, ip):
+            return client.post("/api/token", data={"username": "lockout-test@test.com", "password": password},
+                               headers={"X-Forwarded-For": ip}).status_code
+
+        try:
+            # Failures from several IPs, each under its own per-IP limit
+            assert [attempt("wrong", f"10.0.0.{i}") for i in range(4)] == [401] * 4
+            assert attempt("pw", "10.0.1.1") == 200
+            assert [attempt("pw", "10.0.1.2") for _ in range(3)] == [200] * 3
+
+            assert [attempt("wrong", f"10.0.2.{i}") for i in range(5)] == [401] * 5
+            assert attempt("pw", "10.0.3.1") == 429
+        finally:
+            db.query(User).filter(User.email == "lockout-test@test.com").delete()
+            db.commit()
+            db.close()
+
+
+class TestPasswordHashing:
+    """Test bounded password hashing"""
+
+    def test_needs_rehash_on_cost_change(self):
+        """Test that hashes with another cost factor are flagged"""
+        import bcrypt
+        from credentials import needs_rehash, BCRYPT_ROUNDS
+        other = bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=BCRYPT_ROUNDS + 1)).decode()
+        same = bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+        assert needs_rehash(other) is True
+        assert needs_rehash(same) is False
+
+    def test_pool_sheds_when_full(self):
+        """Test that a full queue raises instead of piling up"""
+        import threading
+        from credentials import PasswordWorkerPool, PasswordHashingBusy
+        pool = PasswordWorkerPool(workers=1, max_pending=1)
+        started, release = threading.Event(), threading.Event()
+
+        def hold():
+            started.set()
+            release.wait()
+
+        blocker = threading.Thread(target=pool.submit, args=(hold,))
+        blocker.start()
+        assert started.wait(5)
+        with pytest.raises(PasswordHashingBusy):
+            pool.submit(lambda: None)
+        release.set()
+        blocker.join()
+        assert pool.submit(lambda: 42) == 42
+
+    def test_login_sheds_with_503_when_pool_full(self, client, monkeypatch):
+        """Test that a saturated pool sheds logins, then serves them once it drains"""
+        import threading
+        import main
+        from credentials import PasswordWorkerPool, get_password_hash
+        from models import Base, engine, SessionLocal, User
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        db.add(User(email="shed-test@test.com", hashed_password=get_password_hash("pw"), quota=1))
+        db.commit()
+        pool = PasswordWorkerPool(workers=1, max_pending=1)
+        monkeypatch.setattr(main, "password_pool", pool)
+        monkeypatch.setattr(main, "get_geo_location", lambda ip: "Unknown")
+        release = threading.Event()
+        held = pool._queue(release.wait)
+        try:
+            response = client.post("/api/token", data={"username": "shed-test@test.com", "password": "pw"})
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "1"
+            release.set()
+            held.result()
+            response = client.post("/api/token", data={"username": "shed-test@test.com", "password": "pw"})
+            assert response.status_code == 200
+        finally:
+            release.set()
+            db.query(User).filter(User.email == "shed-test@test.com").delete()
+            db.commit()
+            db.close()
+
 
 class TestProtectedEndpoints:
     """Test protected API endpoints"""
@@ -113,6 +204,52 @@ class TestProtectedEndpoints:
         assert response.status_code == 401
 
 
+class TestPrincipalCache:
+    """Test cached principal resolution"""
+
+    @pytest.fixture(autouse=True)
+    def clear_user_cache(self):
+        user_cache.clear()
+        yield
+        user_cache.clear()
+
+    def _token(self, email):
+        from jose import jwt
+        return jwt.encode({"sub": email}, SECRET_KEY, algorithm="HS256")
+
+    def test_me_served_from_cache_without_db(self, client):
+        """Test that a cached principal skips the users query"""
+        user_cache.set(Principal(id=7, email="cached@test.com", role="user", quota=3, is_active=True))
+        with patch("main.SessionLocal", side_effect=AssertionError("DB touched")):
+            response = client.get("/api/me", headers={"Authorization": f"Bearer {self._token('cached@test.com')}"})
+        assert response.status_code == 200
+        assert response.json() == {"email": "cached@test.com", "id": 7, "quota": 3, "is_admin": False}
+
+    def test_inactive_principal_rejected(self, client):
+        """Test that deactivated users cannot use existing tokens"""
+        user_cache.set(Principal(id=8, email="off@test.com", role="user", quota=3, is_active=False))
+        response = client.get("/api/me", headers={"Authorization": f"Bearer {self._token('off@test.com')}"})
+        assert response.status_code == 403
+
+    def test_non_admin_rejected_from_admin_routes(self, client):
+        """Test that admin routes require the admin role"""
+        user_cache.set(Principal(id=9, email="plain@test.com", role="user", quota=3, is_active=True))
+        response = client.get("/api/admin/stats", headers={"Authorization": f"Bearer {self._token('plain@test.com')}"})
+        assert response.status_code == 403
+
+    def test_invalidate_and_ttl(self):
+        """Test explicit invalidation and expiry"""
+        cache = UserCache(ttl=60)
+        cache.set(Principal(id=1, email="a@test.com", role="user", quota=1, is_active=True))
+        assert cache.get("a@test.com").quota == 1
+        cache.invalidate("a@test.com")
+        assert cache.get("a@test.com") is None
+
+        cache = UserCache(ttl=0)
+        cache.set(Principal(id=1, email="a@test.com", role="user", quota=1, is_active=True))
+        assert cache.get("a@test.com") is None
+
+
 class TestRateLimiter:
     """Test rate limiter functionality"""
 
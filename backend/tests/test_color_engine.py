@@ -0,0 +1,95 @@
+"""
+Unit tests for color_engine module
+Run with: pytest tests/test_color_engine.py -v
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from color_engine import extract_palette, extract_palettes, palette_from_pixels, srgb_to_lab
+from local_services import analyze_image_colors
+from text_cache import text_cache
+
+
+def two_tone(width=100, height=100, split=60, left=(220, 20, 60), right=(30, 60, 200)):
+    array = np.zeros((height, width, 3), dtype=np.uint8)
+    array[:, :split] = left
+    array[:, split:] = right
+    return Image.fromarray(array)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    text_cache.clear()
+
+
+class TestPalette:
+    """Test palette extraction"""
+
+    def test_lab_reference_values(self):
+        """Test CIELAB conversion against known white/black/red values"""
+        lab = srgb_to_lab(np.array([[255, 255, 255], [0, 0, 0], [255, 0, 0]]))
+        assert lab[0] == pytest.approx([100, 0, 0], abs=0.05)
+        assert lab[1] == pytest.approx([0, 0, 0], abs=0.05)
+        assert lab[2] == pytest.approx([53.24, 80.09, 67.20], abs=0.05)
+
+    def test_flat_colors_and_shares(self):
+        """Test that a two-colour graphic yields exactly those two colours"""
+        palette = extract_palette(two_tone())
+        assert [p["color"] for p in palette] == ["#dc143c", "#1e3cc8"]
+        assert [p["percentage"] for p in palette] == [60.0, 40.0]
+        assert palette[0]["rgb"] == [220, 20, 60]
+
+    def test_noisy_photo_collapses_to_perceptual_colors(self):
+        """Test that per-pixel noise doesn't produce near-duplicate colours"""
+        rng = np.random.default_rng(0)
+        base = np.asarray(two_tone(200, 200, 120), dtype=np.int16)
+        noisy = np.clip(base + rng.integers(-12, 13, base.shape), 0, 255).astype(np.uint8)
+        palette = palette_from_pixels(noisy.reshape(-1, 3))
+        assert len(palette) == 2
+        assert palette[0]["percentage"] == pytest.approx(60, abs=1)
+        assert abs(palette[0]["rgb"][0] - 220) <= 4
+
+    def test_transparent_pixels_are_ignored(self):
+        """Test that a logo on a transparent background reports the logo colour"""
+        array = np.zeros((50, 50, 4), dtype=np.uint8)
+        array[10:40, 10:40] = (0, 128, 0, 255)
+        palette = extract_palette(Image.fromarray(array, "RGBA"))
+        assert palette == [{"color": "#008000", "rgb": [0, 128, 0], "percentage": 100.0}]
+
+    def test_slivers_are_dropped(self):
+        """Test that colours under MIN_SHARE percent are not reported"""
+        pixels = np.array([[255, 255, 255]] * 995 + [[0, 0, 0]] * 5, dtype=np.uint8)
+        assert [p["color"] for p in palette_from_pixels(pixels)] == ["#ffffff"]
+        assert palette_from_pixels(np.zeros((0, 3), dtype=np.uint8)) == []
+
+
+class TestCachingAndBatch:
+    """Test memoization and batch input"""
+
+    def test_same_pixels_hit_cache(self):
+        """Test that identical images are analysed once"""
+        extract_palette(two_tone())
+        extract_palette(two_tone())
+        assert text_cache.stats()["namespaces"]["palette"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_batch_matches_single(self):
+        """Test batch results, with failures isolated to their slot"""
+        images = [two_tone(), two_tone(split=20), None]
+        palettes = extract_palettes(images)
+        assert palettes[:2] == [extract_palette(images[0]), extract_palette(images[1])]
+        assert palettes[2] == []
+
+    def test_local_services_format(self):
+        """Test analyze_image_colors keeps its response shape"""
+        result = analyze_image_colors(two_tone())
+        assert set(result["dominant_colors"][0]) == {"color", "rgb", "percentage"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
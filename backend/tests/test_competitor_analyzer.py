@@ -0,0 +1,169 @@
+"""
+Unit tests for competitor_analyzer module
+Run with: pytest tests/test_competitor_analyzer.py -v
+
+Runs against a local stand-in for the Custom Search API and the scraper
+service, with configurable latency.
+"""
+import pytest
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import competitor_analyzer
+from competitor_analyzer import analyze_competitors, discover_competitors, find_competitors
+from ttl_cache import TTLCache
+
+
+PAGE_INFO = {"title": "Online marketing academy courses", "meta": {"description": "Learn digital marketing"}}
+
+
+class StandIn:
+    """Search + scraper stand-in: every query returns the same ranked results"""
+
+    def __init__(self, search_delay=0.0, scrape_delays=None, search_status=200):
+        self.search_delay = search_delay
+        self.scrape_delays = scrape_delays or {}
+        self.search_status = search_status
+        self.queries = []
+        self.scraped = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)["q"][0]
+                stand_in.queries.append(query)
+                time.sleep(stand_in.search_delay)
+                items = [
+                    {"link": "https://www.rival-one.com/", "title": "Marketing academy", "snippet": "courses"},
+                    {"link": "https://rival-two.com/about", "title": "Digital courses", "snippet": "marketing"},
+                    {"link": "https://www.amazon.com/x", "title": "Marketing books", "snippet": ""},
+                    {"link": "https://mysite.com/", "title": "Us", "snippet": ""},
+                    {"link": "https://rival-three.com/", "title": "Other", "snippet": ""}
+                ]
+                self.reply(stand_in.search_status, {"items": items})
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stand_in.scraped.append(payload["domain"])
+                time.sleep(stand_in.scrape_delays.get(payload["domain"], 0.0))
+                self.reply(200, {"pages": [{"url": f"https://{payload['domain']}/"}], "social": {}})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    servers = []
+
+    def start(**kwargs):
+        server = StandIn(**kwargs)
+        servers.append(server)
+        monkeypatch.setattr(competitor_analyzer, "GOOGLE_SEARCH_URL", f"{server.url}/customsearch/v1")
+        monkeypatch.setattr(competitor_analyzer, "SCRAPER_URL", server.url)
+        return server
+
+    competitor_analyzer.search_cache.clear()
+    yield start
+    competitor_analyzer.search_cache.clear()
+    for server in servers:
+        server.close()
+
+
+class TestSearch:
+    """Test concurrent, cached competitor search"""
+
+    def test_ranking_and_filtering(self, stand_in):
+        """Test blacklist, self-domain and ranking are unchanged"""
+        stand_in()
+        competitors = find_competitors("mysite.com", PAGE_INFO, max_results=5)
+        domains = [c["domain"] for c in competitors]
+        assert domains[:2] == ["rival-one.com", "rival-two.com"]
+        assert set(domains) == {"rival-one.com", "rival-two.com", "rival-three.com"}
+
+    def test_queries_run_concurrently(self, stand_in):
+        """Test that 4 slow queries take about as long as one"""
+        server = stand_in(search_delay=0.4)
+        start = time.perf_counter()
+        find_competitors("mysite.com", PAGE_INFO)
+        assert len(server.queries) == 4
+        assert time.perf_counter() - start < 1.2
+
+    def test_search_responses_cached(self, stand_in):
+        """Test that repeated queries don't spend search quota"""
+        server = stand_in()
+        first = find_competitors("mysite.com", PAGE_INFO)
+        assert find_competitors("mysite.com", PAGE_INFO) == first
+        assert len(server.queries) == 4
+        assert competitor_analyzer.search_cache.hits == 4
+
+    def test_failed_search_not_cached(self, stand_in):
+        """Test that error responses are retried next time"""
+        server = stand_in(search_status=429)
+        assert find_competitors("mysite.com", PAGE_INFO) == []
+        assert len(competitor_analyzer.search_cache) == 0
+        find_competitors("mysite.com", PAGE_INFO)
+        assert len(server.queries) == 8
+
+    def test_cache_expiry_and_bound(self):
+        """Test TTL expiry and LRU eviction"""
+        cache = TTLCache("test", ttl=60, max_entries=2)
+        cache.set("a", [1])
+        cache.set("b", [2])
+        cache.get("a")
+        cache.set("c", [3])
+        assert cache.get("b") is None and cache.get("a") == [1]
+        cache.set("d", [4], ttl=-1)
+        assert cache.get("d") is None
+
+
+class TestScraping:
+    """Test parallel competitor scraping under a deadline"""
+
+    def test_parallel_scrapes(self, stand_in):
+        """Test that scrapes overlap and keep their order"""
+        server = stand_in(scrape_delays={"rival-one.com": 0.4, "rival-two.com": 0.4, "rival-three.com": 0.4})
+        start = time.perf_counter()
+        results = discover_competitors("mysite.com", PAGE_INFO, max_results=3)
+        assert time.perf_counter() - start < 1.0
+        assert sorted(server.scraped) == ["rival-one.com", "rival-three.com", "rival-two.com"]
+        assert [r["domain"] for r in results][:2] == ["rival-one.com", "rival-two.com"]
+        assert all(r["pages"] and "social_analysis" in r for r in results)
+
+    def test_deadline_returns_partial_results(self, stand_in):
+        """Test that a slow scrape doesn't hold up the rest"""
+        stand_in(scrape_delays={"rival-two.com": 3.0})
+        competitors = [{"domain": "rival-one.com"}, {"domain": "rival-two.com"}]
+        start = time.perf_counter()
+        results = analyze_competitors(competitors, deadline=time.monotonic() + 0.5)
+        assert time.perf_counter() - start < 1.0
+        assert results[0]["pages"] and "timed_out" not in results[0]
+        assert results[1] == {"domain": "rival-two.com", "timed_out": True}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,215 @@
+"""
+Unit tests for http_cache module
+Run with: pytest tests/test_http_cache.py -v
+"""
+import pytest
+import sys
+import os
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from jose import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_cache
+from http_cache import CachedBody, CompressionMiddleware, cached_response, etag_matches, negotiate
+from serialization import dumps
+
+
+LARGE = {"pages": [{"url": f"https://example.com/page/{i}", "title": "Example page", "words": 350} for i in range(200)]}
+
+
+class TestNegotiation:
+    """Test Accept-Encoding negotiation and ETag matching"""
+
+    def test_negotiate(self, monkeypatch):
+        """Test q-values, wildcard and identity"""
+        monkeypatch.setattr(http_cache, "BROTLI_AVAILABLE", False)
+        assert negotiate("gzip, deflate, br") == "gzip"
+        assert negotiate("gzip;q=0, deflate") is None
+        assert negotiate("*") == "gzip"
+        assert negotiate("identity") is None
+        assert negotiate(None) is None
+        monkeypatch.setattr(http_cache, "BROTLI_AVAILABLE", True)
+        assert negotiate("gzip, br") == "br"
+        assert negotiate("gzip, br;q=0.5") == "gzip"
+
+    def test_etag_matches(self):
+        """Test weak comparison, lists, * and encoded variants"""
+        etag = '"abc123"'
+        assert etag_matches('"abc123"', etag)
+        assert etag_matches('W/"abc123"', etag)
+        assert etag_matches('"other", "abc123-gzip"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"abc1234"', etag)
+        assert not etag_matches(None, etag)
+
+
+class TestCachedBody:
+    """Test precompressed variants and conditional responses"""
+
+    def test_variant_compressed_once(self, monkeypatch):
+        """Test that each encoding is compressed once and then reused"""
+        calls = []
+        original = http_cache.compress
+        monkeypatch.setattr(http_cache, "compress", lambda data, enc, static=False: calls.append(enc) or original(data, enc, static))
+        body = CachedBody(dumps(LARGE))
+        for _ in range(3):
+            response = cached_response({"accept-encoding": "gzip"}, body)
+        assert calls == ["gzip"]
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == body.etag[:-1] + '-gzip"'
+        assert gzip.decompress(response.body) == body.data
+
+    def test_not_modified(self):
+        """Test 304 for a matching If-None-Match on GET but not on POST"""
+        body = CachedBody(dumps(LARGE))
+        response = cached_response({"if-none-match": body.etag[:-1] + '-gzip"'}, body)
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == body.etag
+        assert cached_response({"if-none-match": body.etag}, body, method="POST").status_code == 200
+
+    def test_small_body_uncompressed(self):
+        """Test that bodies below the threshold are sent as is"""
+        body = CachedBody(b'{"ok":true}')
+        response = cached_response({"accept-encoding": "gzip"}, body)
+        assert "content-encoding" not in response.headers
+        assert response.body == body.data
+
+
+class TestCompressionMiddleware:
+    """Test the ASGI middleware"""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware)
+
+        @app.get("/large")
+        def large():
+            return LARGE
+
+        @app.get("/small")
+        def small():
+            return {"ok": True}
+
+        @app.get("/stream")
+        def stream():
+            return StreamingResponse(iter([b"x" * 2048, b"y" * 2048]), media_type="text/plain")
+
+        return TestClient(app)
+
+    def test_compresses_large(self, client):
+        """Test gzip with Vary and a correct body"""
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(dumps(LARGE)) / 3
+        assert response.json() == LARGE
+
+    def test_skips_small_identity_and_streaming(self, client):
+        """Test the pass-through cases"""
+        assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert identity.headers["vary"] == "Accept-Encoding"
+        streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in streamed.headers
+        assert len(streamed.content) == 4096
+
+
+class TestReportEndpoints:
+    """Test ETags on /api/analyze cache hits and /api/reports/{id}"""
+
+    @pytest.fixture
+    def client(self):
+        import main
+        from models import Base, engine, SessionLocal, User, AnalysisReport
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        user = User(email="http-cache-test@test.com", hashed_password="x", quota=5)
+        db.add(user)
+        db.commit()
+        report = AnalysisReport(user_id=user.id, report_type="deep_analysis", domain="cached.example",
+                                competitors="", results=dumps(LARGE).decode())
+        db.add(report)
+        db.commit()
+        uid, rid = user.id, report.id
+        db.close()
+        main.rate_limiter.clear()
+        main.analysis_cache.clear()
+        token = jwt.encode({"sub": "http-cache-test@test.com"}, main.SECRET_KEY, algorithm="HS256")
+        yield TestClient(main.app), {"Authorization": f"Bearer {token}"}, rid
+        main.analysis_cache.clear()
+        main.user_cache.clear()
+        db = SessionLocal()
+        db.query(AnalysisReport).filter(AnalysisReport.id == rid).delete()
+        db.query(User).filter(User.id == uid).delete()
+        db.commit()
+        db.close()
+
+    def test_report_etag_and_304(self, client):
+        """Test that a report is sent compressed and revalidates to 304"""
+        test_client, headers, rid = client
+        first = test_client.get(f"/api/reports/{rid}", headers=dict(headers, **{"Accept-Encoding": "gzip"}))
+        assert first.status_code == 200
+        assert first.headers["content-encoding"] == "gzip"
+        assert first.headers["cache-control"] == "private, no-cache"
+        assert first.json()["data"] == LARGE
+        assert first.json()["domain"] == "cached.example"
+
+        revalidated = test_client.get(f"/api/reports/{rid}", headers=dict(headers, **{"If-None-Match": first.headers["etag"]}))
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+
+    def test_report_access(self, client):
+        """Test that another user's report reads as missing"""
+        import main
+        from models import SessionLocal, User
+        test_client, _, rid = client
+        db = SessionLocal()
+        db.add(User(email="http-cache-other@test.com", hashed_password="x", quota=5))
+        db.commit()
+        try:
+            token = jwt.encode({"sub": "http-cache-other@test.com"}, main.SECRET_KEY, algorithm="HS256")
+            assert test_client.get(f"/api/reports/{rid}", headers={"Authorization": f"Bearer {token}"}).status_code == 404
+        finally:
+            db.query(User).filter(User.email == "http-cache-other@test.com").delete()
+            db.commit()
+            db.close()
+
+    def test_analyze_cache_hit_headers(self, client, monkeypatch):
+        """Test that a cache hit has an ETag but no other user's report in it"""
+        import main
+        from models import SessionLocal, User, AnalysisReport
+        test_client, headers, _ = client
+        monkeypatch.setattr(main, "crawl_and_index", lambda domain, max_pages, workspace: {"total_pages": 1, "pages": []})
+        monkeypatch.setattr(main, "get_geo_location", lambda ip: "Unknown")
+        fresh = test_client.post("/api/analyze", headers=headers, json={"domain": "shared.example", "max_pages": 5})
+        assert fresh.status_code == 200 and fresh.json()["job_id"].startswith("job_")
+
+        db = SessionLocal()
+        db.add(User(email="http-cache-second@test.com", hashed_password="x", quota=5))
+        db.commit()
+        try:
+            token = jwt.encode({"sub": "http-cache-second@test.com"}, main.SECRET_KEY, algorithm="HS256")
+            hit = test_client.post("/api/analyze", headers={"Authorization": f"Bearer {token}"},
+                                   json={"domain": "shared.example", "max_pages": 5})
+            assert hit.status_code == 200
+            assert hit.json()["cached"] is True
+            assert "report_id" not in hit.json()
+            assert "content-location" not in hit.headers
+            assert hit.headers["etag"].startswith('"')
+        finally:
+            db.query(AnalysisReport).filter(AnalysisReport.domain == "shared.example").delete()
+            db.query(User).filter(User.email == "http-cache-second@test.com").delete()
+            db.commit()
+            db.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
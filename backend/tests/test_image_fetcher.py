@@ -0,0 +1,134 @@
+"""
+Unit tests for image_fetcher module and batch image analysis
+Run with: pytest tests/test_image_fetcher.py -v
+"""
+import pytest
+import sys
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import image_fetcher
+from image_fetcher import ImageFetchError, decode_image, fetch_bytes, map_images
+from local_services import analyze_images_batch
+
+
+def encode(size, fmt="JPEG", color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+BODIES = {
+    "/banner.jpg": encode((4000, 3000)),
+    "/logo.png": encode((300, 300), "PNG", (20, 40, 200)),
+    "/huge.jpg": b"\xff" * (256 * 1024),
+}
+
+
+@pytest.fixture(scope="module")
+def server():
+    hits = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] += 1
+            if self.path == "/stream-huge":
+                # No Content-Length: the cap must apply while reading
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(b"\xff" * (256 * 1024))
+                return
+            body = BODIES.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", hits
+    httpd.shutdown()
+
+
+class TestDecode:
+    """Test downscaled decoding"""
+
+    def test_jpeg_decodes_at_reduced_size(self):
+        """Test that a large JPEG lands at the decode size with its source size kept"""
+        image = decode_image(BODIES["/banner.jpg"], max_size=512)
+        assert max(image.size) <= 512
+        assert image.info["original_size"] == (4000, 3000)
+        assert image.format == "JPEG"
+
+    def test_small_png_is_untouched(self):
+        """Test that images under the decode size keep their resolution"""
+        image = decode_image(BODIES["/logo.png"], max_size=512)
+        assert image.size == (300, 300)
+        assert image.format == "PNG"
+
+    def test_rejects_garbage_and_bombs(self, monkeypatch):
+        """Test undecodable bytes and oversized dimensions"""
+        with pytest.raises(ImageFetchError):
+            decode_image(b"not an image")
+        monkeypatch.setattr(image_fetcher, "IMAGE_MAX_PIXELS", 1000)
+        with pytest.raises(ImageFetchError):
+            decode_image(BODIES["/logo.png"])
+
+
+class TestFetch:
+    """Test size-capped downloads and concurrent mapping"""
+
+    def test_byte_cap(self, server):
+        """Test declared and streamed bodies over the cap are refused"""
+        base, _ = server
+        with pytest.raises(ImageFetchError):
+            fetch_bytes(f"{base}/huge.jpg", max_bytes=64 * 1024)
+        with pytest.raises(ImageFetchError):
+            fetch_bytes(f"{base}/stream-huge", max_bytes=64 * 1024)
+        assert len(fetch_bytes(f"{base}/logo.png")) == len(BODIES["/logo.png"])
+
+    def test_map_images_order_dedupe_and_errors(self, server):
+        """Test input order, one fetch per distinct URL and per-URL errors"""
+        base, hits = server
+        hits.clear()
+        urls = [f"{base}/logo.png", f"{base}/missing.png", f"{base}/logo.png", f"{base}/banner.jpg"]
+        results = map_images(urls, lambda url, image, error: {"url": url, "size": image.size if image else None, "error": error})
+        assert [r["url"] for r in results] == urls
+        assert results[0]["size"] == (300, 300)
+        assert results[1]["size"] is None and "404" in results[1]["error"]
+        assert hits["/logo.png"] == 1
+        assert set(results[3]["timing_ms"]) == {"fetch", "analyze"}
+
+
+class TestBatchAnalysis:
+    """Test the batch vision analysis built on the fetcher"""
+
+    def test_analyze_images_batch(self, server):
+        """Test per-image results and summary from a single decode each"""
+        base, _ = server
+        result = analyze_images_batch([f"{base}/banner.jpg", f"{base}/missing.png"])
+        banner, missing = result["results"]
+        assert banner["brands"]["image_properties"]["width"] == 4000
+        assert banner["brands"]["colors"][0]["percentage"] == 100.0
+        assert "fetch_error" in missing
+        assert result["summary"]["images"] == 2
+        assert result["summary"]["failed"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
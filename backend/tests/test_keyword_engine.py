@@ -0,0 +1,98 @@
+"""
+Unit tests for keyword_engine module
+Run with: pytest tests/test_keyword_engine.py -v
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keyword_engine
+from keyword_engine import (
+    tokenize, count_keywords, get_extractor, extract_keywords,
+    merge_page_keywords, extract_keywords_from_pages
+)
+from scraper import page_keyword_text
+from text_cache import text_cache
+
+
+class TestTokenizer:
+    """Test the shared tokenizer"""
+
+    def test_lowercases_and_drops_stop_words(self):
+        """Test that stop words and short words are removed"""
+        assert tokenize("The SEO audit and the Backlinks are ok") == ["seo", "audit", "backlinks"]
+
+    def test_min_length_and_letters_only(self):
+        """Test that digits split words and min_length applies"""
+        assert tokenize("web2day 2024 café", min_length=4) == ["café"]
+        assert tokenize("the best", min_length=3, stop_words=None) == ["the", "best"]
+
+    def test_count_keywords(self):
+        """Test term frequencies"""
+        assert count_keywords("shoes Shoes boots").most_common(1) == [("shoes", 2)]
+
+
+class TestYake:
+    """Test YAKE extraction and cross-page merging"""
+
+    def test_extractor_is_reused(self):
+        """Test that the same configuration returns the cached extractor"""
+        assert get_extractor(3, 20) is get_extractor(3, 20)
+
+    def test_respects_top_n(self):
+        """Test that top_n limits the result size"""
+        text = "Python programming is great for web development. Python is also used for data science."
+        assert 0 < len(extract_keywords(text, top_n=3)) <= 3
+        assert extract_keywords("   ", top_n=3) == []
+
+    def test_merge_prefers_terms_across_pages(self):
+        """Test that a term found on several pages outranks a one-page term"""
+        merged = merge_page_keywords([
+            [{"term": "Running Shoes", "score": 0.2}, {"term": "returns", "score": 0.1}],
+            [{"term": "running shoes", "score": 0.15}],
+            [{"term": "running shoes", "score": 0.3}],
+        ])
+        assert merged[0]["term"] == "Running Shoes"
+        assert merged[0]["pages"] == 3
+        assert merged[0]["score"] == pytest.approx(0.05)
+        assert merged[1]["term"] == "returns"
+
+    def test_pool_matches_serial(self, monkeypatch):
+        """Test that process-pool extraction returns the same merged keywords"""
+        pages = [f"Trail running shoes for page {i}. Waterproof hiking boots and trail gear." for i in range(6)]
+        monkeypatch.setattr(keyword_engine, "KEYWORD_POOL_MIN_PAGES", 10 ** 6)
+        text_cache.clear()
+        serial = extract_keywords_from_pages(pages, top_n=5)
+        text_cache.clear()
+
+        monkeypatch.setattr(keyword_engine, "KEYWORD_POOL_MIN_PAGES", 1)
+        monkeypatch.setattr(keyword_engine, "KEYWORD_WORKERS", 2)
+        monkeypatch.setattr(keyword_engine, "_pool", None)
+        try:
+            parallel = extract_keywords_from_pages(pages, top_n=5)
+        finally:
+            keyword_engine.get_pool().shutdown()
+        assert parallel == serial
+        assert text_cache.stats()["namespaces"]["yake"]["misses"] == len(pages)
+
+    def test_repeat_pages_are_memoized(self):
+        """Test that identical and previously seen pages skip YAKE"""
+        text_cache.clear()
+        extract_keywords_from_pages(["Trail shoes. Hiking boots."] * 3)
+        extract_keywords_from_pages(["Trail shoes. Hiking boots."])
+        assert text_cache.stats()["namespaces"]["yake"] == {"hits": 1, "misses": 3, "hit_rate": 0.25}
+
+    def test_page_keyword_text(self):
+        """Test that page text uses the keys the scraper actually produces"""
+        analysis = {
+            "title": {"text": "Trail Shoes"},
+            "meta_description": {"text": "Shop trail shoes"},
+            "headers": {"h1_texts": ["Trail running"], "h2_texts": ["Waterproof"]},
+        }
+        assert page_keyword_text(analysis) == "Trail Shoes. Shop trail shoes. Trail running. Waterproof"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
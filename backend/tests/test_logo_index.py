@@ -0,0 +1,154 @@
+"""
+Unit tests for logo_index module
+Run with: pytest tests/test_logo_index.py -v
+"""
+import pytest
+import sys
+import os
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import local_services
+from logo_index import LogoIndex, MultiIndexHash, hamming, load_logo_index
+
+
+def make_logo(seed, size=120):
+    """Random shapes on a transparent canvas"""
+    rng = random.Random(seed)
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for _ in range(4):
+        x0, y0 = rng.randint(0, size - 40), rng.randint(0, size - 40)
+        box = [x0, y0, x0 + rng.randint(20, 60), y0 + rng.randint(20, 60)]
+        fill = tuple(rng.randint(0, 200) for _ in range(3)) + (255,)
+        getattr(draw, rng.choice(["ellipse", "rectangle"]))(box, fill=fill)
+    return img
+
+
+def make_ad(logo=None, position=(0, 0), size=150, seed=0):
+    """Gradient banner with light noise, optionally with a logo pasted in"""
+    rng = np.random.default_rng(seed)
+    background = np.linspace(180, 240, 450)[None, :, None] + rng.normal(0, 3, (300, 450, 3))
+    ad = Image.fromarray(np.clip(background, 0, 255).astype(np.uint8))
+    if logo is not None:
+        logo = logo.resize((size, size))
+        ad.paste(logo, position, logo)
+    return ad
+
+
+@pytest.fixture(scope="module")
+def logos():
+    return [make_logo(i) for i in range(40)]
+
+
+@pytest.fixture(scope="module")
+def index(logos):
+    index = LogoIndex()
+    for i, logo in enumerate(logos):
+        index.add(f"Brand {i}", logo)
+    return index
+
+
+class TestMultiIndexHash:
+    """Test the multi-index Hamming lookup"""
+
+    def test_search_matches_brute_force(self):
+        """Test that radius search returns exactly the brute-force neighbours"""
+        rng = random.Random(1)
+        keys = [rng.getrandbits(64) for _ in range(500)]
+        # Near neighbours of one key at every distance up to 12 bits
+        keys += [keys[0] ^ sum(1 << b for b in rng.sample(range(64), d)) for d in range(13)]
+        table = MultiIndexHash(radius=10)
+        for i, key in enumerate(keys):
+            table.add(key, i)
+        expected = sorted((hamming(keys[0], k), i) for i, k in enumerate(keys) if hamming(keys[0], k) <= 10)
+        assert sorted(table.search(keys[0])) == expected
+        assert len(expected) >= 11
+        assert len(table) == len(keys)
+
+
+class TestLogoMatching:
+    """Test matching images against reference logos"""
+
+    def test_exact_logo(self, index, logos):
+        """Test that a reference logo matches itself"""
+        match = index.match(logos[3])[0]
+        assert match["name"] == "Brand 3"
+        assert match["confidence"] == 100.0
+
+    @pytest.mark.parametrize("brand,position,size", [(0, (300, 0), 150), (1, (280, 20), 140), (2, (10, 150), 120), (3, (200, 100), 100)])
+    def test_logo_inside_ad(self, index, logos, brand, position, size):
+        """Test that multi-scale crops find a scaled, offset logo and locate it"""
+        matches = index.match(make_ad(logos[brand], position, size, seed=brand))
+        assert [m["name"] for m in matches] == [f"Brand {brand}"]
+        left, top, right, bottom = matches[0]["box"]
+        assert position[0] - 5 <= left and right <= position[0] + size + 5
+        assert position[1] - 5 <= top and bottom <= position[1] + size + 5
+
+    def test_unknown_logo_is_not_matched(self, index):
+        """Test that unindexed artwork produces no match"""
+        for seed in range(5):
+            assert index.match(make_ad(make_logo(1000 + seed), (100, 50), seed=seed)) == []
+        assert index.match(make_ad()) == []
+
+
+class TestReferenceDirectory:
+    """Test loading reference logos from disk"""
+
+    def test_load_directory_and_hash_cache(self, tmp_path, logos, monkeypatch):
+        """Test brand naming, variants and cached hashes"""
+        logos[0].save(tmp_path / "acme_corp.png")
+        (tmp_path / "globex").mkdir()
+        logos[1].save(tmp_path / "globex" / "dark.png")
+        logos[2].save(tmp_path / "globex" / "light.png")
+        (tmp_path / "notes.txt").write_text("not a logo")
+
+        index = load_logo_index(str(tmp_path))
+        assert index.stats()["logos"] == 3
+        assert index.brands == {"Acme Corp", "Globex"}
+        assert (tmp_path / ".logo_hashes.json").exists()
+
+        # Second load reuses cached hashes without decoding any image
+        monkeypatch.setattr("logo_index.Image.open", lambda *a: pytest.fail("decoded a cached logo"))
+        cached = load_logo_index(str(tmp_path))
+        assert len(cached.table) == len(index.table)
+        assert cached.match(logos[2])[0]["name"] == "Globex"
+
+    def test_missing_directory(self, tmp_path):
+        """Test that a missing directory yields an empty index"""
+        index = load_logo_index(str(tmp_path / "missing"))
+        assert len(index) == 0
+        assert index.match(make_ad()) == []
+
+
+class TestBrandDetection:
+    """Test the local_services integration"""
+
+    def test_detect_logos_uses_index(self, index, logos, monkeypatch):
+        """Test that detection reports index matches instead of a generic placeholder"""
+        monkeypatch.setattr(local_services, "get_logo_index", lambda: index)
+        monkeypatch.setattr(local_services, "fetch_image", lambda url: make_ad(logos[5], (300, 0)))
+
+        result = local_services.detect_logos_in_image("https://cdn.example.com/banner.jpg")
+        assert result["method"] == "logo_index"
+        assert result["logos"][0]["description"] == "Brand 5"
+        assert result["logos"][0]["source"] == "logo_index"
+
+        brands = local_services.detect_brands_in_image("https://cdn.example.com/banner.jpg")
+        assert brands["data"]["logos"][0]["name"] == "Brand 5"
+
+    def test_no_match_has_no_placeholder(self, index, monkeypatch):
+        """Test that an unmatched image returns no logos"""
+        monkeypatch.setattr(local_services, "get_logo_index", lambda: index)
+        monkeypatch.setattr(local_services, "fetch_image", lambda url: make_ad())
+        result = local_services.detect_logos_in_image("https://cdn.example.com/banner.jpg")
+        assert result["logos"] == []
+        assert result["count"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,175 @@
+"""
+Unit tests for metrics module
+Run with: pytest tests/test_metrics.py -v
+"""
+import pytest
+import sys
+import os
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics as metrics_module
+from metrics import CRAWL_STAGE, MetricsRegistry
+from model_registry import ModelRegistry
+from scraper import get_page_content
+from text_cache import TextResultCache
+
+
+def observations(histogram, **labels):
+    """Sample count of one histogram series in this process"""
+    key = [str(labels[n]) for n in histogram.labelnames]
+    for labelvalues, (_, _, count) in histogram.samples():
+        if labelvalues == key:
+            return count
+    return 0
+
+
+def dead_pid():
+    """PID of a process that has already exited"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class TestRegistry:
+    """Test recording and the text exposition format"""
+
+    def test_histogram_exposition(self):
+        """Test cumulative buckets, sum, count and label escaping"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.7, 3):
+            histogram.observe(value, stage='say "hi"')
+        text = registry.render()
+        assert "# TYPE stage_seconds histogram" in text
+        assert 'stage_seconds_bucket{stage="say \\"hi\\"",le="0.1"} 1' in text
+        assert 'stage_seconds_bucket{stage="say \\"hi\\"",le="1"} 3' in text
+        assert 'stage_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 4' in text
+        assert 'stage_seconds_sum{stage="say \\"hi\\""} 4.25' in text
+        assert 'stage_seconds_count{stage="say \\"hi\\""} 4' in text
+
+    def test_counter_gauge_and_label_checks(self):
+        """Test counters, callback gauges and wrong label sets"""
+        registry = MetricsRegistry()
+        counter = registry.counter("hits_total", "Hits", ("result",))
+        counter.inc(result="hit")
+        counter.inc(2, result="hit")
+        registry.gauge("depth", "Depth").set_function(lambda: 7)
+        text = registry.render()
+        assert 'hits_total{result="hit"} 3' in text
+        assert "depth 7" in text
+        assert registry.counter("hits_total", "Hits", ("result",)) is counter
+        with pytest.raises(ValueError):
+            counter.inc(status="hit")
+
+
+class TestMultiprocess:
+    """Test merging snapshots written by several workers"""
+
+    def test_merge_across_workers(self, tmp_path):
+        """Test counters and histograms sum over all workers, gauges over live ones"""
+        exited = MetricsRegistry(directory=str(tmp_path), pid=dead_pid())
+        live = MetricsRegistry(directory=str(tmp_path))
+        for registry, requests in ((exited, 2), (live, 3)):
+            registry.counter("requests_total", "Requests").inc(requests)
+            registry.histogram("latency_seconds", "Latency", buckets=(1,)).observe(0.5)
+            registry.gauge("in_progress", "In progress").set(4)
+        exited.flush()
+
+        text = live.render()
+        assert "requests_total 5" in text
+        assert "latency_seconds_count 2" in text
+        assert "in_progress 4" in text
+        assert len(list(tmp_path.glob("metrics-*.json"))) == 2
+
+
+@pytest.fixture(scope="module")
+def site():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = b"<html><head><title>Shop</title></head><body><h1>Shoes</h1><a href='/about'>About</a></body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://localhost:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+class TestInstrumentation:
+    """Test the hooks feeding the global registry"""
+
+    def test_crawl_stages(self, site):
+        """Test that fetching a page records every crawl stage"""
+        stages = ("dns", "connect", "ttfb", "download", "parse", "analyze")
+        before = {stage: observations(CRAWL_STAGE, stage=stage) for stage in stages}
+        page = get_page_content(site + "/", retries=0)
+        assert page["status"] == "success"
+        for stage in stages:
+            assert observations(CRAWL_STAGE, stage=stage) == before[stage] + 1, stage
+
+        # Keep-alive: a second page reuses the connection, so no new dns/connect
+        get_page_content(site + "/about", retries=0)
+        assert observations(CRAWL_STAGE, stage="dns") == before["dns"] + 1
+        assert observations(CRAWL_STAGE, stage="ttfb") == before["ttfb"] + 2
+
+    def test_cache_and_inference(self):
+        """Test cache lookups and inference timing are counted"""
+        cache = TextResultCache()
+        cache.get("metrics-test", "hello")
+        cache.set("metrics-test", "hello", 1)
+        cache.get("metrics-test", "hello")
+        text = metrics_module.metrics.render()
+        assert 'cache_lookups_total{cache="text.metrics-test",result="hit"} 1' in text
+        assert 'cache_lookups_total{cache="text.metrics-test",result="miss"} 1' in text
+
+        before = observations(metrics_module.INFERENCE, model="metrics-test")
+        with ModelRegistry().inference("metrics-test"):
+            pass
+        assert observations(metrics_module.INFERENCE, model="metrics-test") == before + 1
+
+    def test_metrics_endpoint(self, monkeypatch):
+        """Test route templates, statuses and DB timings on /metrics"""
+        import main
+        monkeypatch.setattr(main, "METRICS_TOKEN", "scrape-token")
+        client = TestClient(main.app)
+        client.get("/health")
+        client.get("/no/such/path")
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in text
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in text
+        assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in text
+        assert 'db_query_duration_seconds_count{operation="SELECT"}' in text
+
+    def test_metrics_endpoint_requires_token(self, monkeypatch):
+        """Test that /metrics is off without METRICS_TOKEN and rejects a wrong token"""
+        import main
+        client = TestClient(main.app)
+        monkeypatch.setattr(main, "METRICS_TOKEN", None)
+        assert client.get("/metrics").status_code == 404
+        monkeypatch.setattr(main, "METRICS_TOKEN", "scrape-token")
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"Authorization": "Bearer wrong-token"})
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
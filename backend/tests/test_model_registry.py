@@ -0,0 +1,125 @@
+"""
+Unit tests for model_registry module
+Run with: pytest tests/test_model_registry.py -v
+"""
+import pytest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import ModelRegistry
+
+
+class SlowLoader:
+    """Loader that counts calls and can be held open"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("download failed")
+        return object()
+
+
+class TestModelRegistry:
+    """Test load-once, preload readiness and inference limits"""
+
+    def test_concurrent_get_loads_once(self):
+        """Test that simultaneous first requests build the model once"""
+        registry = ModelRegistry()
+        loader = SlowLoader(delay=0.05)
+        registry.register("sentiment", loader)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("sentiment"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert loader.calls == 1
+        assert len({id(r) for r in results}) == 1
+        stats = registry.stats()["models"]["sentiment"]
+        assert stats["status"] == "loaded"
+        assert stats["load_seconds"] >= 0.05
+        assert stats["memory_mb"] is not None
+
+    def test_unknown_model(self):
+        """Test that unregistered names return None"""
+        assert ModelRegistry().get("missing") is None
+
+    def test_failed_load_is_not_retried_immediately(self):
+        """Test that a failing loader is retried only after retry_after"""
+        registry = ModelRegistry(retry_after=60)
+        loader = SlowLoader(fail=True)
+        registry.register("emotion", loader)
+
+        assert registry.get("emotion") is None
+        assert registry.get("emotion") is None
+        assert loader.calls == 1
+        assert registry.stats()["models"]["emotion"]["error"] == "download failed"
+
+        registry.retry_after = 0
+        registry.get("emotion")
+        assert loader.calls == 2
+
+    def test_background_preload_gates_ready(self):
+        """Test that ready stays False until background preload finishes"""
+        registry = ModelRegistry()
+        loader = SlowLoader()
+        loader.release.clear()
+        registry.register("sentiment", loader)
+
+        assert registry.ready
+        registry.preload(["sentiment"], background=True)
+        assert not registry.ready
+
+        loader.release.set()
+        deadline = time.time() + 5
+        while not registry.ready and time.time() < deadline:
+            time.sleep(0.01)
+        assert registry.ready
+        assert loader.calls == 1
+
+    def test_preload_skips_unregistered(self):
+        """Test that unknown preload names don't block readiness"""
+        registry = ModelRegistry()
+        registry.preload(["nope"])
+        assert registry.ready
+
+    def test_inference_semaphore(self):
+        """Test that at most max_concurrent_inference callers run at once"""
+        registry = ModelRegistry(max_concurrent_inference=2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def work():
+            with registry.inference():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert peak[0] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
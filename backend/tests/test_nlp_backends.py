@@ -0,0 +1,104 @@
+"""
+Tolerance tests for the quantized / ONNX inference backends
+Run with: pytest tests/test_nlp_backends.py -v
+
+Uses a tiny randomly initialised RoBERTa classifier, so no model download
+is needed. Skipped when torch/transformers aren't installed.
+"""
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+import nlp_backends
+from nlp_backends import apply_inference_backend
+
+LABELS = {0: "NEG", 1: "NEU", 2: "POS"}
+
+# Max absolute difference in class probabilities vs the fp32 torch model
+TOLERANCE = {"quantized": 0.05, "onnx": 1e-4}
+
+
+class FakeTokenizer:
+    """Deterministic tokenizer over a 100-token vocab"""
+
+    def __call__(self, texts, padding=True, truncation=True, max_length=128, return_tensors="pt"):
+        ids = [[0] + [3 + (ord(c) % 90) for c in text][:max_length - 2] + [2] for text in texts]
+        width = max(len(row) for row in ids)
+        return {
+            "input_ids": torch.tensor([row + [1] * (width - len(row)) for row in ids]),
+            "attention_mask": torch.tensor([[1] * len(row) + [0] * (width - len(row)) for row in ids])
+        }
+
+
+def make_analyzer():
+    torch.manual_seed(0)
+    config = transformers.RobertaConfig(
+        vocab_size=100, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=140, num_labels=3,
+        id2label=LABELS, label2id={v: k for k, v in LABELS.items()}
+    )
+    model = transformers.RobertaForSequenceClassification(config).eval()
+    return SimpleNamespace(
+        model=model, tokenizer=FakeTokenizer(), task="sentiment",
+        problem_type=None, id2label=LABELS, preprocessing_args={}
+    )
+
+
+def probabilities(analyzer, texts):
+    encoded = analyzer.tokenizer(texts)
+    with torch.inference_mode():
+        logits = analyzer.model(encoded["input_ids"], attention_mask=encoded["attention_mask"]).logits
+    return torch.softmax(logits, dim=-1)
+
+
+TEXTS = ["great product", "this was a terrible purchase, never again", "ok", "meh " * 20]
+
+
+class TestInferenceBackends:
+    """Test that alternative backends stay within tolerance of torch"""
+
+    def check_backend(self, backend):
+        expected = probabilities(make_analyzer(), TEXTS)
+        analyzer = apply_inference_backend(make_analyzer(), backend)
+        assert analyzer.inference_backend == backend
+
+        actual = probabilities(analyzer, TEXTS)
+        assert (actual - expected).abs().max().item() <= TOLERANCE[backend]
+        assert actual.argmax(-1).tolist() == expected.argmax(-1).tolist()
+
+    def test_quantized(self):
+        """Test dynamic int8 quantization against fp32 outputs"""
+        self.check_backend("quantized")
+
+    def test_onnx(self, tmp_path, monkeypatch):
+        """Test onnxruntime export against fp32 outputs"""
+        pytest.importorskip("onnx")
+        pytest.importorskip("onnxruntime")
+        monkeypatch.setattr(nlp_backends, "NLP_ONNX_DIR", str(tmp_path))
+        self.check_backend("onnx")
+        # Export is cached for the next worker/process
+        assert list(tmp_path.glob("*.onnx"))
+
+    def test_single_positional_call(self, tmp_path, monkeypatch):
+        """Test pysentimiento's single-text call style: model(input_ids).logits"""
+        pytest.importorskip("onnxruntime")
+        monkeypatch.setattr(nlp_backends, "NLP_ONNX_DIR", str(tmp_path))
+        analyzer = apply_inference_backend(make_analyzer(), "onnx")
+        ids = analyzer.tokenizer(["hello"])["input_ids"]
+        assert analyzer.model(ids).logits.shape == (1, 3)
+
+    def test_unknown_backend_keeps_torch(self):
+        """Test that a bad config value leaves the analyzer untouched"""
+        analyzer = make_analyzer()
+        model = analyzer.model
+        assert apply_inference_backend(analyzer, "tensorrt").model is model
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
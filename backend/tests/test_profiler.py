@@ -0,0 +1,169 @@
+"""
+Unit tests for profiler module
+Run with: pytest tests/test_profiler.py -v
+"""
+import pytest
+import sys
+import os
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiler import ProfileMiddleware, ProfileStore, ProfilerBusy, SamplingProfiler, finish_profile, profile_store, start_profile
+
+
+def spin_hot_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+
+def sleep_quietly(stop):
+    stop.wait()
+
+
+@pytest.fixture
+def busy_and_idle_threads():
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=spin_hot_loop, args=(stop,), name="busy", daemon=True),
+        threading.Thread(target=sleep_quietly, args=(stop,), name="idle", daemon=True)
+    ]
+    for t in threads:
+        t.start()
+    yield
+    stop.set()
+    for t in threads:
+        t.join()
+
+
+class TestSamplingProfiler:
+    """Test stack sampling and output formats"""
+
+    def test_cpu_mode_finds_hot_function(self, busy_and_idle_threads):
+        """Test that cpu mode attributes samples to the busy thread only"""
+        profiler = SamplingProfiler(interval=0.002, mode="cpu").start()
+        time.sleep(0.3)
+        result = profiler.stop()
+
+        assert result["samples"] > 10
+        lines = result["collapsed"].splitlines()
+        assert any(line.startswith("busy;") and "spin_hot_loop" in line for line in lines)
+        assert not any(line.startswith("idle;") for line in lines)
+        count = int(lines[0].rsplit(" ", 1)[1])
+        assert count >= 1
+        assert any("spin_hot_loop" in f["function"] and f["total_pct"] > 50 for f in result["top"])
+
+    def test_wall_mode_includes_waiting_threads(self, busy_and_idle_threads):
+        """Test that wall mode also samples blocked threads"""
+        profiler = SamplingProfiler(interval=0.002, mode="wall").start()
+        time.sleep(0.1)
+        result = profiler.stop()
+        assert any(line.startswith("idle;") and "sleep_quietly" in line for line in result["collapsed"].splitlines())
+
+    def test_bounded_and_exclusive(self):
+        """Test the max duration and one profile per worker"""
+        profiler = start_profile(interval=0.01, max_seconds=0.05)
+        try:
+            with pytest.raises(ProfilerBusy):
+                start_profile()
+            profiler._thread.join(timeout=2)
+            assert not profiler._thread.is_alive()
+        finally:
+            finish_profile(profiler)
+        finish_profile(start_profile(max_seconds=0.01))
+
+    def test_store_keeps_recent(self, tmp_path):
+        """Test saving, loading and pruning stored profiles"""
+        store = ProfileStore(str(tmp_path), keep=2)
+        ids = []
+        for i in range(3):
+            ids.append(store.save({"samples": i, "collapsed": ""}))
+            time.sleep(0.01)
+        assert store.load(ids[0]) is None
+        assert store.load(ids[2])["samples"] == 2
+        assert store.load("../etc/passwd") is None
+
+
+class TestProfilingEndpoints:
+    """Test the admin endpoint and the X-Profile header"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        from main import app, rate_limiter
+        from user_cache import Principal, user_cache
+        monkeypatch.setattr(profile_store, "directory", str(tmp_path))
+        rate_limiter.clear()
+        user_cache.set(Principal(id=901, email="profiler-admin@test.com", role="admin", quota=1, is_active=True))
+        user_cache.set(Principal(id=902, email="profiler-user@test.com", role="user", quota=1, is_active=True))
+        yield TestClient(app)
+        user_cache.clear()
+
+    @staticmethod
+    def auth(email):
+        from main import SECRET_KEY
+        return {"Authorization": f"Bearer {jwt.encode({'sub': email}, SECRET_KEY, algorithm='HS256')}"}
+
+    def test_admin_profile_endpoint(self, client, busy_and_idle_threads):
+        """Test a bounded worker profile in json and collapsed form"""
+        admin = self.auth("profiler-admin@test.com")
+        response = client.post("/api/admin/profile?seconds=0.3&interval_ms=2", headers=admin)
+        assert response.status_code == 200
+        result = response.json()
+        assert "spin_hot_loop" in result["collapsed"]
+
+        collapsed = client.get(f"/api/admin/profiles/{result['id']}?format=collapsed", headers=admin)
+        assert collapsed.status_code == 200
+        assert collapsed.text == result["collapsed"]
+
+        user = self.auth("profiler-user@test.com")
+        assert client.post("/api/admin/profile?seconds=0.1", headers=user).status_code == 403
+        assert client.post("/api/admin/profile?mode=bogus", headers=admin).status_code == 400
+
+    def test_profile_header(self, client):
+        """Test that X-Profile profiles admin requests only"""
+        admin = self.auth("profiler-admin@test.com")
+        response = client.get("/api/me", headers=dict(admin, **{"X-Profile": "wall"}))
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+        stored = client.get(f"/api/admin/profiles/{profile_id}", headers=admin).json()
+        assert stored["path"] == "/api/me" and stored["mode"] == "wall"
+        assert stored["scope"] == "worker" and stored["concurrent_requests"] == 0
+
+        user = self.auth("profiler-user@test.com")
+        response = client.get("/api/me", headers=dict(user, **{"X-Profile": "1"}))
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+    def test_middleware_blocking_work_off_event_loop(self, tmp_path):
+        """Test that authorize() and saving the profile don't run on the event loop thread"""
+        threads = {}
+
+        class RecordingStore(ProfileStore):
+            def save(self, result):
+                threads["save"] = threading.get_ident()
+                return super().save(result)
+
+        def authorize(headers):
+            threads["authorize"] = threading.get_ident()
+            return True
+
+        app = FastAPI()
+        app.add_middleware(ProfileMiddleware, authorize=authorize, store=RecordingStore(str(tmp_path)))
+
+        @app.get("/loop")
+        async def loop():
+            threads["loop"] = threading.get_ident()
+            return {}
+
+        response = TestClient(app).get("/loop", headers={"X-Profile": "1"})
+        assert "X-Profile-Id" in response.headers
+        assert threads["loop"] not in (threads["authorize"], threads["save"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
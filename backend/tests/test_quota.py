@@ -0,0 +1,89 @@
+"""
+Unit tests for quota module
+Run with: pytest tests/test_quota.py -v
+"""
+import pytest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Base, engine, SessionLocal, User
+from quota import reserve_quota, refund_quota, QuotaReservation, QuotaExceeded
+
+
+@pytest.fixture
+def user_id():
+    """Create a throwaway user with quota 2"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="quota-test@test.com", hashed_password="x", quota=2)
+    db.add(user)
+    db.commit()
+    uid = user.id
+    db.close()
+    yield uid
+    db = SessionLocal()
+    db.query(User).filter(User.id == uid).delete()
+    db.commit()
+    db.close()
+
+
+def current_quota(uid):
+    db = SessionLocal()
+    try:
+        return db.query(User.quota).filter(User.id == uid).scalar()
+    finally:
+        db.close()
+
+
+class TestQuota:
+    """Test atomic reservation and refund"""
+
+    def test_reserve_until_exhausted(self, user_id):
+        """Test that reservation stops at zero"""
+        assert reserve_quota(user_id) == 1
+        assert reserve_quota(user_id) == 0
+        with pytest.raises(QuotaExceeded):
+            reserve_quota(user_id)
+        assert current_quota(user_id) == 0
+
+    def test_concurrent_reservations_never_overdraw(self, user_id):
+        """Test that racing reservations consume exactly the available quota"""
+        def attempt(_):
+            try:
+                reserve_quota(user_id)
+                return True
+            except QuotaExceeded:
+                return False
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(attempt, range(8)))
+
+        assert sum(results) == 2
+        assert current_quota(user_id) == 0
+
+    def test_reservation_refunds_on_error(self, user_id):
+        """Test that a failed job gives its unit back"""
+        with pytest.raises(RuntimeError):
+            with QuotaReservation(user_id):
+                assert current_quota(user_id) == 1
+                raise RuntimeError("crawl failed")
+        assert current_quota(user_id) == 2
+
+    def test_reservation_kept_on_commit(self, user_id):
+        """Test that a committed reservation is consumed"""
+        with QuotaReservation(user_id) as reservation:
+            reservation.commit()
+        assert reservation.remaining == 1
+        assert current_quota(user_id) == 1
+
+    def test_refund(self, user_id):
+        """Test explicit refund"""
+        reserve_quota(user_id)
+        assert refund_quota(user_id) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,118 @@
+"""
+Unit tests for rate_limiter module
+Run with: pytest tests/test_rate_limiter.py -v
+"""
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RateLimiter, MemoryBackend, SQLiteBackend
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch("rate_limiter.time.time", fake):
+        yield fake
+
+
+class TestGCRA:
+    """Test token bucket semantics"""
+
+    def test_burst_then_block(self, clock):
+        """Test that the full burst is allowed and the next request is blocked"""
+        limiter = RateLimiter(limits={"default": (5, 60)})
+        for _ in range(5):
+            assert limiter.is_allowed("k") is True
+        allowed, retry_after = limiter.check("k")
+        assert allowed is False
+        assert retry_after == 12
+
+    def test_refills_one_token_per_interval(self, clock):
+        """Test that one request is allowed again after window/max_requests seconds"""
+        limiter = RateLimiter(limits={"default": (5, 60)})
+        for _ in range(5):
+            limiter.is_allowed("k")
+        clock.now += 12
+        assert limiter.is_allowed("k") is True
+        assert limiter.is_allowed("k") is False
+
+    def test_get_retry_after(self, clock):
+        """Test retry-after reflects time until the next token"""
+        limiter = RateLimiter(limits={"default": (2, 10)})
+        assert limiter.get_retry_after("k") == 0
+        limiter.is_allowed("k")
+        limiter.is_allowed("k")
+        assert limiter.get_retry_after("k") == 5
+
+
+class TestEviction:
+    """Test idle key eviction"""
+
+    def test_idle_keys_are_evicted(self, clock):
+        """Test that keys with a full bucket are dropped"""
+        backend = MemoryBackend()
+        limiter = RateLimiter(backend, limits={"default": (10, 10)})
+        for i in range(100):
+            limiter.is_allowed(f"ip:{i}")
+        assert len(backend) == 100
+        clock.now += 11
+        limiter.is_allowed("fresh")
+        assert len(backend) == 1
+
+    def test_max_keys_bound(self, clock):
+        """Test that memory stays bounded under unique-key floods"""
+        backend = MemoryBackend(max_keys=50)
+        limiter = RateLimiter(backend)
+        for i in range(500):
+            limiter.is_allowed(f"ip:{i}")
+        assert len(backend) <= 50
+
+
+class TestSQLiteBackend:
+    """Test the shared SQLite backend"""
+
+    def test_limit_shared_between_instances(self, clock, tmp_path):
+        """Test that two limiters (workers) share one bucket"""
+        path = str(tmp_path / "limits.db")
+        worker_a = RateLimiter(SQLiteBackend(path), limits={"default": (4, 60)})
+        worker_b = RateLimiter(SQLiteBackend(path), limits={"default": (4, 60)})
+        assert worker_a.is_allowed("k")
+        assert worker_b.is_allowed("k")
+        assert worker_a.is_allowed("k")
+        assert worker_b.is_allowed("k")
+        assert worker_a.is_allowed("k") is False
+        assert worker_b.is_allowed("k") is False
+
+    def test_clear(self, clock, tmp_path):
+        """Test clearing the shared store"""
+        limiter = RateLimiter(SQLiteBackend(str(tmp_path / "limits.db")), limits={"default": (1, 60)})
+        limiter.is_allowed("k")
+        assert limiter.is_allowed("k") is False
+        limiter.clear()
+        assert limiter.is_allowed("k") is True
+
+    def test_reset_one_key(self, clock, tmp_path):
+        """Test that reset refills one bucket and leaves the others"""
+        for backend in (MemoryBackend(), SQLiteBackend(str(tmp_path / "limits.db"))):
+            limiter = RateLimiter(backend, limits={"default": (1, 60)})
+            limiter.is_allowed("a")
+            limiter.is_allowed("b")
+            limiter.reset("a")
+            assert limiter.is_allowed("a") is True
+            assert limiter.is_allowed("b") is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+"""
+Unit tests for rollups module
+Run with: pytest tests/test_rollups.py -v
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, AnalysisReport, ReportDailyRollup
+from rollups import increment, backfill, backfill_if_empty, record_report
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on empty report and rollup tables in a throwaway database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def counts(db):
+    return {
+        (r.day, r.report_type, r.user_id): r.count
+        for r in db.query(ReportDailyRollup).all()
+    }
+
+
+class TestRollups:
+    """Test incremental counters and backfill"""
+
+    def test_increment_creates_then_updates(self, db):
+        """Test that repeated increments land on one row"""
+        day = date(2024, 5, 1)
+        increment(db, ReportDailyRollup, day, "deep_analysis", 3)
+        increment(db, ReportDailyRollup, day, "deep_analysis", 3)
+        increment(db, ReportDailyRollup, day, "deep_analysis", None)
+        db.commit()
+        assert counts(db) == {
+            (day, "deep_analysis", 3): 2,
+            (day, "deep_analysis", 0): 1,
+        }
+
+    def test_backfill_matches_history(self, db):
+        """Test that backfill groups existing reports by day, type and user"""
+        for created, user_id in [
+            (datetime(2024, 5, 1, 9), 1),
+            (datetime(2024, 5, 1, 23), 1),
+            (datetime(2024, 5, 2, 0, 30), 2),
+        ]:
+            db.add(AnalysisReport(user_id=user_id, report_type="deep_analysis", domain="x.com",
+                                  results="{}", created_at=created))
+        db.commit()
+
+        assert backfill(db, ReportDailyRollup, AnalysisReport, AnalysisReport.created_at,
+                        AnalysisReport.report_type, AnalysisReport.user_id) == 2
+        assert counts(db) == {
+            (date(2024, 5, 1), "deep_analysis", 1): 2,
+            (date(2024, 5, 2), "deep_analysis", 2): 1,
+        }
+
+    def test_backfill_if_empty_runs_once(self, db):
+        """Test that the startup backfill loads history once and then leaves counters alone"""
+        args = (ReportDailyRollup, AnalysisReport, AnalysisReport.created_at,
+                AnalysisReport.report_type, AnalysisReport.user_id)
+        assert backfill_if_empty(db, *args) == 0
+        db.add(AnalysisReport(user_id=1, report_type="deep_analysis", domain="x.com",
+                              results="{}", created_at=datetime(2024, 5, 1, 9)))
+        db.commit()
+        assert backfill_if_empty(db, *args) == 1
+        record_report(db, "deep_analysis", 1, when=datetime(2024, 5, 1, 10))
+        db.commit()
+        assert backfill_if_empty(db, *args) == 0
+        assert counts(db) == {(date(2024, 5, 1), "deep_analysis", 1): 2}
+
+    def test_record_report_uses_today(self, db):
+        """Test that record_report counts against the current UTC day"""
+        record_report(db, "deep_analysis", 5)
+        db.commit()
+        assert counts(db) == {(datetime.utcnow().date(), "deep_analysis", 5): 1}
+
+
+class TestAnalyticsScope:
+    """Test that analytics totals can be limited to one user"""
+
+    def test_query_analytics_per_user(self, tmp_path, monkeypatch):
+        """Test per-user and platform-wide totals from the analytics rollup"""
+        import local_services
+        engine = create_engine(f"sqlite:///{tmp_path / 'analytics.db'}")
+        local_services.Base.metadata.create_all(bind=engine)
+        monkeypatch.setattr(local_services, "_Session", sessionmaker(bind=engine))
+        session = local_services.get_db_session()
+        today = datetime.utcnow().date()
+        for user_id, count in ((1, 2), (2, 5)):
+            session.add(local_services.AnalyticsDailyRollup(day=today, report_type="seo", user_id=user_id, count=count))
+        session.commit()
+        session.close()
+
+        assert local_services.query_analytics(user_id=1)["data"] == [{"date": today.isoformat(), "type": "seo", "count": 2}]
+        assert local_services.query_analytics()["data"][0]["count"] == 7
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
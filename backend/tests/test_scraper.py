@@ -6,6 +6,8 @@ import pytest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -16,6 +18,7 @@ from scraper import (
     extract_internal_links,
     generate_seo_issues,
     generate_recommendations,
+    get_page_content,
     get_random_user_agent,
     USER_AGENTS
 )
@@ -304,5 +307,42 @@ class TestRecommendationGeneration:
         assert len(recommendations) <= 3
 
 
+class TestSharedSession:
+    """Test that the process-wide crawl session keeps no state between crawls"""
+
+    @pytest.fixture
+    def cookie_site(self):
+        seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                seen.append(self.headers.get("Cookie"))
+                body = b"<html><head><title>Consent</title></head><body><h1>Hi</h1></body></html>"
+                self.send_response(200)
+                self.send_header("Set-Cookie", "consent=accepted; Path=/")
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        yield f"http://127.0.0.1:{httpd.server_address[1]}", seen
+        httpd.shutdown()
+        httpd.server_close()
+
+    def test_cookies_not_sent_to_later_crawls(self, cookie_site):
+        """Test that a cookie set during one crawl isn't sent on the next"""
+        url, seen = cookie_site
+        assert get_page_content(url + "/", retries=0)["status"] == "success"
+        assert get_page_content(url + "/", retries=0)["status"] == "success"
+        assert seen == [None, None]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
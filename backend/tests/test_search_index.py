@@ -0,0 +1,151 @@
+"""
+Unit tests for search_index module
+Run with: pytest tests/test_search_index.py -v
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+import scraper
+from search_index import SearchIndex, build_match, normalize_domain, page_document
+
+
+def make_page(url, title="", body="", description="", h1=None):
+    return {
+        "url": url,
+        "status": "success",
+        "analysis": {
+            "title": {"text": title},
+            "meta_description": {"text": description},
+            "headers": {"h1_texts": h1 or [], "h2_texts": []},
+        },
+        "text": body,
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SearchIndex(str(tmp_path / "search.db"))
+
+
+class TestQueryParsing:
+    """Test query sanitization and domain normalization"""
+
+    def test_words_phrases_and_prefix(self):
+        """Test that free text becomes quoted FTS5 terms"""
+        assert build_match('trail "running shoes" wat*') == '"trail" "running shoes" "wat"*'
+
+    def test_operators_are_neutralized(self):
+        """Test that FTS5 syntax in user input can't break the query"""
+        assert build_match('NEAR(a b) OR title:x -y') == '"NEAR" "a" "b" "OR" "title" "x" "y"'
+        assert build_match('"" ** :') is None
+
+    def test_normalize_domain(self):
+        """Test that scheme, www and path are dropped"""
+        assert normalize_domain("https://www.Example.com/shop") == "example.com"
+        assert normalize_domain("shop.example.com") == "shop.example.com"
+
+
+class TestSearchIndex:
+    """Test indexing and ranked search"""
+
+    def test_title_match_outranks_body_match(self, index):
+        """Test field weighting and porter stemming"""
+        index.add_pages(1, "a.com", [
+            page_document(make_page("https://a.com/blog", title="Company blog", body="We sell running shoes")),
+            page_document(make_page("https://a.com/shoes", title="Running Shoes", body="Our catalogue")),
+        ] + [
+            page_document(make_page(f"https://a.com/p{i}", title=f"Page {i}", body="Family business"))
+            for i in range(8)
+        ])
+        result = index.search(1, "run shoe")
+        assert [r["url"] for r in result["results"]] == ["https://a.com/shoes", "https://a.com/blog"]
+        assert result["results"][0]["score"] > result["results"][1]["score"]
+
+    def test_workspaces_are_isolated(self, index):
+        """Test that one account never sees another account's pages"""
+        index.add_pages(1, "a.com", [page_document(make_page("https://a.com", title="Trail shoes"))])
+        index.add_pages(2, "b.com", [page_document(make_page("https://b.com", title="Trail shoes"))])
+        assert [r["domain"] for r in index.search(1, "trail")["results"]] == ["a.com"]
+        assert [r["domain"] for r in index.search(2, "trail")["results"]] == ["b.com"]
+        assert index.search(3, "trail")["results"] == []
+
+    def test_domain_filter_and_domains(self, index):
+        """Test filtering by domain and listing indexed domains"""
+        index.add_pages(1, "a.com", [page_document(make_page("https://a.com", title="Boots"))])
+        index.add_pages(1, "https://www.b.com", [page_document(make_page("https://b.com/x", title="Boots"))])
+        assert [r["url"] for r in index.search(1, "boots", domain="b.com")["results"]] == ["https://b.com/x"]
+        assert [d["domain"] for d in index.domains(1)] == ["a.com", "b.com"]
+
+    def test_recrawl_upserts_and_skips_unchanged(self, index):
+        """Test that re-indexing updates changed pages only"""
+        doc = page_document(make_page("https://a.com", title="Old title"))
+        assert index.add_pages(1, "a.com", [doc]) == 1
+        assert index.add_pages(1, "a.com", [doc]) == 0
+        assert index.add_pages(1, "a.com", [dict(doc, title="New title")]) == 1
+        assert index.search(1, "old")["results"] == []
+        assert index.search(1, "new")["count"] == 1
+        assert index.stats()["pages"] == 1
+
+    def test_snippet_is_escaped_and_highlighted(self, index):
+        """Test that page HTML can't leak into snippets"""
+        index.add_pages(1, "a.com", [page_document(make_page("https://a.com", body="<b>Waterproof</b> boots"))])
+        snippet = index.search(1, "waterproof")["results"][0]["snippet"]
+        assert "<mark>Waterproof</mark>" in snippet
+        assert "&lt;b&gt;" in snippet
+
+    def test_delete_workspace(self, index):
+        """Test that deleting a workspace removes it from the index"""
+        index.add_pages(1, "a.com", [page_document(make_page("https://a.com", title="Boots"))])
+        assert index.delete_workspace(1) == 1
+        assert index.search(1, "boots")["results"] == []
+
+    def test_opened_on_first_use(self, tmp_path):
+        """Test that constructing an index doesn't touch the disk"""
+        path = tmp_path / "lazy.db"
+        lazy = SearchIndex(str(path))
+        assert not path.exists()
+        assert lazy.stats()["pages"] == 0
+        assert path.exists()
+
+
+class TestCrawlIndexing:
+    """Test that crawls feed the index page by page"""
+
+    def test_crawl_site_streams_pages_to_sink(self, index, monkeypatch):
+        """Test page_sink receives body text and the crawl result does not"""
+        html = {
+            "https://a.com": "<title>Home</title><p>Hiking gear</p><script>var tents = 1</script>",
+            "https://a.com/tents": "<title>Tents</title><p>Ultralight tents</p>",
+        }
+
+        def fake_page(url, keep_text=False):
+            soup = BeautifulSoup(html[url], "html.parser")
+            page = {
+                "url": url,
+                "status": "success",
+                "analysis": scraper.analyze_page_technical_seo(soup, url),
+                "internal_links": ["https://a.com/tents"],
+            }
+            if keep_text:
+                page["text"] = scraper.page_body_text(soup)
+            return page
+
+        monkeypatch.setattr(scraper, "get_page_content", fake_page)
+        monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+
+        with index.sink(1, "a.com") as sink:
+            sink.batch_size = 1
+            result = scraper.crawl_site("a.com", 5, page_sink=sink)
+
+        assert sink.indexed == 2
+        assert all("text" not in page for page in result.get("pages", []))
+        assert [r["url"] for r in index.search(1, "tents")["results"]] == ["https://a.com/tents"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
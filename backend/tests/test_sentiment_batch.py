@@ -0,0 +1,86 @@
+"""
+Unit tests for batch sentiment analysis
+Run with: pytest tests/test_sentiment_batch.py -v
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import local_services
+from local_services import analyze_sentiment_batch, aggregate_sentiment, format_pysentimiento_result
+from text_cache import text_cache
+
+
+@pytest.fixture
+def simple_analyzer(monkeypatch):
+    """Force the dependency-free rule-based path"""
+    monkeypatch.setattr(local_services, "TEXTBLOB_AVAILABLE", False)
+    monkeypatch.setattr(local_services, "get_sentiment_analyzer", lambda: None)
+    text_cache.clear()
+
+
+class TestSentimentBatch:
+    """Test batch results, ordering and aggregates"""
+
+    def test_results_align_with_input(self, simple_analyzer):
+        """Test that empty texts fail in place without shifting other results"""
+        texts = ["Great product, love it", "", "Terrible and broken", "   "]
+        response = analyze_sentiment_batch(texts)
+
+        results = response["results"]
+        assert len(results) == 4
+        assert results[0]["sentiment"]["label"] == "Positive"
+        assert results[1] == {"success": False, "error": "No text provided"}
+        assert results[2]["sentiment"]["label"] == "Negative"
+        assert results[3]["success"] is False
+        assert response["method"] == "simple"
+
+    def test_matches_single_path(self, simple_analyzer):
+        """Test that batch items equal analyze_sentiment() output"""
+        texts = ["Awesome support from Acme", "The app is confusing"]
+        batch = analyze_sentiment_batch(texts)["results"]
+        assert batch == [local_services.analyze_sentiment(t) for t in texts]
+
+    def test_process_pool_path(self, simple_analyzer, monkeypatch):
+        """Test that fanning out over worker processes keeps input order"""
+        monkeypatch.setattr(local_services, "NLP_POOL_MIN_BATCH", 1)
+        monkeypatch.setattr(local_services, "NLP_WORKERS", 2)
+        monkeypatch.setattr(local_services, "_nlp_pool", None)
+        texts = ["good"] * 5 + ["bad"] * 5
+        try:
+            labels = [r["sentiment"]["label"] for r in analyze_sentiment_batch(texts)["results"]]
+        finally:
+            local_services.get_nlp_pool().shutdown()
+        assert labels == ["Positive"] * 5 + ["Negative"] * 5
+
+    def test_aggregate(self, simple_analyzer):
+        """Test label counts, mean score and top entities"""
+        response = analyze_sentiment_batch(["Acme is great", "Acme is bad", "Nothing here", ""])
+        aggregate = response["aggregate"]
+        assert aggregate["total"] == 4
+        assert aggregate["analyzed"] == 3
+        assert aggregate["failed"] == 1
+        assert aggregate["labels"] == {"Positive": 1, "Neutral": 1, "Negative": 1}
+        assert aggregate["mean_score"] == 0
+        assert aggregate["top_entities"][0] == {"name": "acme", "count": 2}
+
+    def test_aggregate_empty(self):
+        """Test aggregate over a batch with no successful items"""
+        assert aggregate_sentiment([])["mean_score"] == 0
+
+    def test_format_pysentimiento_result(self):
+        """Test mapping of model probabilities to the response format"""
+        result = format_pysentimiento_result(
+            {"NEG": 0.1, "NEU": 0.2, "POS": 0.7},
+            {"joy": 0.6, "others": 0.35, "anger": 0.05},
+            ["acme app"]
+        )
+        assert result["sentiment"] == {"score": 0.6, "magnitude": 0.7, "label": "Positive", "confidence": 70.0}
+        assert [e["emotion"] for e in result["emotions"]] == ["Joy", "Others"]
+        assert result["entities"][0]["type"] == "CONSUMER_GOOD"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,105 @@
+"""
+Unit tests for serialization module
+Run with: pytest tests/test_serialization.py -v
+"""
+import pytest
+import sys
+import os
+import json
+
+from fastapi.testclient import TestClient
+from jose import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+from serialization import dumps, embed, loads
+
+
+SAMPLE = {
+    "domain": "example.com",
+    "pages": [{"url": "https://example.com/ü", "score": 87.5, "links": ["/a", "/b"], "ok": True, "error": None}],
+    "counts": {1: 3, 2: 4}
+}
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param and not serialization.ORJSON_AVAILABLE:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", request.param)
+    return request.param
+
+
+class TestEncoding:
+    """Test dumps/loads and embedding pre-encoded members"""
+
+    def test_round_trip(self, backend):
+        """Test compact UTF-8 output that decodes back to the same data"""
+        encoded = dumps(SAMPLE)
+        assert isinstance(encoded, bytes)
+        assert b" " not in encoded.replace(b"example.com", b"")
+        assert "ü".encode() in encoded
+        assert loads(encoded) == json.loads(json.dumps(SAMPLE))
+
+    def test_embed(self, backend):
+        """Test that embedded members are spliced in verbatim"""
+        data = dumps(SAMPLE)
+        body = embed({"success": True, "job_id": "cached"}, data=data, trace=b'{"spans":[]}')
+        assert json.loads(body) == {
+            "success": True, "job_id": "cached", "data": json.loads(data), "trace": {"spans": []}
+        }
+        assert json.loads(embed({}, data=b"[1,2]")) == {"data": [1, 2]}
+        assert embed({"a": 1}) == dumps({"a": 1})
+
+
+class TestAnalyzeResponses:
+    """Test that /api/analyze serves cached results as stored bytes"""
+
+    @pytest.fixture
+    def client(self):
+        import main
+        from models import Base, engine, SessionLocal, User
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        user = User(email="serialization-test@test.com", hashed_password="x", quota=5)
+        db.add(user)
+        db.commit()
+        uid = user.id
+        db.close()
+        main.rate_limiter.clear()
+        main.analysis_cache.clear()
+        token = jwt.encode({"sub": "serialization-test@test.com"}, main.SECRET_KEY, algorithm="HS256")
+        yield TestClient(main.app), {"Authorization": f"Bearer {token}"}
+        main.analysis_cache.clear()
+        main.user_cache.clear()
+        db = SessionLocal()
+        db.query(User).filter(User.id == uid).delete()
+        db.commit()
+        db.close()
+
+    def test_cache_hit_serves_stored_bytes(self, client):
+        """Test the cached envelope around pre-encoded data"""
+        import main
+        test_client, headers = client
+        from http_cache import CachedBody
+        main.analysis_cache.set("analysis:cached.example:5", CachedBody(embed(
+            {"success": True, "job_id": "cached", "status": "completed", "cached": True}, data=dumps(SAMPLE)
+        )), ttl=60)
+        response = test_client.post("/api/analyze", headers=headers, json={"domain": "cached.example", "max_pages": 5})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        body = response.json()
+        assert body["cached"] is True and body["job_id"] == "cached"
+        assert body["data"] == json.loads(json.dumps(SAMPLE))
+
+    def test_default_response_class(self, client):
+        """Test that plain dict endpoints still return normal JSON"""
+        test_client, headers = client
+        response = test_client.get("/api/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["email"] == "serialization-test@test.com"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
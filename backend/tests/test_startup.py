@@ -0,0 +1,108 @@
+"""
+Startup import budget and lazy import tests
+Run with: pytest tests/test_startup.py -v
+"""
+import pytest
+import sys
+import os
+import json
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lazy_imports import LazyModule, is_installed, lazy_import, warm_up
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative `import main` time; override on slow CI machines
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+# Must not be imported until a request (or the startup warm-up) needs them
+HEAVY_MODULES = ("numpy", "yake", "textblob", "nltk", "PIL", "cv2", "torch", "transformers",
+                 "pysentimiento", "pandas", "plotly", "crawl4ai", "networkx")
+
+
+def import_main(*flags):
+    env = dict(os.environ, SEARCH_INDEX_DB=":memory:")
+    code = "import json, sys, main; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, *flags, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(stderr):
+    """(module, self_us, cumulative_us, depth) rows from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class TestStartupBudget:
+    """Test what `import main` pulls in and how long it takes"""
+
+    def test_heavy_dependencies_are_deferred(self):
+        """Test that NLP, vision and data libraries aren't imported with the app"""
+        modules, _ = import_main()
+        loaded = {m.split(".")[0] for m in modules}
+        assert not loaded & set(HEAVY_MODULES), sorted(loaded & set(HEAVY_MODULES))
+
+    def test_import_time_budget(self):
+        """Test cumulative import time of main against STARTUP_IMPORT_BUDGET_MS"""
+        _, stderr = import_main("-X", "importtime")
+        rows = parse_importtime(stderr)
+        total_ms = next(cum for name, _, cum, depth in rows if name == "main" and depth == 0) / 1000
+        breakdown = sorted(((cum / 1000, name) for name, _, cum, depth in rows if depth == 1), reverse=True)[:10]
+        assert total_ms <= STARTUP_IMPORT_BUDGET_MS, (
+            f"import main took {total_ms:.0f} ms (budget {STARTUP_IMPORT_BUDGET_MS:.0f} ms); slowest direct imports: "
+            + ", ".join(f"{name} {ms:.0f} ms" for ms, name in breakdown)
+        )
+
+
+class TestLazyImports:
+    """Test the module proxy and availability checks"""
+
+    def test_import_on_first_attribute(self, tmp_path, monkeypatch):
+        """Test that the module runs only when an attribute is read"""
+        (tmp_path / "lazy_probe_module.py").write_text("VALUE = 42\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, "lazy_probe_module", raising=False)
+
+        proxy = lazy_import("lazy_probe_module")
+        assert isinstance(proxy, LazyModule) and not proxy.loaded
+        assert "lazy_probe_module" not in sys.modules
+        assert proxy.VALUE == 42
+        assert proxy.loaded and "lazy_probe_module" in sys.modules
+        with pytest.raises(AttributeError):
+            proxy.missing
+
+    def test_missing_module_fails_on_use(self):
+        """Test that a proxy for an absent module only fails when used"""
+        proxy = lazy_import("definitely_not_installed_module")
+        with pytest.raises(ImportError):
+            proxy.anything
+
+    def test_is_installed(self):
+        """Test availability checks without importing"""
+        assert is_installed("json")
+        assert not is_installed("definitely_not_installed_module")
+        assert not is_installed("definitely_not_installed_module.sub")
+
+    def test_warm_up(self, tmp_path, monkeypatch):
+        """Test that warm-up imports deferred modules and skips missing ones"""
+        (tmp_path / "lazy_warm_module.py").write_text("VALUE = 1\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, "lazy_warm_module", raising=False)
+        warm_up(["lazy_warm_module", "definitely_not_installed_module"], background=False)
+        assert "lazy_warm_module" in sys.modules
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
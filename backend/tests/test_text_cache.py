@@ -0,0 +1,107 @@
+"""
+Unit tests for text_cache module
+Run with: pytest tests/test_text_cache.py -v
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import local_services
+from text_cache import TextResultCache, cache_key, text_cache
+
+
+class TestTextResultCache:
+    """Test keying, LRU eviction, copies and persistence"""
+
+    def test_key_normalizes_whitespace_not_case(self):
+        """Test that whitespace variants share a key but case does not"""
+        assert cache_key("sentiment", "Great  product\n") == cache_key("sentiment", "Great product")
+        assert cache_key("sentiment", "Great product") != cache_key("sentiment", "great product")
+        assert cache_key("sentiment", "x", "v1") != cache_key("sentiment", "x", "v2")
+        assert cache_key("sentiment", "x") != cache_key("keywords", "x")
+
+    def test_hit_returns_private_copy(self):
+        """Test that mutating a returned value doesn't corrupt the cache"""
+        cache = TextResultCache()
+        cache.set("sentiment", "hello", {"entities": [1]})
+        hit, value = cache.get("sentiment", "hello")
+        assert hit
+        value["entities"].append(2)
+        assert cache.get("sentiment", "hello")[1] == {"entities": [1]}
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        cache = TextResultCache(max_entries=2)
+        cache.set("ns", "a", 1)
+        cache.set("ns", "b", 2)
+        cache.get("ns", "a")
+        cache.set("ns", "c", 3)
+        assert cache.get("ns", "a") == (True, 1)
+        assert cache.get("ns", "b") == (False, None)
+        assert cache.stats()["evictions"] == 1
+
+    def test_hit_rate(self):
+        """Test per-namespace hit/miss counters"""
+        cache = TextResultCache()
+        cache.get("ns", "a")
+        cache.set("ns", "a", 1)
+        cache.get("ns", "a")
+        cache.get("ns", "a")
+        stats = cache.stats()
+        assert stats["namespaces"]["ns"] == {"hits": 2, "misses": 1, "hit_rate": 0.667}
+        assert stats["hit_rate"] == 0.667
+
+    def test_sqlite_persistence(self, tmp_path):
+        """Test that entries survive a new cache instance on the same file"""
+        path = str(tmp_path / "text_cache.db")
+        TextResultCache(db_path=path).set("ns", "review", {"label": "Positive"})
+        assert TextResultCache(db_path=path).get("ns", "review") == (True, {"label": "Positive"})
+
+
+class TestMemoizedAnalysis:
+    """Test that local_services analyses skip work on repeated text"""
+
+    @pytest.fixture(autouse=True)
+    def simple_backend(self, monkeypatch):
+        monkeypatch.setattr(local_services, "TEXTBLOB_AVAILABLE", False)
+        monkeypatch.setattr(local_services, "get_sentiment_analyzer", lambda: None)
+        text_cache.clear()
+
+    def test_sentiment_cached(self, monkeypatch):
+        """Test that the second identical text doesn't reach the analyzer"""
+        calls = []
+        original = local_services.analyze_sentiment_simple
+        monkeypatch.setattr(local_services, "analyze_sentiment_simple",
+                            lambda text: calls.append(text) or original(text))
+
+        first = local_services.analyze_sentiment("Great service")
+        second = local_services.analyze_sentiment("Great   service ")
+        assert first == second
+        assert len(calls) == 1
+
+    def test_batch_dedupes_and_uses_cache(self):
+        """Test that duplicates within and across batches are scored once"""
+        local_services.analyze_sentiment("good value")
+        response = local_services.analyze_sentiment_batch(["good value", "bad fit", "bad fit"])
+        assert response["scored"] == 1
+        assert response["results"][1] == response["results"][2]
+        assert response["results"][1] is not response["results"][2]
+
+    def test_keywords_keyed_by_top_n(self):
+        """Test that different top_n values don't share a cache entry"""
+        text = "alpha alpha beta beta gamma"
+        assert len(local_services.extract_keywords_local(text, top_n=1)) == 1
+        assert len(local_services.extract_keywords_local(text, top_n=3)) == 3
+        assert text_cache.stats()["namespaces"]["keywords"]["hits"] == 0
+
+    def test_complexity_cached(self):
+        """Test that text complexity is served from cache on repeat"""
+        text = "Short text. Another sentence!"
+        assert local_services.analyze_text_complexity(text) == local_services.analyze_text_complexity(text)
+        assert text_cache.stats()["namespaces"]["complexity"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+"""
+Unit tests for tfidf_index module
+Run with: pytest tests/test_tfidf_index.py -v
+"""
+import pytest
+import sys
+import os
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tfidf_index import CorpusIndex, SELF, terms
+from content_gap_analyzer import analyze_content_gaps
+from main import generate_keyword_gaps
+
+
+def page(title, h1=()):
+    return {"analysis": {"title": {"text": title}, "meta_description": {"text": ""},
+                         "headers": {"h1_texts": list(h1), "h2_texts": []}}}
+
+
+class TestCorpusIndex:
+    """Test the sparse index and gap ranking"""
+
+    def test_terms_include_bigrams(self):
+        """Test unigram and bigram term counts"""
+        assert terms("Trail running shoes") == Counter({
+            "trail": 1, "running": 1, "shoes": 1, "trail running": 1, "running shoes": 1
+        })
+
+    def test_matrix_shapes(self):
+        """Test CSR arrays and per-owner statistics"""
+        index = CorpusIndex([(SELF, {"a": 2, "b": 1}), ("x", {"b": 3}), ("x", {})])
+        assert index.num_docs == 3
+        assert index.num_terms == 2
+        assert index.df.tolist() == [1, 2]
+        assert index.doc_len.tolist() == [3, 3, 0]
+        assert index.owner_pages.tolist() == [1, 2]
+        assert index.owner_matrix(index.counts).tolist() == [[2, 1], [0, 3]]
+
+    def test_gaps_rank_shared_competitor_terms_first(self):
+        """Test that terms used by more competitors outrank one-off terms"""
+        index = CorpusIndex([
+            (SELF, {"shoes": 5}),
+            ("a", {"shoes": 4, "waterproof": 3, "sale": 1}),
+            ("b", {"shoes": 2, "waterproof": 2}),
+            ("c", {"waterproof": 1, "gloves": 4}),
+        ])
+        gaps = index.keyword_gaps(SELF)
+        assert [g["keyword"] for g in gaps][:1] == ["waterproof"]
+        assert gaps[0]["competitor_usage"] == 3
+        assert gaps[0]["status"] == "missing"
+        assert gaps[0]["frequency"] == 6
+        assert "shoes" not in [g["keyword"] for g in gaps]
+
+    def test_weak_terms(self):
+        """Test that heavily underused terms are reported as weak"""
+        index = CorpusIndex([
+            (SELF, Counter({"boots": 1, "filler": 200})),
+            ("a", {"boots": 30, "filler": 1}),
+        ])
+        gaps = index.keyword_gaps(SELF, weak_ratio=0.5)
+        assert gaps[0]["keyword"] == "boots"
+        assert gaps[0]["status"] == "weak"
+        assert index.keyword_gaps(SELF, weak_ratio=0.1) == []
+
+    def test_min_competitors_and_top_n(self):
+        """Test competitor usage threshold and result limit"""
+        docs = [(SELF, {"x": 1})] + [(f"c{i}", {f"t{i}": 1, "shared": 1}) for i in range(30)]
+        index = CorpusIndex(docs)
+        assert [g["keyword"] for g in index.keyword_gaps(SELF, min_competitors=2)] == ["shared"]
+        assert len(index.keyword_gaps(SELF, top_n=5)) == 5
+
+    def test_empty(self):
+        """Test that no competitors means no gaps"""
+        assert CorpusIndex([(SELF, {"a": 1})]).keyword_gaps(SELF) == []
+        assert CorpusIndex([]).keyword_gaps(SELF) == []
+
+
+class TestGapCallers:
+    """Test the endpoints' gap functions on crawl-shaped data"""
+
+    def test_generate_keyword_gaps(self):
+        """Test main.generate_keyword_gaps on crawl_site() output"""
+        yours = {"pages": [page("Running shoes | Store", ["Running shoes"])]}
+        competitors = {
+            "a.com": {"pages": [page("Waterproof hiking boots"), page("Trail running shoes")]},
+            "b.com": {"pages": [page("Hiking boots sale")]},
+        }
+        gaps = generate_keyword_gaps(yours, competitors)
+        keywords = [g["keyword"] for g in gaps]
+        assert keywords[0] in ("hiking boots", "hiking", "boots")
+        assert gaps[0]["competitor_usage"] == 2
+        assert gaps[0]["priority"] == "high"
+        assert "running shoes" not in keywords
+        assert generate_keyword_gaps(yours, {}) == []
+
+    def test_content_gap_analyzer(self):
+        """Test ContentGapAnalyzer on deep_crawler pages"""
+        yours = {"pages_analyzed": [{"keywords": ["shoes", "running"]}]}
+        comps = [
+            {"pages_analyzed": [{"keywords": ["shoes", "waterproof"]}, {"keywords": ["boots"]}]},
+            {"pages_analyzed": [{"keywords": ["waterproof", "waterproof"]}]},
+        ]
+        result = analyze_content_gaps(yours, comps)
+        assert [g["keyword"] for g in result["keyword_gaps"]] == ["waterproof"]
+        assert result["keyword_gaps"][0]["total_frequency"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
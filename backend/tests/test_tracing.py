@@ -0,0 +1,196 @@
+"""
+Unit tests for tracing module
+Run with: pytest tests/test_tracing.py -v
+"""
+import pytest
+import sys
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fastapi.testclient import TestClient
+from jose import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import scraper
+from models import Base, engine, SessionLocal, User
+from tracing import annotate, current_trace, span, start_trace, traced, wrap
+
+
+def names(timeline):
+    return [s["name"] for s in timeline["spans"]]
+
+
+class TestSpans:
+    """Test span nesting and the timeline format"""
+
+    def test_nesting_attrs_and_errors(self):
+        """Test parent ids, attributes, errors and the slowest list"""
+        @traced("work")
+        def work():
+            annotate(items=3)
+
+        with start_trace("request", user=1) as trace:
+            with span("outer") as outer:
+                outer.set(step="a")
+                work()
+            with pytest.raises(ValueError):
+                with span("failing"):
+                    raise ValueError("boom")
+
+        timeline = trace.timeline()
+        root, outer, inner, failing = timeline["spans"]
+        assert names(timeline) == ["request", "outer", "work", "failing"]
+        assert root["parent"] is None and root["attrs"] == {"user": 1}
+        assert outer["parent"] == root["id"] and outer["attrs"] == {"step": "a"}
+        assert inner["parent"] == outer["id"] and inner["attrs"] == {"items": 3}
+        assert failing["error"] == "ValueError: boom"
+        assert timeline["span_count"] == 4
+        assert timeline["total_ms"] >= outer["ms"]
+        assert {s["name"] for s in timeline["slowest"]} <= {"outer", "work", "failing"}
+
+    def test_noop_outside_trace(self):
+        """Test that spans and annotations outside a trace record nothing"""
+        assert current_trace() is None
+        with span("orphan") as s:
+            s.set(x=1)
+            annotate(y=2)
+        assert current_trace() is None
+
+    def test_span_cap(self):
+        """Test that spans beyond the cap are counted, not kept"""
+        with start_trace("capped") as trace:
+            trace.max_spans = 3
+            for _ in range(5):
+                with span("step"):
+                    pass
+        assert len(trace.spans) == 3
+        assert trace.timeline()["dropped_spans"] == 3
+
+    def test_concurrent_tasks_are_isolated(self):
+        """Test that interleaved async requests keep separate traces"""
+        async def request(name):
+            with start_trace(name) as trace:
+                for _ in range(3):
+                    with span(f"{name}-step"):
+                        await asyncio.sleep(0)
+            return trace
+
+        async def both():
+            return await asyncio.gather(request("a"), request("b"))
+
+        a, b = asyncio.run(both())
+        assert names(a.timeline()) == ["a"] + ["a-step"] * 3
+        assert names(b.timeline()) == ["b"] + ["b-step"] * 3
+
+    def test_wrap_joins_worker_threads(self):
+        """Test that wrapped pool tasks nest under the submitting span"""
+        def task(i):
+            with span("task", i=i):
+                pass
+
+        with start_trace("fanout") as trace:
+            with span("pool") as pool_span:
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    list(pool.map(wrap(task), range(4)))
+        tasks = [s for s in trace.spans if s.name == "task"]
+        assert len(tasks) == 4
+        assert all(s.parent_id == pool_span.id for s in tasks)
+
+
+@pytest.fixture(scope="module")
+def site():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path.startswith("/missing"):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = (
+                "<html><head><title>Running shoes</title></head><body><h1>Trail running shoes</h1>"
+                "<p>Lightweight trail running shoes for every runner.</p>"
+                "<a href='/about'>About</a><a href='/missing'>Gone</a></body></html>"
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+class TestCrawlTracing:
+    """Test spans emitted by the crawler and the analysis endpoint"""
+
+    def test_crawl_site_spans(self, site, monkeypatch):
+        """Test one fetch_page span per URL under crawl_site, with stage timings"""
+        monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+        with start_trace("crawl") as trace:
+            result = scraper.crawl_site(site, max_pages=5)
+
+        timeline = trace.timeline()
+        crawl = next(s for s in timeline["spans"] if s["name"] == "crawl_site")
+        pages = [s for s in timeline["spans"] if s["name"] == "fetch_page"]
+        assert crawl["attrs"]["pages"] == result["total_pages"] == 2
+        assert crawl["attrs"]["failed"] == 1
+        assert all(p["parent"] == crawl["id"] for p in pages)
+        ok = [p for p in pages if p["attrs"].get("status") == 200]
+        assert len(ok) == 2 and "ttfb_ms" in ok[0]["attrs"] and "parse_ms" in ok[0]["attrs"]
+        assert [p["attrs"]["status"] for p in pages if p not in ok] == [404]
+
+    def test_analyze_returns_and_stores_trace(self, site, monkeypatch):
+        """Test the trace flag on /api/analyze and the stored timeline"""
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        user = User(email="trace-test@test.com", hashed_password="x", quota=5)
+        db.add(user)
+        db.commit()
+        uid = user.id
+        db.close()
+
+        monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+        monkeypatch.setattr(main, "get_geo_location", lambda ip: "Unknown")
+        main.rate_limiter.clear()
+        main.analysis_cache.clear()
+        token = jwt.encode({"sub": "trace-test@test.com"}, main.SECRET_KEY, algorithm="HS256")
+        headers = {"Authorization": f"Bearer {token}"}
+        client = TestClient(main.app)
+        try:
+            response = client.post("/api/analyze", headers=headers, json={
+                "domain": site, "competitors": [site + "/about"], "max_pages": 3, "trace": True
+            })
+            body = response.json()
+            assert body["success"], body
+            trace = body["trace"]
+            for name in ("deep_analysis", "crawl_site", "fetch_page", "competitors", "keyword_gaps", "serialize", "db.write"):
+                assert name in names(trace), name
+            assert trace["spans"][0]["attrs"]["domain"] == site
+
+            report_id = int(body["job_id"].split("_")[1])
+            stored = client.get(f"/api/reports/{report_id}/trace", headers=headers)
+            assert stored.status_code == 200
+            assert stored.json()["trace"]["trace_id"] == trace["trace_id"]
+        finally:
+            main.user_cache.clear()
+            db = SessionLocal()
+            db.query(User).filter(User.id == uid).delete()
+            db.commit()
+            db.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
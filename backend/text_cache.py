@@ -0,0 +1,142 @@
+"""
+Content-addressed cache for text analysis results
+
+Results are keyed by sha256(namespace, version, normalized text), so the
+same review, ad copy or heading is scored once no matter how often it
+arrives. Values are stored as JSON strings: a hit decodes a fresh copy,
+so callers can't mutate what other callers will read.
+
+- in-memory LRU bounded by TEXT_CACHE_MAX_ENTRIES
+- optional write-through SQLite persistence (TEXT_CACHE_DB) so warm
+  entries survive restarts and are shared between workers
+- per-namespace hit/miss counters for /api/stats
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from metrics import record_cache
+
+logger = logging.getLogger("ai-grinners.text_cache")
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC + collapsed whitespace; keeps case since models are case-sensitive"""
+    return _whitespace.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(namespace: str, text: str, version: str = "") -> str:
+    digest = hashlib.sha256()
+    for part in (namespace, version, normalize_text(text)):
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TextResultCache:
+    """LRU of JSON-encoded results with optional SQLite backing"""
+
+    def __init__(self, max_entries: int = 10000, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS text_results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def _count(self, namespace: str, field: str):
+        counters = self._counters.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters[field] += 1
+        record_cache(f"text.{namespace}", field == "hits")
+
+    def _remember(self, key: str, encoded: str):
+        self._entries[key] = encoded
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, namespace: str, text: str, version: str = "") -> Tuple[bool, Any]:
+        """Return (hit, value). The value is a private copy"""
+        key = cache_key(namespace, text, version)
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute("SELECT value FROM text_results WHERE key = ?", (key,)).fetchone()
+                if row:
+                    encoded = row[0]
+                    self._remember(key, encoded)
+            self._count(namespace, "hits" if encoded is not None else "misses")
+
+        if encoded is None:
+            return False, None
+        return True, json.loads(encoded)
+
+    def set(self, namespace: str, text: str, value: Any, version: str = ""):
+        key = cache_key(namespace, text, version)
+        encoded = json.dumps(value)
+        with self._lock:
+            self._remember(key, encoded)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO text_results (key, value, created) VALUES (?, ?, ?)",
+                        (key, encoded, time.time())
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"Text cache persist failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+            self.evictions = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM text_results")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            namespaces = {}
+            hits = misses = 0
+            for namespace, c in self._counters.items():
+                total = c["hits"] + c["misses"]
+                namespaces[namespace] = dict(c, hit_rate=round(c["hits"] / total, 3) if total else 0)
+                hits += c["hits"]
+                misses += c["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "persistent": self._db is not None,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0,
+                "namespaces": namespaces
+            }
+
+
+# Global text cache instance
+text_cache = TextResultCache(
+    max_entries=int(os.getenv("TEXT_CACHE_MAX_ENTRIES", "10000")),
+    db_path=os.getenv("TEXT_CACHE_DB") or None
+)
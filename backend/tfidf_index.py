@@ -0,0 +1,162 @@
+"""
+Sparse TF-IDF / BM25 corpus index for keyword gap analysis
+
+Every crawled page (yours and each competitor's) becomes one row of a CSR
+document-term matrix held as numpy arrays. Term weights, per-site totals
+and gap scores are all computed with array operations, so scoring five
+competitors x hundreds of pages takes milliseconds.
+
+Gap score for term t (higher = bigger gap):
+
+    mean competitor weight(t) x share of competitors using t - your weight(t)
+
+where a site's weight is the mean BM25 (or TF-IDF) weight of t over that
+site's pages. Terms you don't use at all are "missing"; terms you use far
+less than competitors do are "weak".
+
+    index = CorpusIndex.from_texts({SELF: your_pages, "rival.com": pages})
+    index.keyword_gaps(SELF, top_n=20)
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from keyword_engine import tokenize
+
+logger = logging.getLogger("ai-grinners.tfidf_index")
+
+# Owner key for "your site" in gap analysis
+SELF = "__self__"
+
+
+def terms(text: str, ngrams: int = 2, min_length: int = 3) -> Counter:
+    """Term counts of a text: shared-tokenizer unigrams plus adjacent n-grams"""
+    words = tokenize(text, min_length=min_length)
+    counts = Counter(words)
+    for n in range(2, ngrams + 1):
+        counts.update(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+    return counts
+
+
+class CorpusIndex:
+    """CSR document-term matrix with documents grouped by owner (site)"""
+
+    def __init__(self, docs: Iterable[Tuple[Hashable, Mapping[str, int]]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.owners: List[Hashable] = []
+        owner_ids: Dict[Hashable, int] = {}
+        vocab: Dict[str, int] = {}
+        indptr, indices, counts, doc_owner = [0], [], [], []
+
+        for owner, term_counts in docs:
+            if owner not in owner_ids:
+                owner_ids[owner] = len(self.owners)
+                self.owners.append(owner)
+            doc_owner.append(owner_ids[owner])
+            for term, count in term_counts.items():
+                if count > 0:
+                    indices.append(vocab.setdefault(term, len(vocab)))
+                    counts.append(count)
+            indptr.append(len(indices))
+
+        self.vocab = vocab
+        self.terms = np.array(list(vocab), dtype=object)
+        self.owner_ids = owner_ids
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.counts = np.array(counts, dtype=np.float64)
+        self.doc_owner = np.array(doc_owner, dtype=np.int64)
+
+        # Row (document) of every stored entry, and derived statistics
+        self.rows = np.repeat(np.arange(self.num_docs), np.diff(self.indptr))
+        self.doc_len = np.bincount(self.rows, weights=self.counts, minlength=self.num_docs)
+        self.df = np.bincount(self.indices, minlength=self.num_terms).astype(np.float64)
+        self.owner_pages = np.bincount(self.doc_owner, minlength=len(self.owners)).astype(np.float64)
+
+    @classmethod
+    def from_texts(cls, sites: Mapping[Hashable, Iterable[str]], ngrams: int = 2, **kwargs) -> "CorpusIndex":
+        """One document per text, grouped by site key"""
+        return cls(((owner, terms(text, ngrams)) for owner, texts in sites.items() for text in texts), **kwargs)
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def num_terms(self) -> int:
+        return len(self.vocab)
+
+    def bm25_weights(self) -> np.ndarray:
+        """BM25 weight of every stored (doc, term) entry"""
+        n = self.num_docs
+        idf = np.log1p((n - self.df + 0.5) / (self.df + 0.5))
+        avg_len = self.doc_len.mean() if n else 0.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len[self.rows] / (avg_len or 1.0))
+        tf = self.counts
+        return idf[self.indices] * tf * (self.k1 + 1) / (tf + norm)
+
+    def tfidf_weights(self) -> np.ndarray:
+        """Length-normalised TF x smoothed IDF of every stored entry"""
+        idf = np.log((1 + self.num_docs) / (1 + self.df)) + 1
+        return self.counts / np.maximum(self.doc_len[self.rows], 1) * idf[self.indices]
+
+    def owner_matrix(self, values: np.ndarray) -> np.ndarray:
+        """Dense (owners x terms) sums of a per-entry array"""
+        flat = self.doc_owner[self.rows] * self.num_terms + self.indices
+        size = len(self.owners) * self.num_terms
+        return np.bincount(flat, weights=values, minlength=size).reshape(len(self.owners), self.num_terms)
+
+    def keyword_gaps(
+        self,
+        you: Hashable = SELF,
+        competitors: Optional[Sequence[Hashable]] = None,
+        top_n: int = 20,
+        scoring: str = "bm25",
+        min_competitors: int = 1,
+        weak_ratio: float = 0.25
+    ) -> List[Dict]:
+        """Ranked terms competitors weight heavily that you lack (missing) or underuse (weak)"""
+        if competitors is None:
+            competitors = [o for o in self.owners if o != you]
+        comp_ids = [self.owner_ids[c] for c in competitors if c in self.owner_ids]
+        if not comp_ids or not self.num_terms:
+            return []
+
+        weights = self.bm25_weights() if scoring == "bm25" else self.tfidf_weights()
+        per_page = self.owner_matrix(weights) / np.maximum(self.owner_pages, 1)[:, None]
+        comp = per_page[comp_ids]
+        if you in self.owner_ids:
+            yours = per_page[self.owner_ids[you]]
+        else:
+            yours = np.zeros(self.num_terms)
+
+        usage = (comp > 0).sum(axis=0)
+        comp_mean = comp.mean(axis=0)
+        score = comp_mean * usage / len(comp_ids) - yours
+        candidates = np.flatnonzero((usage >= min_competitors) & (yours < weak_ratio * comp_mean) & (score > 0))
+        if not len(candidates):
+            return []
+
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-score[candidates], top_n - 1)[:top_n]]
+        candidates = candidates[np.lexsort((self.terms[candidates].astype(str), -score[candidates]))]
+
+        page_hits = self.owner_matrix(np.ones_like(self.counts))[comp_ids][:, candidates].sum(axis=0)
+        frequency = self.owner_matrix(self.counts)[comp_ids][:, candidates].sum(axis=0)
+        return [
+            {
+                "keyword": self.terms[t],
+                "score": round(float(score[t]), 4),
+                "competitor_usage": int(usage[t]),
+                "competitor_weight": round(float(comp_mean[t]), 4),
+                "your_weight": round(float(yours[t]), 4),
+                "status": "missing" if yours[t] == 0 else "weak",
+                "pages": int(pages),
+                "frequency": int(freq)
+            }
+            for t, pages, freq in zip(candidates, page_hits, frequency)
+        ]
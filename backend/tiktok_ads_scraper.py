@@ -8,10 +8,11 @@ from bs4 import BeautifulSoup
 from typing import List, Dict
 
 class TikTokAdsLibraryScraper:
-    def __init__(self):
+    def __init__(self, session: requests.Session = None):
         self.base_url = "https://library.tiktok.com/ads"
+        self.session = session or requests.Session()
     
-    def search_ads(self, advertiser_name: str) -> Dict:
+    def search_ads(self, advertiser_name: str, timeout: float = 15) -> Dict:
         """
         Search TikTok Ad Library
         Note: TikTok's library is public, no API key needed for basic search
@@ -24,7 +25,7 @@ class TikTokAdsLibraryScraper:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            response = requests.get(search_url, headers=headers, timeout=15)
+            response = self.session.get(search_url, headers=headers, timeout=timeout)
             
             if response.status_code == 200:
                 # TikTok's ad library is React-based, might need Selenium
@@ -0,0 +1,209 @@
+"""
+Lightweight per-request tracing
+
+An analysis opens a trace with start_trace(); code anywhere below it wraps
+work in span(name, **attrs). The current trace and span live in context
+variables, so nested spans get their parent id without being passed
+around, and concurrent requests never see each other's spans. Outside a
+trace span() costs one context-variable lookup.
+
+- Trace.timeline() is a compact, JSON-safe list of spans (start offset and
+  duration in ms, parent id, attributes, error) plus the slowest spans
+- annotate(**attrs) adds attributes to whatever span is current, so a
+  @traced function can report status codes or retry counts
+- spans are capped at TRACE_MAX_SPANS per trace; extras are counted, not kept
+- worker threads don't inherit context variables: submit wrap(fn) to a
+  pool to keep its spans in the caller's trace
+"""
+
+import contextvars
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("ai-grinners.tracing")
+
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "2000"))
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    """One timed operation"""
+    __slots__ = ("id", "parent_id", "name", "start", "end", "attrs", "error")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, attrs: Dict[str, Any]):
+        self.id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs
+        self.error = None
+
+    def set(self, **attrs):
+        """Attach attributes (status codes, sizes, counts) to the span"""
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    """Stand-in yielded when no trace is active"""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """All spans of one traced request"""
+
+    def __init__(self, name: str, max_spans: int = TRACE_MAX_SPANS):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _open(self, name: str, parent: Optional[Span], attrs: Dict[str, Any]) -> Optional[Span]:
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return None
+            span = Span(next(self._ids), parent.id if parent else None, name, attrs)
+            self.spans.append(span)
+            return span
+
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+
+    @property
+    def total_ms(self) -> float:
+        root = self.root
+        if root is None:
+            return 0.0
+        end = root.end if root.end is not None else time.perf_counter()
+        return round((end - root.start) * 1000, 1)
+
+    def timeline(self, slowest: int = 5) -> Dict:
+        """JSON-safe summary: every span relative to the root, plus the slowest ones"""
+        root = self.root
+        origin = root.start if root else 0.0
+        now = time.perf_counter()
+        spans = []
+        for span in self.spans:
+            entry = {
+                "id": span.id,
+                "parent": span.parent_id,
+                "name": span.name,
+                "start_ms": round((span.start - origin) * 1000, 1),
+                "ms": round(((span.end if span.end is not None else now) - span.start) * 1000, 1)
+            }
+            if span.attrs:
+                entry["attrs"] = span.attrs
+            if span.error:
+                entry["error"] = span.error
+            if span.end is None:
+                entry["open"] = True
+            spans.append(entry)
+
+        children = [s for s in spans if s["parent"] is not None]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "total_ms": self.total_ms,
+            "span_count": len(spans),
+            "dropped_spans": self.dropped,
+            "slowest": [
+                {"id": s["id"], "name": s["name"], "ms": s["ms"]}
+                for s in sorted(children, key=lambda s: s["ms"], reverse=True)[:slowest]
+            ],
+            "spans": spans
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str, **attrs):
+    """Open a trace (and its root span) for the enclosed block; yields the Trace"""
+    trace = Trace(name)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        with span(name, **attrs):
+            yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the enclosed block as a child of the current span (no-op outside a trace)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield NULL_SPAN
+        return
+
+    current = trace._open(name, _current_span.get(), attrs)
+    if current is None:
+        yield NULL_SPAN
+        return
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def annotate(**attrs):
+    """Attach attributes to the current span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span()"""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def wrap(fn: Callable) -> Callable:
+    """Bind fn to the caller's context so spans opened in a worker thread join this trace"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(fn, *args, **kwargs)
+    return run
@@ -0,0 +1,61 @@
+"""
+Thread-safe in-memory TTL cache for results of paid or slow upstream calls
+
+Used for Custom Search responses (keyed by query) and ads library results
+(keyed by brand/country), where a repeat within the TTL should cost no
+quota and no latency:
+
+- entries expire ttl seconds after they were set (per-entry override)
+- LRU-bounded by max_entries
+- hits and misses go to the cache_lookups_total metric under the cache's name
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from metrics import record_cache
+
+
+class TTLCache:
+    """LRU of (value, expiry) by key"""
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                value = None
+        record_cache(self.name, value is not None)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (value, time.time() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
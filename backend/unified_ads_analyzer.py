@@ -1,68 +1,155 @@
 """
 Unified Ads Library Analyzer
 Uses: Open Source + Public APIs + Manual URLs
+
+Platforms are queried concurrently, each under its own deadline
+(ADS_META_DEADLINE, ADS_TIKTOK_DEADLINE, ADS_GOOGLE_DEADLINE), so a call
+takes as long as the slowest platform instead of the sum. A platform that
+fails or misses its deadline (status "timeout") doesn't hold up the others;
+the result is marked partial and lists it in failed_platforms. Meta results
+are paged up to META_MAX_ADS ads; if the deadline cuts pagination short,
+Meta's status is "partial" and it counts as failed too.
+
+Complete results are cached per domain/brand/country for ADS_CACHE_TTL,
+and one shared analyzer (with one keep-alive session) serves every call.
+All analyzers submit to one module-level thread pool (get_pool()).
 """
 
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from typing import Dict
-from meta_ads_scraper import MetaAdsLibraryScraper
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from meta_ads_scraper import META_MAX_ADS, MetaAdsLibraryScraper
 from tiktok_ads_scraper import TikTokAdsLibraryScraper
 from google_ads_scraper import GoogleAdsTransparencyScraper
+from ttl_cache import TTLCache
+
+ADS_META_DEADLINE = float(os.getenv("ADS_META_DEADLINE", "20"))
+ADS_TIKTOK_DEADLINE = float(os.getenv("ADS_TIKTOK_DEADLINE", "15"))
+ADS_GOOGLE_DEADLINE = float(os.getenv("ADS_GOOGLE_DEADLINE", "5"))
+ADS_CACHE_TTL = int(os.getenv("ADS_CACHE_TTL", "3600"))
+ADS_WORKERS = int(os.getenv("ADS_WORKERS", "6"))
+
+# Scrapers get this share of their platform's deadline, so a slow Meta
+# pagination stops and returns the ads it has before the platform is cut off
+SOFT_DEADLINE_SHARE = 0.9
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """Thread pool shared by every analyzer for the platform fan-out (network-bound)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=ADS_WORKERS, thread_name_prefix="ads")
+    return _pool
+
 
 class UnifiedAdsAnalyzer:
     def __init__(self):
         # Meta token from env
-        meta_token = os.getenv("META_ACCESS_TOKEN", 
+        meta_token = os.getenv("META_ACCESS_TOKEN",
             "EAAI1jNhIKv4BPnAjADBY7QtaOvRaHWF2KFC2p71bQlz8sHKSlHSEpeMtXYlJDksRQSOozj5iAWia2InTg6UHhZc5WZBIJAH94RAsu2Bffp4wDekpBXTLb12zSAj5bi79n1MTgMtWicvCWdcYq2lkiFNKui9pNJmrlHz7bbKNT7jXVaWIrBuv3mE0Q8pLvXzkrJhmXQVCOgrgQ2DZD")
-        
-        self.meta_scraper = MetaAdsLibraryScraper(meta_token)
-        self.tiktok_scraper = TikTokAdsLibraryScraper()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=ADS_WORKERS, pool_maxsize=ADS_WORKERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.meta_scraper = MetaAdsLibraryScraper(meta_token, session=self.session)
+        self.tiktok_scraper = TikTokAdsLibraryScraper(session=self.session)
         self.google_scraper = GoogleAdsTransparencyScraper()
-    
-    def analyze(self, domain: str, brand_name: str = None) -> Dict:
+
+        self.deadlines = {
+            'meta': ADS_META_DEADLINE,
+            'tiktok': ADS_TIKTOK_DEADLINE,
+            'google': ADS_GOOGLE_DEADLINE
+        }
+        self.cache = TTLCache("ads", ttl=ADS_CACHE_TTL)
+
+    def _meta(self, brand_name: str, countries, deadline: float) -> Dict:
+        # Meta (WORKING with API)
+        meta_data = self.meta_scraper.search_ads(brand_name, countries, max_ads=META_MAX_ADS, deadline=deadline)
+        ads = meta_data.get('data', [])
+        if meta_data.get('error'):
+            status = 'error'
+        elif meta_data.get('truncated'):
+            # Pagination stopped at the deadline or a failed page: more ads remain
+            status = 'partial'
+        else:
+            status = 'success'
+        return {
+            'status': status,
+            'total_ads': len(ads),
+            'ads': ads[:10],
+            'manual_url': f"https://www.facebook.com/ads/library/?q={brand_name}"
+        }
+
+    def analyze(self, domain: str, brand_name: str = None, country: str = None) -> Dict:
         """Analyze all platforms"""
-        
+
         if not brand_name:
             brand_name = domain.split('.')[0].replace('-', ' ').title()
-        
+
+        cache_key = (domain, brand_name.lower(), country)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, cached=True)
+
         results = {
             'domain': domain,
             'brand_name': brand_name,
             'platforms': {}
         }
-        
-        # Meta (WORKING with API)
-        try:
-            meta_data = self.meta_scraper.search_ads(brand_name)
-            ads = meta_data.get('data', [])
-            
-            results['platforms']['meta'] = {
-                'status': 'success' if not meta_data.get('error') else 'error',
-                'total_ads': len(ads),
-                'ads': ads[:10],
-                'manual_url': f"https://www.facebook.com/ads/library/?q={brand_name}"
-            }
-        except Exception as e:
-            results['platforms']['meta'] = {'status': 'error', 'error': str(e)}
-        
-        # TikTok (Manual URL)
-        try:
-            tiktok_data = self.tiktok_scraper.search_ads(brand_name)
-            results['platforms']['tiktok'] = tiktok_data
-        except Exception as e:
-            results['platforms']['tiktok'] = {'status': 'error', 'error': str(e)}
-        
-        # Google (Manual URL)
-        try:
-            google_data = self.google_scraper.search_ads(domain)
-            results['platforms']['google'] = google_data
-        except Exception as e:
-            results['platforms']['google'] = {'status': 'error', 'error': str(e)}
-        
+
+        countries = [country] if country else None
+        tasks = {
+            'meta': lambda deadline: self._meta(brand_name, countries, deadline),
+            # TikTok and Google (Manual URL)
+            'tiktok': lambda deadline: self.tiktok_scraper.search_ads(
+                brand_name, timeout=max(0.1, deadline - time.monotonic())
+            ),
+            'google': lambda deadline: self.google_scraper.search_ads(domain)
+        }
+        start = time.monotonic()
+        pool = get_pool()
+        futures = {
+            name: pool.submit(task, start + self.deadlines[name] * SOFT_DEADLINE_SHARE)
+            for name, task in tasks.items()
+        }
+
+        for name, future in futures.items():
+            remaining = start + self.deadlines[name] - time.monotonic()
+            try:
+                results['platforms'][name] = future.result(timeout=max(0.0, remaining))
+            except FuturesTimeout:
+                future.cancel()
+                results['platforms'][name] = {
+                    'status': 'timeout',
+                    'error': f"No response within {self.deadlines[name]:g}s"
+                }
+            except Exception as e:
+                results['platforms'][name] = {'status': 'error', 'error': str(e)}
+
+        failed = [name for name, p in results['platforms'].items()
+                  if p.get('status') in ('timeout', 'error', 'partial') or 'error' in p]
+        if failed:
+            # Other platforms' results still come back; nothing is cached so failures are retried
+            results['partial'] = True
+            results['failed_platforms'] = failed
+        else:
+            self.cache.set(cache_key, results)
+
         return results
 
 
-def analyze_competitor_ads(domain: str, brand_name: str = None) -> Dict:
-    """Main function"""
-    analyzer = UnifiedAdsAnalyzer()
-    return analyzer.analyze(domain, brand_name)
+# Global analyzer instance
+ads_analyzer = UnifiedAdsAnalyzer()
@@ -0,0 +1,111 @@
+"""
+Short-TTL cache of authenticated principals
+
+Resolving the caller used to cost one users-table query per request. The
+cache keeps a detached snapshot of the fields authorization needs, keyed by
+email. Writers that change quota, role or active state must invalidate.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from metrics import record_cache
+
+
+class Principal:
+    """Detached snapshot of a User row, safe to share across requests"""
+    __slots__ = ("id", "email", "role", "quota", "is_active")
+
+    def __init__(self, id: int, email: str, role: str, quota: int, is_active: bool):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.quota = quota
+        self.is_active = is_active
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role or "user",
+            quota=user.quota,
+            is_active=bool(user.is_active)
+        )
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+
+class UserCache:
+    """Thread-safe LRU of principals with a TTL"""
+
+    def __init__(self, ttl: int = 30, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # email: (principal, expiry)
+        self.ids: Dict[int, str] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, email: str) -> Optional[Principal]:
+        """Get cached principal if not expired"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(email)
+            if entry and entry[1] > now:
+                self.entries.move_to_end(email)
+                self.hits += 1
+                record_cache("user", True)
+                return entry[0]
+            if entry:
+                self._drop(email)
+            self.misses += 1
+            record_cache("user", False)
+            return None
+
+    def set(self, principal: Principal) -> Principal:
+        """Cache principal for ttl seconds"""
+        with self.lock:
+            self.entries[principal.email] = (principal, time.time() + self.ttl)
+            self.entries.move_to_end(principal.email)
+            self.ids[principal.id] = principal.email
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+        return principal
+
+    def invalidate(self, email: Optional[str] = None, user_id: Optional[int] = None):
+        """Drop a principal by email or user id"""
+        with self.lock:
+            if email is None and user_id is not None:
+                email = self.ids.get(user_id)
+            if email is not None:
+                self._drop(email)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.ids.clear()
+
+    def _drop(self, email: str):
+        entry = self.entries.pop(email, None)
+        if entry:
+            self.ids.pop(entry[0].id, None)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0
+        }
+
+
+# Global cache instance
+user_cache = UserCache(ttl=int(os.getenv("USER_CACHE_TTL", "30")))